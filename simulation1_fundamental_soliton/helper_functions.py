@@ -10,6 +10,9 @@ DATE: 2020-06-01
 """
 import numpy as np
 
+# -- np.trapz WAS RENAMED TO np.trapezoid IN NUMPY 2.0
+_trapezoid = getattr(np, "trapezoid", None) or np.trapz
+
 
 def  energy(t,A):
     """Pulse energy
@@ -31,7 +34,7 @@ def  energy(t,A):
             J.A.C. Weideman and B.M. Herbst
             SIAM J. Math. Num. Analysis, 23 (1986) 485
     """
-    return np.trapz(np.abs(A)**2,x=t)
+    return _trapezoid(np.abs(A)**2,x=t)
 
 
 def dispersionLength(t0,beta2):
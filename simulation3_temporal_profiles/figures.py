@@ -13,6 +13,7 @@ import numpy.fft as nfft
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 import matplotlib.colors as col
+from results import PropagationResult
 
 
 # -- CONVENIENT ABBREVIATIONS
@@ -30,7 +31,9 @@ def figure_1a(z,t, u, tLim=None ,wLim=None, oName=None):
     Args:
         z (array): samples along propagation distance
         t (array): time samples
-        u (array): time domain field envelope
+        u (array or PropagationResult): time domain field envelope, or
+                        result object whose cached intensity and spectrum
+                        are reused
         tLim (2-tuple): time range in the form (tMin,tMax)
                         (optional, default=None)
         wLim (2-tuple): angular frequency range in the form (wMin,wMax)
@@ -67,7 +70,8 @@ def figure_1a(z,t, u, tLim=None ,wLim=None, oName=None):
         I[I<1e-6]=1e-6
         return I
 
-    w = nfft.ifftshift(nfft.fftfreq(t.size,d=t[1]-t[0])*2*np.pi)
+    res = u if isinstance(u, PropagationResult) else PropagationResult(z, t, u)
+    w = res.w
 
     if tLim==None:
        tLim = (np.min(t),np.max(t))
@@ -79,8 +83,8 @@ def figure_1a(z,t, u, tLim=None ,wLim=None, oName=None):
     cmap=mpl.cm.get_cmap('jet')
 
     # -- LEFT SUB-FIGURE: TIME-DOMAIN PROPAGATION CHARACTERISTICS
-    It = np.abs(u)**2
-    It /= np.max(It[0])
+    It = res.intensity()
+    It = It/np.max(It[0])
     It = _truncate(It)
     im1 = ax1.pcolorfast(t, z, It[:-1,:-1],
                          norm=col.LogNorm(vmin=It.min(),vmax=It.max()),
@@ -96,8 +100,8 @@ def figure_1a(z,t, u, tLim=None ,wLim=None, oName=None):
     ax1.set_ylabel(r"Propagation distance $z$")
 
     # -- RIGHT SUB-FIGURE: ANGULAR FREQUENCY-DOMAIN PROPAGATION CHARACTERISTICS 
-    Iw = np.abs(nfft.ifftshift(FT(u, axis=-1),axes=-1))**2
-    Iw /= np.max(Iw[0])
+    Iw = res.spectrum()
+    Iw = Iw/np.max(Iw[0])
     Iw = _truncate(Iw)
     im2 = ax2.pcolorfast(w,z,Iw[:-1,:-1],
                          norm=col.LogNorm(vmin=Iw.min(),vmax=Iw.max()),
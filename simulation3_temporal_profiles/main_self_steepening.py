@@ -6,17 +6,18 @@ import matplotlib.pyplot as plt
 import numpy as np
 from figures import figure_2a
 from split_step_solver import SSFM_HONSE_symmetric
+from snapshots import snapshotIndex
+from results import PropagationResult
 
-def figure_pulse_shape(z, t, Azt, tLim = (-5.5,5.5)): 
+def figure_pulse_shape(res, tLim = (-5.5,5.5)): 
     f, ax = plt.subplots() 
     
-    I = np.abs(Azt)**2
+    t = res.t
+    I = res.intensity()[snapshotIndex(res.z, [10.0, 5.0, 0.0])]
     
-    _z2id = lambda z0: np.argmin(np.abs(z-z0))
-    
-    ax.plot(t, I[_z2id(10.0), :], color = 'k', dashes = [], label = "10")
-    ax.plot(t, I[_z2id(5.0), :], color = 'k', dashes = [3,1], label = "5")
-    ax.plot(t, I[_z2id(0.0), :], color = 'k', dashes = [1,1], label = "0")
+    ax.plot(t, I[0], color = 'k', dashes = [], label = "10")
+    ax.plot(t, I[1], color = 'k', dashes = [3,1], label = "5")
+    ax.plot(t, I[2], color = 'k', dashes = [1,1], label = "0")
     
     ax.set_xlim(tLim)
     ax.set_xlabel("Time $t$")
@@ -62,7 +63,7 @@ def main_a():
     z, Azt = SSFM_HONSE_symmetric(_z, t, A0, beta2, beta3, beta4, gamma, s, nSkip)
 
     # -- POSTPROCESS RESULTS
-    figure_pulse_shape(z, t, Azt, tLim = (-6.5,6.5))
+    figure_pulse_shape(PropagationResult(z, t, Azt), tLim = (-6.5,6.5))
 
 if __name__ == "__main__":
     main_a()
@@ -0,0 +1,178 @@
+""" adaptive_grid.py
+
+module implementing propagation on a time grid that grows with the pulse,
+see SSFM_HONSE_adaptive
+
+The spectrum of a self-steepening pulse starts narrow and broadens and
+skews over z, so that the number of time samples needed at the end of a run
+is not needed at its start. SSFM_HONSE_adaptive starts on a small grid and
+monitors the energy in the outer spectral bands and at the edges of the
+time window, using the events SpectralEdge and TemporalEdge. Once a
+threshold is crossed, propagation is stopped, the grid is doubled and the
+run is continued from its state:
+    - spectral growth halves the time step by spectral zero-padding, which
+      doubles the frequency window at fixed resolution
+    - temporal growth doubles the time window at fixed time step by
+      padding the field with zeros
+The linear propagators are rebuilt for each new grid by the solver.
+"""
+import numpy as np
+import numpy.fft as nfft
+from split_step_solver import SSFM_HONSE_symmetric
+from events import SpectralEdge, TemporalEdge
+
+# -- CONVENIENT ABBREVIATIONS
+FT = nfft.ifft
+IFT = nfft.fft
+
+
+def refineTime(t, A):
+    """Halve the time step by spectral zero-padding
+
+    Args:
+        t (array): time samples, of even size
+        A (array): time domain field envelopes along the last axis
+
+    Returns: (t, A)
+        t (array): time samples of twice the size, covering the same window
+        A (array): band-limited interpolation of the field envelopes
+    """
+    N = t.size
+    A_w = FT(A)
+    B_w = np.zeros(A.shape[:-1]+(2*N,), dtype=complex)
+    B_w[..., :N//2] = A_w[..., :N//2]
+    B_w[..., -N//2+1:] = A_w[..., N//2+1:]
+    # -- SPLIT NYQUIST COMPONENT SYMMETRICALLY
+    B_w[..., N//2] = B_w[..., -N//2] = 0.5*A_w[..., N//2]
+    return t[0] + 0.5*(t[1]-t[0])*np.arange(2*N), IFT(B_w)
+
+
+def extendWindow(t, A):
+    """Double the time window by padding with zeros on both sides
+
+    Args:
+        t (array): time samples, of even size
+        A (array): time domain field envelopes along the last axis
+
+    Returns: (t, A)
+        t (array): time samples of twice the size, at the same time step
+        A (array): zero-padded field envelopes
+    """
+    N = t.size
+    dt = t[1]-t[0]
+    pad = [(0, 0)]*(A.ndim-1) + [(N//2, N-N//2)]
+    return t[0] - (N//2)*dt + dt*np.arange(2*N), np.pad(A, pad)
+
+
+def SSFM_HONSE_adaptive(z, t, A0_t, beta2, beta3, beta4, gamma, s=0, nSkip=1,
+                        maxNt=2**16, spectralTol=1e-6, temporalTol=1e-6, band=0.1,
+                        full_output=False, **kwargs):
+    """Split step fourier method on an adaptively growing time grid
+
+    NOTES:
+        - propagation stops whenever the fraction of spectral energy in the
+          outer band of the frequency window exceeds spectralTol, or the
+          fraction of energy in the outer bands of the time window exceeds
+          temporalTol. The grid is doubled accordingly and propagation is
+          continued from the solver state, see module continuation.py.
+        - snapshots recorded on earlier grids are mapped onto the final grid
+          by the same zero-padding operations, which are exact for the
+          band-limited fields of the solver
+        - a "stop" event among events ends the run, also if the growth
+          thresholds are crossed at the same step
+        - arguments given on the time grid, such as absorber or
+          spectralFilter, are not supported
+
+    Args:
+        z (array): samples along propagation distance
+        t (array): initial time samples, of even size
+        A0_t (array): time domain field envelope on t
+        beta2 (float): 2nd order dispersion parameter
+        beta3 (float): 3rd order dispersion parameter
+        beta4 (float): 4th order dispersion parameter
+        gamma (float): nonlinear parameter
+        s (float): self-steepening parameter (optional, default=0)
+        nSkip (int): keep only each nSkip-th field configuration
+                        (optional, default=1)
+        maxNt (int): maximal number of time samples
+                        (optional, default=2**16)
+        spectralTol (float): threshold for the fraction of spectral energy in
+                        the outer band (optional, default=1e-6)
+        temporalTol (float): threshold for the fraction of energy at the
+                        edges of the time window (optional, default=1e-6)
+        band (float): width of the monitored outer bands, as fraction of
+                        the window (optional, default=0.1)
+        full_output (bool): additionally return dictionary with solver
+                        information (optional, default=False)
+        **kwargs: further keyword arguments of SSFM_HONSE_symmetric
+
+    Returns: (z, t, Azt)
+        z (array): resulting z-samples at which field envelope is recorded
+        t (array): final time samples
+        Azt (array): resulting time domain field envelope on the final grid
+        info (dict): only if full_output is True. Solver information of the
+            last segment, with the events of all segments, and the list of
+            (z, Nt, window) of each grid change under key "regrids"
+    """
+    if kwargs.get("absorber") is not None or kwargs.get("spectralFilter") is not None:
+        raise ValueError("absorber and spectralFilter are not supported")
+    userEvents = list(kwargs.pop("events", None) or [])
+    detectSpectral = SpectralEdge(spectralTol, band, action="stop")
+    detectTemporal = TemporalEdge(temporalTol, band, action="stop")
+
+    segments = []   # -- (z, Azt, number of grid changes before segment)
+    changes = []    # -- GRID CHANGES, AS FUNCTIONS OF (t, A)
+    regrids = []
+    events = []
+    A_t, state = A0_t, None
+    while True:
+        grow = [detectSpectral, detectTemporal] if 2*t.size <= maxNt else []
+        zz, Azt, info = SSFM_HONSE_symmetric(z, t, A_t, beta2, beta3, beta4, gamma, s,
+                                             nSkip, events=userEvents+grow, state=state,
+                                             full_output=True, **kwargs)
+        events += [e for e in info["events"] if e[0] not in ("spectralEdge", "temporalEdge")]
+        state = info["state"]
+        # -- THE GRID GROWS ONLY IF THE SEGMENT WAS STOPPED BY THE GROWTH
+        # EVENTS ALONE; A STOP EVENT OF THE USER ENDS THE RUN
+        fired = [f for f in grow if f(t, state["A"])]
+        stopped = [ev for ev in userEvents if ev.action=="stop" and ev(t, state["A"])]
+        if info["zStop"] is None or not fired or stopped:
+            segments.append((zz, Azt, len(changes)))
+            break
+
+        # -- DISCARD SNAPSHOT KEPT ONLY BECAUSE THE SEGMENT WAS STOPPED
+        if state["forcedRecord"]:
+            zz, Azt = zz[:-1], Azt[:-1]
+        segments.append((zz, Azt, len(changes)))
+
+        # -- GROW GRID AND MAP SOLVER STATE ONTO IT
+        ops = [refineTime] if detectSpectral in fired else []
+        if detectTemporal in fired and 2**(len(ops)+1)*t.size <= maxNt:
+            ops.append(extendWindow)
+        state = dict(state)
+        for op in ops:
+            tNew, state["A"] = op(t, state["A"])
+            if state["lastRecorded"] is not None:
+                state["lastRecorded"] = op(t, state["lastRecorded"])[1]
+            changes.append((op, t))
+            t = tNew
+        # -- THE LINEAR OPERATOR IS RECOMPUTED ON THE NEW GRID
+        del state["betas"], state["D_w"]
+        regrids.append((state["z"], t.size, t[-1]-t[0]+t[1]-t[0]))
+
+    # -- MAP SNAPSHOTS OF EARLIER SEGMENTS ONTO THE FINAL GRID
+    res_z, res_A = [], []
+    for zz, Azt, k in segments:
+        for op, tOld in changes[k:]:
+            Azt = op(tOld, Azt)[1]
+        res_z.append(zz)
+        res_A.append(Azt)
+    res_z, res_A = np.concatenate(res_z), np.concatenate(res_A)
+    if full_output:
+        info["events"] = events
+        info["regrids"] = regrids
+        return res_z, t, res_A, info
+    return res_z, t, res_A
+
+
+# EOF: adaptive_grid.py
@@ -0,0 +1,51 @@
+""" boundaries.py
+
+module implementing loss profiles for absorbing time boundaries and
+super-Gaussian spectral filters, to be passed as absorber and
+spectralFilter arguments of SSFM_HONSE_symmetric
+
+Both profiles are field loss rates alpha that vanish in the interior of the
+computational domain and grow steeply towards its edges. Radiation and the
+drifting pulse tail are thus absorbed before they wrap around the periodic
+boundary, which allows for a smaller time window and fewer sample points.
+"""
+import numpy as np
+import numpy.fft as nfft
+
+
+def absorbingBoundary(t, tCut, order=8, strength=1.):
+    """Super-Gaussian absorbing time boundary
+
+    Args:
+        t (array): time samples
+        tCut (float): time beyond which absorption becomes significant
+        order (int): order of the super-Gaussian profile; larger values
+                        give a sharper onset (optional, default=8)
+        strength (float): loss rate at |t|=tCut (optional, default=1)
+
+    Returns:
+        alpha_t (array): temporal field loss rate
+    """
+    return strength*(t/tCut)**(2*order)
+
+
+def superGaussianFilter(t, wCut, order=8, strength=1.):
+    """Super-Gaussian spectral filter
+
+    Args:
+        t (array): time samples, used to construct the frequency grid
+        wCut (float): angular frequency beyond which the filter becomes
+                        significant
+        order (int): order of the super-Gaussian profile; larger values
+                        give a sharper onset (optional, default=8)
+        strength (float): loss rate at |w|=wCut (optional, default=1)
+
+    Returns:
+        alpha_w (array): spectral field loss rate in the order of
+            nfft.fftfreq
+    """
+    w = nfft.fftfreq(t.size,d=t[1]-t[0])*2*np.pi
+    return strength*(w/wCut)**(2*order)
+
+
+# EOF: boundaries.py
@@ -0,0 +1,22 @@
+""" conftest.py
+
+fixtures shared by the test modules
+"""
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def Nt():
+    """number of time samples; override in a test module, or parametrize
+    a test on Nt, where a different grid is needed"""
+    return 512
+
+
+@pytest.fixture
+def t(Nt):
+    """time samples of the normalized units used by the tests"""
+    return np.linspace(-20, 20, Nt, endpoint=False)
+
+
+# EOF: conftest.py
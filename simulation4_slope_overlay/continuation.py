@@ -0,0 +1,233 @@
+""" continuation.py
+
+module implementing the continuation of propagation runs of
+SSFM_HONSE_symmetric to larger distances, in memory or via result files
+
+A run with full_output=True keeps its final field and solver state in its
+info dictionary. continuePropagation() resumes the run from there on the
+extension of its z-grid and appends the new snapshots, so that the prefix
+is not propagated again. The result is bit-identical to a single run over
+the extended grid. A run saved by saveRun() is continued by appendRun(),
+which writes only the new snapshots, to a part file next to the original
+one; loadRun() joins the parts.
+
+Example:
+    >>> z, Azt, info = SSFM_HONSE_symmetric(z, t, A0, beta2, beta3, beta4,
+    ...                                     gamma, s, nSkip, full_output=True)
+    >>> z, Azt, info = continuePropagation(z, Azt, info, t, 20., beta2, beta3,
+    ...                                    beta4, gamma, s, nSkip)
+"""
+import os
+import numpy as np
+from split_step_solver import SSFM_HONSE_symmetric
+
+# -- SCALAR ENTRIES OF THE SOLVER STATE THAT MAY BE None
+_OPTIONAL = ("lastRecorded", "frameVelocity", "centroid", "betas")
+
+
+def extendedGrid(state, zMax):
+    """z-grid of a run extended to a larger distance
+
+    Args:
+        state (dict): solver state of the run
+        zMax (float): new upper limit of the propagation distance
+
+    Returns:
+        z (array): z-grid with the stepsize of the run, whose first samples
+            coincide with those of the run, ending at the sample closest to
+            zMax, or exactly at zMax if it lies on the grid
+    """
+    n = int(round((zMax-state["z0"])/state["dz"]))+1
+    z = state["z0"] + state["dz"]*np.arange(n)
+    # -- THE END IS NOT MOVED BY ROUNDING ERRORS OF THE GRID
+    if abs(z[-1]-zMax) < 1e-9*state["dz"]:
+        z[-1] = zMax
+    return z
+
+
+def _continued(info, t, zMax, args, kwargs):
+    """new snapshots of a run continued from its state, with the events,
+    absorbed energy and propagator updates of both runs in info"""
+    state = info["state"]
+    zNew, ANew, infoNew = SSFM_HONSE_symmetric(extendedGrid(state, zMax), t, state["A"],
+                                               *args, state=state, full_output=True,
+                                               **kwargs)
+    infoNew["events"] = info["events"] + infoNew["events"]
+    infoNew["absorbedEnergy"] += info["absorbedEnergy"]
+    infoNew["propagatorUpdates"] += info["propagatorUpdates"]
+    return zNew, ANew, infoNew
+
+
+def continuePropagation(z, Azt, info, t, zMax, *args, **kwargs):
+    """Continue a propagation run to a larger distance
+
+    NOTES:
+        - args and kwargs must be the fiber parameters and options of the
+          original run; state and full_output are set here
+        - the info dictionary of the result accumulates events, absorbed
+          energy and propagator updates of both runs
+        - the final snapshot of the original run is dropped if it was kept
+          only because the run ended there, i.e. for recordTol or where an
+          event stopped it
+
+    Args:
+        z (array): z-samples of the original run
+        Azt (array): field envelopes (or observables) of the original run
+        info (dict): solver information of the original run
+        t (array): time samples
+        zMax (float): new upper limit of the propagation distance
+        *args: positional arguments of SSFM_HONSE_symmetric following A0_t
+        **kwargs: keyword arguments of SSFM_HONSE_symmetric
+
+    Returns: (z, Azt, info)
+        z (array): z-samples of the original and the continued run
+        Azt (array): field envelopes (or observables) of both runs
+        info (dict): solver information of the continued run
+    """
+    state = info["state"]
+    # -- DROP THE FINAL SNAPSHOT IF IT WAS KEPT ONLY AS END OF THE RUN
+    if state["forcedRecord"]:
+        z, Azt = z[:-1], Azt[:-1]
+        if "frameOffset" in info:
+            info = dict(info, frameOffset=info["frameOffset"][:-1])
+    zNew, ANew, infoNew = _continued(info, t, zMax, args, kwargs)
+    if "frameOffset" in info:
+        infoNew["frameOffset"] = np.concatenate((info["frameOffset"], infoNew["frameOffset"]))
+    return np.concatenate((z, zNew)), np.concatenate((Azt, ANew)), infoNew
+
+
+def _parts(fileName):
+    """names of the files of a run saved by saveRun() and continued by
+    appendRun(), in order"""
+    root, ext = os.path.splitext(str(fileName))
+    names = [str(fileName)]
+    while os.path.exists("%s.part%d%s" % (root, len(names), ext)):
+        names.append("%s.part%d%s" % (root, len(names), ext))
+    return names
+
+
+def _save(fileName, z, Azt, info, dropLast=False):
+    """write one file of a run; dropLast marks that the last snapshot of
+    the preceding files is superseded"""
+    state = info["state"]
+    data = {"z": z, "Azt": Azt,
+            "absorbedEnergy": info["absorbedEnergy"],
+            "propagatorUpdates": info["propagatorUpdates"],
+            "eventNames": np.array([e[0] for e in info["events"]], dtype=str),
+            "eventZ": np.array([e[1] for e in info["events"]], dtype=float),
+            "dropLast": dropLast}
+    if info["zStop"] is not None:
+        data["zStop"] = info["zStop"]
+    if "frameOffset" in info:
+        data["frameOffset"] = info["frameOffset"]
+    for key, value in state.items():
+        if key == "events":
+            value = np.array(value, dtype=str)
+        if value is not None:
+            data["state_"+key] = value
+    # -- THE FILE IS WRITTEN ATOMICALLY
+    tmpName = str(fileName)+".tmp"
+    with open(tmpName, "wb") as f:
+        np.savez(f, **data)
+    os.replace(tmpName, fileName)
+
+
+def _load(fileName):
+    """read one file of a run, see _save()"""
+    with np.load(fileName) as data:
+        info = {"events": list(zip(data["eventNames"].tolist(), data["eventZ"].tolist())),
+                "zStop": float(data["zStop"]) if "zStop" in data else None,
+                "absorbedEnergy": float(data["absorbedEnergy"]),
+                "propagatorUpdates": int(data["propagatorUpdates"])}
+        if "frameOffset" in data:
+            info["frameOffset"] = data["frameOffset"]
+        state = dict.fromkeys(_OPTIONAL)
+        for key in data:
+            if key.startswith("state_"):
+                value = data[key]
+                state[key[6:]] = value if value.ndim else value.item()
+        state["events"] = state["events"].tolist()
+        info["state"] = state
+        dropLast = bool(data["dropLast"]) if "dropLast" in data else False
+        return data["z"], data["Azt"], info, dropLast
+
+
+def saveRun(fileName, z, Azt, info):
+    """Save a run, including its solver state, to a .npz file
+
+    NOTES:
+        - part files of an earlier run of the same name are removed
+
+    Args:
+        fileName (str): name of .npz file
+        z (array): z-samples
+        Azt (array): field envelopes or observables
+        info (dict): solver information
+    """
+    for name in _parts(fileName)[1:]:
+        os.remove(name)
+    _save(fileName, z, Azt, info)
+
+
+def loadRun(fileName):
+    """Load a run saved by saveRun(), including its continuations by
+    appendRun()
+
+    Args:
+        fileName (str): name of .npz file
+
+    Returns: (z, Azt, info)
+        z (array): z-samples
+        Azt (array): field envelopes or observables
+        info (dict): solver information, including solver state
+    """
+    zs, As, offsets = [], [], []
+    for name in _parts(fileName):
+        z, Azt, info, dropLast = _load(name)
+        if dropLast:
+            zs[-1], As[-1] = zs[-1][:-1], As[-1][:-1]
+            if offsets:
+                offsets[-1] = offsets[-1][:-1]
+        zs.append(z)
+        As.append(Azt)
+        if "frameOffset" in info:
+            offsets.append(info["frameOffset"])
+    if offsets:
+        info["frameOffset"] = np.concatenate(offsets)
+    return np.concatenate(zs), np.concatenate(As), info
+
+
+def appendRun(fileName, t, zMax, *args, **kwargs):
+    """Continue a run saved in a .npz file and append the new snapshots
+
+    NOTES:
+        - the new snapshots are written to a part file next to fileName,
+          i.e. run.part1.npz, run.part2.npz, ... for run.npz; the existing
+          files are not rewritten. Only the last file is read in order to
+          continue the run
+        - the final snapshot of the original run is dropped on loading if
+          it was kept only because the run ended there, i.e. for recordTol
+          or where an event stopped it
+
+    Args:
+        fileName (str): name of .npz file
+        t (array): time samples
+        zMax (float): new upper limit of the propagation distance
+        *args: positional arguments of SSFM_HONSE_symmetric following A0_t
+        **kwargs: keyword arguments of SSFM_HONSE_symmetric
+
+    Returns: (z, Azt, info)
+        z (array): z-samples of the complete run
+        Azt (array): field envelopes (or observables) of the complete run
+        info (dict): solver information of the complete run
+    """
+    names = _parts(fileName)
+    _, _, info, _ = _load(names[-1])
+    zNew, ANew, infoNew = _continued(info, t, zMax, args, kwargs)
+    root, ext = os.path.splitext(str(fileName))
+    _save("%s.part%d%s" % (root, len(names), ext), zNew, ANew, infoNew,
+          dropLast=info["state"]["forcedRecord"])
+    return loadRun(fileName)
+
+
+# EOF: continuation.py
@@ -0,0 +1,236 @@
+""" convergence.py
+
+module implementing a harness for convergence studies of the split step
+solvers. It propagates a pulse with each registered scheme over a ladder of
+z-stepsizes, optionally in parallel, measures the RMS error with respect to a
+reference solution and the wall-clock time of each run, and fits the observed
+order of convergence. The results feed figure_1b (error vs. stepsize) and figure_1d
+(error vs. wall-clock time).
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from split_step_solver import SSFM_NSE_simple, SSFM_NSE_symmetric, SSFM_HONSE_symmetric
+from split_step_solver import SSFM_NSE_composition
+
+
+def _NSE_simple(z, t, A0_t, par):
+    return SSFM_NSE_simple(z, t, A0_t, par["beta2"], par["gamma"], z.size-1)[1][-1]
+
+
+def _NSE_symmetric(z, t, A0_t, par):
+    return SSFM_NSE_symmetric(z, t, A0_t, par["beta2"], par["gamma"], z.size-1)[1][-1]
+
+
+def _HONSE_symmetric(z, t, A0_t, par):
+    return SSFM_HONSE_symmetric(z, t, A0_t, par["beta2"], par.get("beta3", 0),
+                                par.get("beta4", 0), par["gamma"], par.get("s", 0),
+                                z.size-1)[1][-1]
+
+
+def _NSE_yoshida4(z, t, A0_t, par):
+    return SSFM_NSE_composition(z, t, A0_t, par["beta2"], par["gamma"], z.size-1,
+                                scheme="yoshida4")[1][-1]
+
+
+def _NSE_yoshida6(z, t, A0_t, par):
+    return SSFM_NSE_composition(z, t, A0_t, par["beta2"], par["gamma"], z.size-1,
+                                scheme="yoshida6")[1][-1]
+
+
+def _HONSE_yoshida4(z, t, A0_t, par):
+    return SSFM_HONSE_symmetric(z, t, A0_t, par["beta2"], par.get("beta3", 0),
+                                par.get("beta4", 0), par["gamma"], par.get("s", 0),
+                                z.size-1, scheme="yoshida4")[1][-1]
+
+
+# -- REGISTRY OF SCHEMES. EACH MAPS (z, t, A0_t, par) TO THE FIELD AT z[-1]
+SCHEMES = {
+    "simple": _NSE_simple,
+    "symmetric": _NSE_symmetric,
+    "HONSE": _HONSE_symmetric,
+    "yoshida4": _NSE_yoshida4,
+    "yoshida6": _NSE_yoshida6,
+    "HONSE-yoshida4": _HONSE_yoshida4,
+}
+
+
+def registerScheme(name, func):
+    """Register a scheme for convergence studies
+
+    NOTES:
+        - func must be a module-level function so that it can be run by the
+          worker processes. It is passed to them by reference, so that the
+          registry need not be rebuilt in workers that are spawned rather
+          than forked.
+
+    Args:
+        name (str): name of the scheme
+        func (callable): function of the form func(z, t, A0_t, par) returning
+                        the time domain field envelope at z[-1], where par is
+                        a dictionary of the fiber parameters
+    """
+    SCHEMES[name] = func
+
+
+def solitonReference(t, zMax, par, t0=1.):
+    """Fundamental soliton of the NSE
+
+    Args:
+        t (array): time samples
+        zMax (float): propagation distance
+        par (dict): fiber parameters beta2 and gamma
+        t0 (float): pulse duration (optional, default=1)
+
+    Returns:
+        A (array): time domain field envelope at zMax
+    """
+    P0 = np.abs(par["beta2"])/t0/t0/par["gamma"]
+    return np.sqrt(P0)/np.cosh(t/t0)*np.exp(0.5j*par["gamma"]*P0*zMax)
+
+
+def rmsError(A, A_ref):
+    """Relative root-mean-square error
+
+    Args:
+        A (array): time domain field envelope
+        A_ref (array): reference field envelope
+
+    Returns:
+        err (float): RMS error normalized to RMS of the reference
+    """
+    return np.sqrt(np.sum(np.abs(A-A_ref)**2)/np.sum(np.abs(A_ref)**2))
+
+
+def _scheme(scheme):
+    """registered scheme of the given name, or scheme itself if callable"""
+    return SCHEMES[scheme] if isinstance(scheme, str) else scheme
+
+
+def _run(func, dz, zMax, t, A0_t, par):
+    """time a single run of a scheme"""
+    z = np.linspace(0, zMax, int(round(zMax/dz))+1, endpoint=True)
+    t_start = time.perf_counter()
+    A = func(z, t, A0_t, par)
+    return A, time.perf_counter()-t_start
+
+
+def convergenceStudy(t, A0_t, zMax, par, dzList, schemes=("simple", "symmetric"),
+                     reference=None, refScheme="symmetric", refDz=None, maxWorkers=1):
+    """Convergence study over a ladder of z-stepsizes
+
+    NOTES:
+        - runs are executed one after another by default. For maxWorkers > 1
+          they are executed concurrently by a process pool; the errors are
+          unaffected, but the wall-clock times then include contention
+          between the workers and are unsuitable for costRanking.
+
+    Args:
+        t (array): time samples
+        A0_t (array): initial time domain field envelope
+        zMax (float): propagation distance
+        par (dict): fiber parameters passed to the schemes
+        dzList (array): z-stepsizes
+        schemes (tuple): names of registered schemes
+                        (optional, default=("simple", "symmetric"))
+        reference (array or callable): reference field at zMax, or function
+                        reference(t, zMax, par) computing it, e.g.
+                        solitonReference. If None, a run of refScheme at
+                        stepsize refDz is used (optional, default=None)
+        refScheme (str): scheme for the reference run
+                        (optional, default="symmetric")
+        refDz (float): stepsize of the reference run
+                        (optional, default: min(dzList)/10)
+        maxWorkers (int): number of worker processes, None for all cores
+                        (optional, default=1)
+
+    Returns:
+        res (dict): for each scheme, a dictionary holding the arrays "dz",
+            "error" and "time" and the fitted order of convergence "order"
+    """
+    if callable(reference):
+        reference = reference(t, zMax, par)
+    elif reference is None:
+        refDz = min(dzList)/10 if refDz is None else refDz
+        reference, _ = _run(_scheme(refScheme), refDz, zMax, t, A0_t, par)
+
+    # -- SCHEMES ARE RESOLVED HERE AND PASSED TO THE WORKERS BY REFERENCE
+    runs = [(scheme, dz) for scheme in schemes for dz in dzList]
+    maxWorkers = os.cpu_count() if maxWorkers is None else maxWorkers
+    if maxWorkers == 1:
+        out = {run: _run(_scheme(run[0]), run[1], zMax, t, A0_t, par) for run in runs}
+    else:
+        with ProcessPoolExecutor(maxWorkers) as pool:
+            futures = {run: pool.submit(_run, _scheme(run[0]), run[1], zMax, t, A0_t, par)
+                       for run in runs}
+        out = {run: f.result() for run, f in futures.items()}
+
+    res = {}
+    for scheme in schemes:
+        err, cpu = [], []
+        for dz in dzList:
+            A, T = out[(scheme, dz)]
+            err.append(rmsError(A, reference))
+            cpu.append(T)
+        res[scheme] = {"dz": np.asarray(dzList), "error": np.asarray(err),
+                       "time": np.asarray(cpu), "order": observedOrder(dzList, err)}
+    return res
+
+
+def observedOrder(dz, err):
+    """Observed order of convergence
+
+    Args:
+        dz (array): z-stepsizes
+        err (array): corresponding errors
+
+    Returns:
+        p (float): slope of a linear fit of log(err) vs. log(dz)
+    """
+    return np.polyfit(np.log(dz), np.log(err), 1)[0]
+
+
+def costRanking(res, targetError):
+    """Rank schemes by the wall-clock time needed to reach a target error
+
+    The time needed by each scheme is interpolated log-log between the runs
+    bracketing the target error.
+
+    Args:
+        res (dict): results of convergenceStudy
+        targetError (float): target RMS error
+
+    Returns:
+        ranking (list): (time, scheme, dz) tuples sorted by time; schemes
+            that do not reach the target error are omitted
+    """
+    ranking = []
+    for scheme, r in res.items():
+        idx = np.argsort(r["error"])
+        logErr = np.log(r["error"][idx])
+        if logErr[0] > np.log(targetError):
+            continue
+        x = np.log(targetError)
+        T = np.exp(np.interp(x, logErr, np.log(r["time"][idx])))
+        dz = np.exp(np.interp(x, logErr, np.log(r["dz"][idx])))
+        ranking.append((T, scheme, dz))
+    return sorted(ranking)
+
+
+def figure1bInput(res, schemes=("simple", "symmetric")):
+    """Convert results to the (dz, err1, err2) list expected by figure_1b
+
+    Args:
+        res (dict): results of convergenceStudy
+        schemes (tuple): the two schemes to compare
+                        (optional, default=("simple", "symmetric"))
+
+    Returns:
+        res (list): (dz, RMSError_1, RMSError_2) tuples
+    """
+    r1, r2 = res[schemes[0]], res[schemes[1]]
+    return list(zip(r1["dz"], r1["error"], r2["error"]))
+
+
+# EOF: convergence.py
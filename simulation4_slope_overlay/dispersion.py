@@ -0,0 +1,142 @@
+""" dispersion.py
+
+module implementing frequency-dependent dispersion and loss operators from
+tabulated fiber data, see the dispersion argument of SSFM_HONSE_symmetric
+
+A fiber table holds the propagation constant beta(w) and the power loss
+alpha(w) sampled at angular frequency detunings w from the carrier. It is
+interpolated once onto the simulation frequency grid, yielding the complex
+linear operator D_w = beta(w) + 1j*alpha(w)/2 that replaces the Taylor
+polynomial beta2/2*w**2 + beta3/6*w**3 + beta4/24*w**4. Linear operators and
+half-step propagators are cached, keyed by grid, stepsize and table hash, so
+that realistic fibers run at the same per-step cost as the Taylor model.
+"""
+import hashlib
+from collections import OrderedDict, namedtuple
+import numpy as np
+import numpy.fft as nfft
+
+FiberTable = namedtuple("FiberTable", ["w", "beta", "alpha"])
+
+# -- MAXIMAL NUMBER OF CACHED HALF-STEP PROPAGATORS
+CACHE_SIZE = 32
+_operators = OrderedDict()
+_propagators = OrderedDict()
+
+
+def loadFiberTable(fileName):
+    """Load tabulated fiber data
+
+    NOTES:
+        - CSV and .npy files hold columns w, beta and, optionally, alpha;
+          lines of CSV files starting with # are ignored
+        - .npz files hold arrays under keys w, beta and, optionally, alpha
+
+    Args:
+        fileName (str): name of .csv, .npy or .npz file
+
+    Returns:
+        table (FiberTable): angular frequency detunings w, propagation
+            constant beta and power loss alpha (zero if not given), sorted
+            by w
+    """
+    fileName = str(fileName)
+    if fileName.endswith(".npz"):
+        with np.load(fileName) as data:
+            w, beta = data["w"], data["beta"]
+            alpha = data["alpha"] if "alpha" in data else np.zeros_like(w)
+    else:
+        data = np.load(fileName) if fileName.endswith(".npy") else \
+            np.loadtxt(fileName, delimiter=",", comments="#")
+        w, beta = data[:,0], data[:,1]
+        alpha = data[:,2] if data.shape[1] > 2 else np.zeros_like(w)
+    return fiberTable(w, beta, alpha)
+
+
+def fiberTable(w, beta, alpha=None):
+    """Fiber table from arrays
+
+    Args:
+        w (array): angular frequency detunings
+        beta (array): propagation constant
+        alpha (array): power loss (optional, default: lossless)
+
+    Returns:
+        table (FiberTable): fiber table sorted by w
+    """
+    w = np.asarray(w, dtype=float)
+    idx = np.argsort(w)
+    alpha = np.zeros_like(w) if alpha is None else np.asarray(alpha, dtype=float)
+    return FiberTable(w[idx], np.asarray(beta, dtype=float)[idx], alpha[idx])
+
+
+def tableHash(table):
+    """Hash identifying the contents of a fiber table"""
+    h = hashlib.sha1()
+    for a in table:
+        h.update(np.ascontiguousarray(a).tobytes())
+    return h.hexdigest()
+
+
+def _gridKey(t):
+    return (t.size, float(t[0]), float(t[1]-t[0]))
+
+
+def _cached(cache, key, func):
+    """least recently used cache lookup"""
+    if key in cache:
+        cache.move_to_end(key)
+        return cache[key]
+    value = cache[key] = func()
+    if len(cache) > CACHE_SIZE:
+        cache.popitem(last=False)
+    return value
+
+
+def linearOperator(t, table, removeLinear=True):
+    """Linear operator on the simulation frequency grid
+
+    NOTES:
+        - beta and alpha are interpolated linearly; beyond the tabulated
+          range their edge values are used
+        - for removeLinear=True the constant and linear part of beta at w=0
+          are removed, i.e. propagation is in the frame moving with the
+          group velocity at the carrier, as for the Taylor model
+
+    Args:
+        t (array): time samples
+        table (FiberTable): fiber table
+        removeLinear (bool): remove beta(0) and beta'(0)
+                        (optional, default=True)
+
+    Returns:
+        D_w (array): complex linear operator in the order of nfft.fftfreq
+    """
+    def _operator():
+        w = nfft.fftfreq(t.size,d=t[1]-t[0])*2*np.pi
+        beta = np.interp(w, table.w, table.beta)
+        if removeLinear:
+            dw = np.min(np.diff(table.w))
+            b0 = np.interp(0., table.w, table.beta)
+            b1 = (np.interp(dw, table.w, table.beta)-np.interp(-dw, table.w, table.beta))/2/dw
+            beta = beta - b0 - b1*w
+        return beta + 0.5j*np.interp(w, table.w, table.alpha)
+    return _cached(_operators, (_gridKey(t), tableHash(table), removeLinear), _operator)
+
+
+def halfStepPropagator(t, table, dz):
+    """Cached linear half-step propagator exp(1j*D_w*dz/2)
+
+    Args:
+        t (array): time samples
+        table (FiberTable): fiber table
+        dz (float): z-stepsize
+
+    Returns:
+        P_w (array): half-step propagator in the order of nfft.fftfreq
+    """
+    return _cached(_propagators, (_gridKey(t), float(dz), tableHash(table)),
+                   lambda: np.exp(1j * linearOperator(t, table) * dz * 0.5))
+
+
+# EOF: dispersion.py
@@ -0,0 +1,217 @@
+""" ensemble.py
+
+module implementing noise-ensemble (Monte Carlo) propagation with streaming
+spectral statistics, for coherence and shot-to-shot stability studies
+
+Members of the ensemble share the input pulse A0 but carry independent noise
+seeded reproducibly from a single seed, i.e. member k sees the same noise
+irrespective of batch size and number of worker processes. Members are
+propagated in batches, using SSFM_HONSE_symmetric on a 2D field array, and
+their spectra are accumulated into running statistics. Memory thus stays
+O(Nt) per recorded z-sample, independent of the number of members.
+
+For spectra A_k(w) of n members the statistics are
+    mean spectrum:  <|A(w)|^2>
+    variance:       <|A(w)|^4> - <|A(w)|^2>^2
+    coherence:      |g12(w)| = |<A_i^*(w) A_j(w)>_{i!=j}| / <|A(w)|^2>
+where the coherence is computed from sum_{i!=j} A_i^* A_j = |sum A|^2 - sum |A|^2.
+Mean and variance of the spectral intensity are accumulated by the pairwise
+update of Chan et al., which avoids the cancellation of <|A|^4> - <|A|^2>^2
+for weak fluctuations.
+
+Refs:
+    Updating formulae and a pairwise algorithm for computing sample variances
+    T.F. Chan, G.H. Golub, R.J. LeVeque
+    Technical Report STAN-CS-79-773, Stanford University (1979)
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
+import numpy.fft as nfft
+from split_step_solver import SSFM_HONSE_symmetric
+
+# -- CONVENIENT ABBREVIATIONS
+FT = nfft.ifft
+IFT = nfft.fft
+
+
+class SpectralStatistics():
+    """Streaming statistics of an ensemble of spectra
+
+    Attrs:
+        n (int): number of accumulated members
+    """
+
+    def __init__(self, shape):
+        """Initialize empty statistics
+
+        Args:
+            shape (tuple): shape of a single spectrum
+        """
+        self.n = 0
+        self._S1 = np.zeros(shape, dtype=complex)
+        self._mean = np.zeros(shape)
+        self._M2 = np.zeros(shape)
+
+    def _update(self, n, S1, mean, M2):
+        """pairwise update by the statistics of n further members"""
+        N = self.n + n
+        delta = mean - self._mean
+        self._S1 += S1
+        self._mean += delta*n/N
+        self._M2 += M2 + delta**2*self.n*n/N
+        self.n = N
+
+    def add(self, A_w):
+        """Accumulate spectra
+
+        Args:
+            A_w (array): spectra of members, stacked along the first axis
+        """
+        I_w = np.abs(A_w)**2
+        mean = np.mean(I_w, axis=0)
+        self._update(A_w.shape[0], np.sum(A_w, axis=0), mean,
+                     np.sum((I_w-mean)**2, axis=0))
+
+    def merge(self, other):
+        """Accumulate statistics of another ensemble"""
+        if other.n:
+            self._update(other.n, other._S1, other._mean, other._M2)
+
+    @property
+    def meanSpectrum(self):
+        """mean spectral intensity <|A(w)|^2>"""
+        return self._mean.copy()
+
+    @property
+    def variance(self):
+        """variance of the spectral intensity"""
+        return self._M2/self.n
+
+    @property
+    def coherence(self):
+        """modulus of the first-order spectral coherence |g12(w)|"""
+        S2 = self.n*self._mean
+        cross = np.abs(np.abs(self._S1)**2 - S2)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return cross/(self.n-1)/S2
+
+
+def spectralNoise(t, rng, amplitude):
+    """Complex Gaussian white noise added in the frequency domain
+
+    Args:
+        t (array): time samples
+        rng (np.random.Generator): random number generator
+        amplitude (float): RMS noise amplitude per spectral mode, in units
+                        of FT(A)
+
+    Returns:
+        dA (array): time domain noise field
+    """
+    dA_w = amplitude*(rng.standard_normal(t.size)+1j*rng.standard_normal(t.size))/np.sqrt(2)
+    return IFT(dA_w)
+
+
+def intensityNoise(t, rng, A0_t, rin):
+    """Technical noise: random amplitude fluctuation of the input pulse
+
+    Args:
+        t (array): time samples
+        rng (np.random.Generator): random number generator
+        A0_t (array): time domain field envelope
+        rin (float): relative RMS fluctuation of the pulse energy
+
+    Returns:
+        dA (array): time domain noise field
+    """
+    return (np.sqrt(1+rin*rng.standard_normal())-1)*A0_t
+
+
+def _noisyInput(t, A0_t, seeds, noiseAmplitude, rin):
+    """input fields of the members seeded by seeds"""
+    A0 = np.empty((len(seeds), t.size), dtype=complex)
+    for k, seed in enumerate(seeds):
+        rng = np.random.default_rng(seed)
+        A0[k] = A0_t + spectralNoise(t, rng, noiseAmplitude)
+        if rin:
+            A0[k] += intensityNoise(t, rng, A0_t, rin)
+    return A0
+
+
+def _propagateBatch(z, t, A0_t, seeds, noiseAmplitude, rin, args, kwargs):
+    """worker: propagate one batch of members, return z-samples and statistics"""
+    A0 = _noisyInput(t, A0_t, seeds, noiseAmplitude, rin)
+    zz, Azt = SSFM_HONSE_symmetric(z, t, A0, *args, **kwargs)
+    stats = SpectralStatistics((zz.size, t.size))
+    stats.add(FT(np.swapaxes(Azt, 0, 1)))
+    return zz, stats
+
+
+def _batchResults(z, t, A0_t, batches, jobArgs, maxWorkers):
+    """z-samples and statistics of the batches, in the order they finish.
+    At most two batches per worker are in flight, and finished ones are
+    released once the next result is requested"""
+    if maxWorkers == 1:
+        for b in batches:
+            yield _propagateBatch(z, t, A0_t, b, *jobArgs)
+        return
+    maxWorkers = os.cpu_count() if maxWorkers is None else maxWorkers
+    todo, pending = iter(batches), set()
+    with ProcessPoolExecutor(maxWorkers) as pool:
+        while True:
+            for b in todo:
+                pending.add(pool.submit(_propagateBatch, z, t, A0_t, b, *jobArgs))
+                if len(pending) >= 2*maxWorkers:
+                    break
+            if not pending:
+                return
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for f in done:
+                yield f.result()
+
+
+def SSFM_HONSE_ensemble(z, t, A0_t, *args, nMembers=100, seed=0, noiseAmplitude=1e-6,
+                        rin=0., batchSize=32, maxWorkers=1, nSkip=None, **kwargs):
+    """Noise-ensemble propagation with streaming spectral statistics
+
+    Args:
+        z (array): samples along propagation distance
+        t (array): time samples
+        A0_t (array): noise-free time domain field envelope
+        *args: fiber parameters beta2, beta3, beta4, gamma, s of
+                        SSFM_HONSE_symmetric
+        nMembers (int): number of ensemble members (optional, default=100)
+        seed (int): seed of the ensemble (optional, default=0)
+        noiseAmplitude (float): RMS amplitude of spectral input noise per
+                        mode (optional, default=1e-6)
+        rin (float): relative RMS energy fluctuation of the input pulse
+                        (optional, default=0)
+        batchSize (int): number of members propagated at once
+                        (optional, default=32)
+        maxWorkers (int): number of worker processes; 1 propagates in the
+                        calling process, None uses all cores
+                        (optional, default=1)
+        nSkip (int): record statistics at each nSkip-th step
+                        (optional, default: final z only)
+        **kwargs: further keyword arguments of SSFM_HONSE_symmetric
+
+    Returns: (z, stats)
+        z (array): z-samples at which statistics are recorded
+        stats (SpectralStatistics): statistics with arrays of shape
+            (z.size, Nt) in the order of nfft.fftfreq
+    """
+    kwargs["nSkip"] = z.size-1 if nSkip is None else nSkip
+    seeds = np.random.SeedSequence(seed).spawn(nMembers)
+    batches = [seeds[i:i+batchSize] for i in range(0, nMembers, batchSize)]
+    jobArgs = (noiseAmplitude, rin, args, kwargs)
+
+    # -- BATCH STATISTICS ARE MERGED AS THEY ARRIVE, KEEPING MEMORY BOUNDED
+    results = _batchResults(z, t, A0_t, batches, jobArgs, maxWorkers)
+    zz, stats = next(results)
+    for _, s in results:
+        stats.merge(s)
+    return zz, stats
+
+
+# EOF: ensemble.py
@@ -0,0 +1,139 @@
+""" events.py
+
+module implementing event detectors that can be passed to the events
+argument of SSFM_HONSE_symmetric in order to detect the formation of an
+optical shock, or a numerically diverging field, during propagation
+
+Each detector is an instance of a subclass of Event, called as f(t, A) and
+returning True if the event occurred. The attributes name and action tell
+the solver how to report and react to the event:
+    "record": only record the distance at which the event first occurred
+    "stop":   record the event and terminate propagation
+    "refine": re-take the offending step using smaller sub-steps, then
+              record the event if it persists
+Detectors are module-level classes, so that they can be pickled and passed
+to worker processes, e.g. of a sweep or an ensemble.
+"""
+import numpy as np
+import numpy.fft as nfft
+
+# -- CONVENIENT ABBREVIATIONS
+FT = nfft.ifft
+IFT = nfft.fft
+
+
+class Event():
+    """Base class of event detectors
+
+    Attrs:
+        name (str): name under which the event is reported
+        action (str): reaction to the event, one of "record", "stop",
+            "refine"
+    """
+    name = None
+
+    def __init__(self, action="stop"):
+        if action not in ("record", "stop", "refine"):
+            raise ValueError("unknown event action '%s'" % action)
+        self.action = action
+
+    def __call__(self, t, A):
+        raise NotImplementedError
+
+
+class NonFinite(Event):
+    """Non-finite field values
+
+    Args:
+        action (str): reaction to the event (optional, default="stop")
+    """
+    name = "nonFinite"
+
+    def __call__(self, t, A):
+        return not np.all(np.isfinite(A))
+
+
+class GradientThreshold(Event):
+    """Steep intensity gradient indicating shock formation
+
+    Args:
+        maxSlope (float): threshold for the magnitude of dI/dt
+        action (str): reaction to the event (optional, default="stop")
+    """
+    name = "gradientThreshold"
+
+    def __init__(self, maxSlope, action="stop"):
+        super().__init__(action)
+        self.maxSlope = maxSlope
+
+    def __call__(self, t, A):
+        I = np.abs(A)**2
+        return np.max(np.abs(np.diff(I)))/(t[1]-t[0]) > self.maxSlope
+
+
+class SpectralEdge(Event):
+    """Spectral energy reaching the edge of the frequency window
+
+    Args:
+        maxFraction (float): threshold for the fraction of spectral energy
+                        contained in the outer band (optional, default=1e-6)
+        band (float): width of the outer band, as fraction of the Nyquist
+                        frequency (optional, default=0.1)
+        action (str): reaction to the event (optional, default="stop")
+    """
+    name = "spectralEdge"
+
+    def __init__(self, maxFraction=1e-6, band=0.1, action="stop"):
+        super().__init__(action)
+        self.maxFraction, self.band = maxFraction, band
+
+    def __call__(self, t, A):
+        Iw = np.abs(FT(A))**2
+        w = np.abs(nfft.fftfreq(t.size))
+        outer = w > (1.-self.band)*0.5
+        return np.sum(Iw[outer]) > self.maxFraction*np.sum(Iw)
+
+
+class TemporalEdge(Event):
+    """Pulse energy reaching the edges of the time window
+
+    Args:
+        maxFraction (float): threshold for the fraction of energy contained
+                        in the outer bands (optional, default=1e-6)
+        band (float): width of each outer band, as fraction of the time
+                        window (optional, default=0.1)
+        action (str): reaction to the event (optional, default="stop")
+    """
+    name = "temporalEdge"
+
+    def __init__(self, maxFraction=1e-6, band=0.1, action="stop"):
+        super().__init__(action)
+        self.maxFraction, self.band = maxFraction, band
+
+    def __call__(self, t, A):
+        I = np.abs(A)**2
+        nBand = max(1, int(self.band*t.size))
+        return np.sum(I[:nBand])+np.sum(I[-nBand:]) > self.maxFraction*np.sum(I)
+
+
+class EnergyDrift(Event):
+    """Energy drift beyond tolerance
+
+    Args:
+        A0 (array): initial time domain pulse profile, used as reference
+        tol (float): admissible relative energy change
+                        (optional, default=1e-3)
+        action (str): reaction to the event (optional, default="stop")
+    """
+    name = "energyDrift"
+
+    def __init__(self, A0, tol=1e-3, action="stop"):
+        super().__init__(action)
+        self.E0 = np.sum(np.abs(A0)**2)
+        self.tol = tol
+
+    def __call__(self, t, A):
+        return np.abs(np.sum(np.abs(A)**2)-self.E0) > self.tol*self.E0
+
+
+# EOF: events.py
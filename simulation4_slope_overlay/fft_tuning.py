@@ -0,0 +1,208 @@
+""" fft_tuning.py
+
+module implementing an autotuner for the FFTs of the split step solvers,
+see the fft argument of SSFM_HONSE_symmetric
+
+The cost of a propagation step is dominated by FFTs, whose speed depends on
+the number of time samples Nt, the FFT backend and the number of threads in
+a machine-specific way. tune() benchmarks 5-smooth sizes (products of
+powers of 2, 3 and 5) at or slightly above a requested resolution on all
+available backends and thread counts, and persists the fastest
+configuration of each size in a JSON cache, together with the plan wisdom
+of pyfftw, if installed. Solvers consult the cache at startup via lookup().
+
+NOTES:
+    - the cache is kept in ~/.cache/nlse/fft_tuning.json, or in the file
+      given by the environment variable NLSE_FFT_CACHE. Entries are keyed
+      by a fingerprint of machine and library versions, so that a cache
+      shared across machines stays valid.
+
+Example:
+    >>> Nt = tune(2000)["n"]        # e.g. 2048, or 2025 on some machines
+    >>> t = np.linspace(-tMax, tMax, Nt, endpoint=False)
+    >>> z, Azt = SSFM_HONSE_symmetric(z, t, A0, beta2, beta3, beta4, gamma,
+    ...                               s, nSkip, fft="auto")
+"""
+import base64
+import json
+import os
+import platform
+import time
+import numpy as np
+from parallel import fftPair
+
+
+def cacheFile():
+    """name of the JSON cache file"""
+    return os.environ.get("NLSE_FFT_CACHE",
+                          os.path.join(os.path.expanduser("~"), ".cache", "nlse",
+                                       "fft_tuning.json"))
+
+
+def availableBackends():
+    """names of the installed FFT backends"""
+    backends = ["numpy"]
+    for name, module in (("scipy", "scipy.fft"), ("pyfftw", "pyfftw")):
+        try:
+            __import__(module)
+            backends.append(name)
+        except ImportError:
+            pass
+    return backends
+
+
+def fingerprint():
+    """string identifying machine and library versions"""
+    versions = [np.__version__]
+    for module in ("scipy", "pyfftw"):
+        try:
+            versions.append(__import__(module).__version__)
+        except ImportError:
+            versions.append("-")
+    return "|".join([platform.node(), platform.machine(), str(os.cpu_count())] + versions)
+
+
+def candidateSizes(n, spread=0.25):
+    """5-smooth sizes at or above a requested number of samples
+
+    Args:
+        n (int): requested number of time samples
+        spread (float): maximal relative increase of the size
+                        (optional, default=0.25)
+
+    Returns:
+        sizes (list): sorted sizes 2**a * 3**b * 5**c in [n, (1+spread)*n]
+    """
+    nMax = int((1+spread)*n)
+    sizes = []
+    p2 = 1
+    while p2 <= nMax:
+        p3 = p2
+        while p3 <= nMax:
+            p5 = p3
+            while p5 <= nMax:
+                if p5 >= n:
+                    sizes.append(p5)
+                p5 *= 5
+            p3 *= 3
+        p2 *= 2
+    return sorted(sizes)
+
+
+def _threadCounts():
+    nCores = os.cpu_count() or 1
+    counts = [None]
+    k = 2
+    while k <= nCores:
+        counts.append(k)
+        k *= 2
+    return counts
+
+
+def benchmark(n, backend="numpy", workers=None, repeats=20):
+    """Time of a forward and inverse FFT of n complex samples
+
+    Args:
+        n (int): number of samples
+        backend (str): FFT backend (optional, default="numpy")
+        workers (int): number of threads, None for a single thread
+                        (optional, default=None)
+        repeats (int): number of timed repetitions (optional, default=20)
+
+    Returns:
+        time (float): best time of one transform pair in seconds
+    """
+    FT, IFT = fftPair(workers, backend)
+    x = np.exp(2j*np.pi*np.random.default_rng(0).random(n))
+    IFT(FT(x)) # -- WARM UP, PLANNING
+    best = np.inf
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        IFT(FT(x))
+        best = min(best, time.perf_counter()-t0)
+    return best
+
+
+def _load():
+    try:
+        with open(cacheFile()) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save(cache):
+    fileName = cacheFile()
+    os.makedirs(os.path.dirname(os.path.abspath(fileName)), exist_ok=True)
+    tmpName = fileName+".tmp"
+    with open(tmpName, "w") as f:
+        json.dump(cache, f, indent=1)
+    os.replace(tmpName, fileName)
+
+
+def tune(n, spread=0.25, backends=None, threads=None, repeats=20, force=False):
+    """Find the fastest FFT configuration near a requested size
+
+    Args:
+        n (int): requested number of time samples
+        spread (float): maximal relative increase of the size
+                        (optional, default=0.25)
+        backends (list): backends to benchmark
+                        (optional, default: all available)
+        threads (list): thread counts to benchmark, None for a single
+                        thread (optional, default: None and powers of 2 up
+                        to the number of cores)
+        repeats (int): number of timed repetitions (optional, default=20)
+        force (bool): benchmark even if the result is cached
+                        (optional, default=False)
+
+    Returns:
+        config (dict): size n, backend, workers and time per transform
+            pair of the fastest configuration
+    """
+    cache = _load()
+    entry = cache.setdefault(fingerprint(), {"sizes": {}, "requests": {}})
+    key = "%d:%g" % (n, spread)
+    if not force and key in entry["requests"]:
+        return entry["requests"][key]
+
+    backends = availableBackends() if backends is None else backends
+    threads = _threadCounts() if threads is None else threads
+    sizes = candidateSizes(n, spread) or [n]
+    for size in sizes:
+        if not force and str(size) in entry["sizes"]:
+            continue
+        res = [{"n": size, "backend": b, "workers": w,
+                "time": benchmark(size, b, w, repeats)}
+               for b in backends for w in (threads if b != "numpy" else [None])]
+        entry["sizes"][str(size)] = min(res, key=lambda r: r["time"])
+    best = min((entry["sizes"][str(size)] for size in sizes), key=lambda r: r["time"])
+    entry["requests"][key] = best
+
+    # -- PERSIST PLANS OF pyfftw ALONG WITH THE CONFIGURATIONS
+    if "pyfftw" in backends:
+        import pyfftw
+        entry["wisdom"] = [base64.b64encode(w).decode() for w in pyfftw.export_wisdom()]
+    _save(cache)
+    return best
+
+
+def lookup(n):
+    """Cached fastest FFT configuration for n samples
+
+    Args:
+        n (int): number of time samples
+
+    Returns:
+        config (dict): backend and workers, or None if n was not tuned
+    """
+    entry = _load().get(fingerprint())
+    if entry is None or str(n) not in entry["sizes"]:
+        return None
+    if entry.get("wisdom"):
+        import pyfftw
+        pyfftw.import_wisdom(tuple(base64.b64decode(w) for w in entry["wisdom"]))
+    return entry["sizes"][str(n)]
+
+
+# EOF: fft_tuning.py
@@ -0,0 +1,85 @@
+""" fiber.py
+
+module implementing z-dependent fiber parameters, i.e. concatenated fiber
+segments and tapers, for SSFM_HONSE_symmetric
+
+The solver accepts functions of z in place of the scalar coefficients beta2,
+beta3, beta4, gamma and s. The functions constructed here are piecewise
+constant, so that the solver recomputes the linear propagator only at the
+breakpoints between segments, or vary linearly along a taper, where the
+taperTol argument of the solver controls how often it is recomputed.
+
+Example:
+    >>> fib = concatenate([
+    ...     {"length": 4., "beta2": -1., "gamma": 1., "s": 0.2},
+    ...     {"length": 8., "beta2": -0.5, "gamma": 2., "s": 0.1},
+    ... ])
+    >>> z, Azt = SSFM_HONSE_symmetric(z, t, A0, nSkip=100, **fib)
+"""
+import numpy as np
+
+# -- COEFFICIENTS OF THE HONSE SOLVER THAT MAY DEPEND ON z
+KEYS = ("beta2", "beta3", "beta4", "gamma", "s")
+
+
+def piecewise(lengths, values, z0=0.):
+    """Piecewise constant coefficient of concatenated fiber segments
+
+    NOTES:
+        - beyond the last segment, the value of the last segment is used
+
+    Args:
+        lengths (array): lengths of the segments
+        values (array): value of the coefficient in each segment
+        z0 (float): start of the first segment (optional, default=0)
+
+    Returns:
+        f (callable): coefficient as function of z, with attribute
+            breakpoints holding the segment boundaries
+    """
+    zEnd = z0 + np.cumsum(lengths)
+    values = np.asarray(values, dtype=float)
+
+    def f(z):
+        return values[min(np.searchsorted(zEnd, z, side="right"), values.size-1)]
+
+    f.breakpoints = zEnd[:-1]
+    return f
+
+
+def linearTaper(z0, z1, v0, v1):
+    """Coefficient varying linearly along a taper
+
+    Args:
+        z0 (float): start of the taper
+        z1 (float): end of the taper
+        v0 (float): value at z <= z0
+        v1 (float): value at z >= z1
+
+    Returns:
+        f (callable): coefficient as function of z
+    """
+    def f(z):
+        return v0 + (v1-v0)*np.clip((z-z0)/(z1-z0), 0., 1.)
+    return f
+
+
+def concatenate(segments, z0=0.):
+    """Fiber parameters of concatenated segments
+
+    Args:
+        segments (list): dictionaries holding the length of each segment
+                        and its coefficients beta2, beta3, beta4, gamma, s;
+                        missing coefficients are zero
+        z0 (float): start of the first segment (optional, default=0)
+
+    Returns:
+        fib (dict): piecewise constant coefficients keyed by name, to be
+            passed as keyword arguments to SSFM_HONSE_symmetric
+    """
+    lengths = [seg["length"] for seg in segments]
+    return {key: piecewise(lengths, [seg.get(key, 0.) for seg in segments], z0)
+            for key in KEYS}
+
+
+# EOF: fiber.py
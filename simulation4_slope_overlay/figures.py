@@ -13,6 +13,8 @@ import numpy.fft as nfft
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 import matplotlib.colors as col
+from results import PropagationResult
+from snapshots import snapshotIndex
 
 # Set global font sizes - EXTRA LARGE
 plt.rcParams.update({
@@ -40,7 +42,10 @@ def figure_1a(z,t, u, s, tLim=None ,wLim=None, oName=None):
     Args:
         z (array): samples along propagation distance
         t (array): time samples
-        u (array): time domain field envelope
+        u (array or PropagationResult): time domain field envelope, or
+                        result object whose cached intensity and spectrum
+                        are reused
+        s (float): self-steepening parameter
         tLim (2-tuple): time range in the form (tMin,tMax)
                         (optional, default=None)
         wLim (2-tuple): angular frequency range in the form (wMin,wMax)
@@ -78,7 +83,8 @@ def figure_1a(z,t, u, s, tLim=None ,wLim=None, oName=None):
         I[I<1e-6]=1e-6
         return I
 
-    w = nfft.ifftshift(nfft.fftfreq(t.size,d=t[1]-t[0])*2*np.pi)
+    res = u if isinstance(u, PropagationResult) else PropagationResult(z, t, u)
+    w = res.w
 
     if tLim==None:
        tLim = (np.min(t),np.max(t))
@@ -91,8 +97,8 @@ def figure_1a(z,t, u, s, tLim=None ,wLim=None, oName=None):
     cmap=mpl.cm.get_cmap('jet')
 
     # -- LEFT SUB-FIGURE: TIME-DOMAIN PROPAGATION CHARACTERISTICS
-    It = np.abs(u)**2
-    It /= np.max(It[0])
+    It = res.intensity()
+    It = It/np.max(It[0])
     It = _truncate(It)
     im1 = ax1.pcolorfast(t, z, It[:-1,:-1],
                          norm=col.LogNorm(vmin=It.min(),vmax=It.max()),
@@ -109,14 +115,14 @@ def figure_1a(z,t, u, s, tLim=None ,wLim=None, oName=None):
     ax1.set_ylabel(r"Propagation distance $z$", fontsize=28)
     ax1.tick_params(axis='both', which='major', labelsize=24)
     
-    I0 = np.max(np.abs(u[0])**2)
+    I0 = np.max(res.intensity()[0])
     tc = s * I0 * z
     # MUCH THICKER DOTTED LINE
     ax1.plot(tc, z, color='magenta', dashes=[2,1], linewidth=5, label="$t_c(z)$")
 
     # -- RIGHT SUB-FIGURE: ANGULAR FREQUENCY-DOMAIN PROPAGATION CHARACTERISTICS 
-    Iw = np.abs(nfft.ifftshift(FT(u, axis=-1),axes=-1))**2
-    Iw /= np.max(Iw[0])
+    Iw = res.spectrum()
+    Iw = Iw/np.max(Iw[0])
     Iw = _truncate(Iw)
     im2 = ax2.pcolorfast(w,z,Iw[:-1,:-1],
                          norm=col.LogNorm(vmin=Iw.min(),vmax=Iw.max()),
@@ -175,6 +181,97 @@ def figure_1b(res,oName=None):
         plt.show()
 
 
+def figure_1d(res,oName=None):
+    """Plot RMS error against wall-clock time
+
+    Generates a loglog-plot showing the accuracy reached by each
+    splitting scheme for the invested wall-clock time, i.e. the
+    accuracy-per-CPU-second ranking of the schemes.
+
+    Args:
+        res (dict): results of convergence.convergenceStudy
+        oName (str): name of output figure (optional, default: None)
+    """
+
+    f, ax = plt.subplots(figsize=(14, 12))
+    for scheme, r in res.items():
+        ax.plot(r["time"], r["error"], r"o-", markersize=14, linewidth=4,
+                label=r"%s ($p=%.1f$)" % (scheme, r["order"]))
+    ax.set_xscale("log")
+    ax.set_yscale("log")
+    ax.grid(True, which='both', ls='-', color='0.65')
+    ax.legend(fontsize=26)
+
+    # Very large label and tick font sizes
+    ax.set_xlabel(r"wall-clock time (s)", fontsize=30)
+    ax.set_ylabel(r"RMS error", fontsize=30)
+    ax.tick_params(axis='both', which='major', labelsize=26)
+
+    if oName:
+        # HIGH RESOLUTION
+        plt.savefig(oName,format='png',dpi=600, bbox_inches='tight')
+    else:
+        plt.show()
+
+
+def figure_3a(z, tau, w, S, zq, s=None, P0=1., tLim=None, wLim=None, oName=None):
+    """Plot spectrograms at selected propagation distances
+
+    Generates one subfigure per query distance, showing the spectrogram
+    of the nearest recorded snapshot on a log-colorscale, normalized to its
+    maximum, in the style of figure_1a.
+
+    Args:
+        z (array): samples along propagation distance
+        tau (array): delay samples
+        w (array): sorted angular frequency samples
+        S (array): spectrograms of shape (Nz, nTau, nFFT), see
+                        spectrogram.spectrogram
+        zq (list): query distances
+        s (float): self-steepening parameter; if given, the centroid
+                        position s*P0*z is marked (optional, default=None)
+        P0 (float): initial peak power (optional, default=1)
+        tLim (2-tuple): delay range in the form (tMin,tMax)
+                        (optional, default=None)
+        wLim (2-tuple): angular frequency range in the form (wMin,wMax)
+                        (optional, default=None)
+        oName (str): name of output figure
+                        (optional, default: None)
+    """
+    if tLim==None:
+       tLim = (np.min(tau),np.max(tau))
+    if wLim==None:
+       wLim = (np.min(w),np.max(w))
+
+    idx = snapshotIndex(z, zq)
+    f, axs = plt.subplots(1, len(idx), sharey=True, figsize=(10*len(idx), 12), squeeze=False)
+    cmap = plt.get_cmap('jet')
+
+    for ax, i in zip(axs[0], idx):
+        I = S[i].T/np.max(S[i])
+        I = np.maximum(I, 1e-6)     # -- TRUNCATE, SEE figure_1a
+        im = ax.pcolorfast(tau, w, I[:-1,:-1],
+                           norm=col.LogNorm(vmin=1e-6, vmax=1.),
+                           cmap=cmap
+                           )
+        if s is not None:
+            ax.axvline(s*P0*z[i], color='magenta', dashes=[2,1], linewidth=5)
+        ax.set_xlim(tLim)
+        ax.set_ylim(wLim)
+        ax.set_title(r"$z=%g$" % z[i], fontsize=28)
+        ax.set_xlabel(r"Delay $\tau$", fontsize=28)
+        ax.tick_params(axis='both', which='major', labelsize=24)
+    axs[0, 0].set_ylabel(r"Angular frequency $\omega$", fontsize=28)
+    cbar = f.colorbar(im, ax=axs[0].tolist(), orientation='vertical', pad=0.02)
+    cbar.ax.set_title(r"$S$ (normalized)", color='k', pad=10, fontsize=26)
+
+    if oName:
+        # HIGH RESOLUTION
+        plt.savefig(oName, format='png', dpi=600, bbox_inches='tight', pad_inches=0.1)
+    else:
+        plt.show()
+
+
 figure_1c = figure_1a
 figure_2a = figure_1a
 
@@ -0,0 +1,308 @@
+""" job_service.py
+
+module implementing an asyncio-based local job service for propagation
+runs of SSFM_HONSE_symmetric
+
+Runs are submitted to a JobManager, which queues them on a bounded process
+pool and deduplicates identical requests, so that users triggering runs from
+notebooks or dashboards share one multi-core machine. Only the most recently
+submitted finished jobs are kept, see JobManager. Results are obtained
+through an awaitable API, progress (current z, steps/s, ETA) can be polled
+or streamed. Optionally, a small HTTP endpoint exposes the same
+functionality, see serve().
+
+Example:
+    >>> async def main():
+    ...     jobs = JobManager(maxWorkers=4)
+    ...     jobId = jobs.submit(z, t, A0, beta2, beta3, beta4, gamma, s, nSkip)
+    ...     async for p in jobs.progress(jobId):
+    ...         print(p["z"], p["stepsPerSecond"], p["eta"])
+    ...     z, Azt = await jobs.result(jobId)
+"""
+import asyncio
+import hashlib
+import io
+from http import HTTPStatus
+import json
+import multiprocessing
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from split_step_solver import SSFM_HONSE_symmetric
+from telemetry import Telemetry
+
+
+def _propagate(jobId, progress, args, kwargs):
+    """worker: run solver and publish telemetry in shared dictionary
+
+    A callback of the request is called along with the telemetry.
+    """
+    z, t = args[0], args[1]
+    kwargs = dict(kwargs)
+    userCallback = kwargs.pop("callback", None)
+
+    def _publish(record):
+        progress[jobId] = dict(record, state="running")
+
+    telemetry = Telemetry(t, z, sinks=[_publish])
+
+    def _callback(idx, zi, A_t):
+        telemetry(idx, zi, A_t)
+        if userCallback is not None:
+            userCallback(idx, zi, A_t)
+
+    progress[jobId] = {"state": "running", "idx": 0, "z": z[0], "zMax": z[-1],
+                       "elapsed": 0., "stepsPerSecond": None, "eta": None}
+    return SSFM_HONSE_symmetric(*args, callback=_callback, **kwargs)
+
+
+def _state(job):
+    """state of a job whose future is done, or "running" """
+    if not job.done():
+        return "running"
+    if job.cancelled():
+        return "cancelled"
+    return "failed" if job.exception() is not None else "done"
+
+
+def requestKey(args, kwargs):
+    """Key identifying a propagation request
+
+    Args:
+        args (tuple): positional arguments of SSFM_HONSE_symmetric
+        kwargs (dict): keyword arguments of SSFM_HONSE_symmetric
+
+    Returns:
+        key (str): hash of the pickled arguments
+    """
+    return hashlib.sha1(pickle.dumps((args, sorted(kwargs.items())))).hexdigest()
+
+
+class JobManager():
+    """Local manager of propagation jobs
+
+    Attrs:
+        maxWorkers (int): number of worker processes
+        keepDone (int): number of finished jobs that are kept
+    """
+
+    def __init__(self, maxWorkers=None, keepDone=100):
+        """Initialize job manager
+
+        Args:
+            maxWorkers (int): number of worker processes
+                        (optional, default: number of cores)
+            keepDone (int): number of finished jobs, i.e. done, failed or
+                        cancelled, that are kept together with their
+                        results. Beyond that, the earliest submitted ones
+                        are evicted (optional, default=100)
+        """
+        self.maxWorkers = maxWorkers
+        self.keepDone = keepDone
+        # -- WORKERS ARE SPAWNED RATHER THAN FORKED, SINCE FORKED WORKERS
+        # INHERIT THE SOCKETS OF OPEN HTTP CONNECTIONS AND KEEP THEM OPEN
+        context = multiprocessing.get_context("spawn")
+        self._pool = ProcessPoolExecutor(maxWorkers, mp_context=context)
+        self._manager = context.Manager()
+        self._progress = self._manager.dict()
+        self._jobs = {}
+
+    def submit(self, *args, **kwargs):
+        """Submit propagation run
+
+        NOTES:
+            - must be called from within a running event loop
+            - identical requests are run only once; resubmitting a request
+              that is queued, running or done returns the existing job id,
+              unless the job was evicted
+            - a callback in kwargs must be picklable; it is called in the
+              worker along with the telemetry of the job
+
+        Args:
+            *args: positional arguments of SSFM_HONSE_symmetric
+            **kwargs: keyword arguments of SSFM_HONSE_symmetric
+
+        Returns:
+            jobId (str): identifier of the job
+        """
+        jobId = requestKey(args, kwargs)
+        job = self._jobs.get(jobId)
+        if job is not None and _state(job) not in ("failed", "cancelled"):
+            return jobId
+        self._evict()
+        self._progress[jobId] = {"state": "queued"}
+        loop = asyncio.get_running_loop()
+        self._jobs.pop(jobId, None)
+        self._jobs[jobId] = loop.run_in_executor(
+            self._pool, _propagate, jobId, self._progress, args, kwargs)
+        return jobId
+
+    def _evict(self):
+        """drop the earliest submitted finished jobs beyond keepDone"""
+        done = [jobId for jobId, job in self._jobs.items() if job.done()]
+        for jobId in done[:max(0, len(done)-self.keepDone)]:
+            del self._jobs[jobId]
+            self._progress.pop(jobId, None)
+
+    def jobs(self):
+        """Identifiers of all known jobs"""
+        return list(self._jobs)
+
+    def status(self, jobId):
+        """Status of a job
+
+        Args:
+            jobId (str): identifier of the job
+
+        Returns:
+            status (dict): state ("queued", "running", "done", "failed" or
+                "cancelled") and, once running, step index, z, steps/s and
+                ETA
+
+        Raises:
+            KeyError: if the job is unknown or was evicted
+        """
+        job = self._jobs[jobId]
+        status = dict(self._progress.get(jobId, {}))
+        if job.done():
+            status["state"] = _state(job)
+            status["eta"] = 0.
+            if status["state"] == "failed":
+                status["error"] = repr(job.exception())
+        return status
+
+    async def result(self, jobId):
+        """Await result of a job
+
+        Args:
+            jobId (str): identifier of the job
+
+        Returns:
+            res (tuple): return value of SSFM_HONSE_symmetric
+
+        Raises:
+            KeyError: if the job is unknown or was evicted
+        """
+        return await asyncio.shield(self._jobs[jobId])
+
+    async def progress(self, jobId, interval=0.5):
+        """Stream progress of a job
+
+        Args:
+            jobId (str): identifier of the job
+            interval (float): polling interval in seconds
+                        (optional, default=0.5)
+
+        Yields:
+            status (dict): status of the job, until it is finished
+        """
+        while True:
+            status = self.status(jobId)
+            yield status
+            if status["state"] in ("done", "failed", "cancelled"):
+                return
+            await asyncio.sleep(interval)
+
+    def shutdown(self):
+        """cancel queued jobs and release worker processes; the status of
+        known jobs remains available"""
+        self._pool.shutdown(cancel_futures=True)
+        self._progress = dict(self._progress)
+        self._manager.shutdown()
+
+
+def _runFromSpec(spec):
+    """build solver arguments from a JSON request of the HTTP endpoint"""
+    t = np.linspace(-spec["tMax"], spec["tMax"], spec["Nt"], endpoint=False)
+    z = np.linspace(0, spec["zMax"], spec["Nz"], endpoint=True)
+    A0 = np.sqrt(spec.get("P0", 1.))/np.cosh(t/spec.get("t0", 1.))
+    args = (z, t, A0, spec["beta2"], spec.get("beta3", 0), spec.get("beta4", 0),
+            spec["gamma"], spec.get("s", 0), spec.get("nSkip", 1))
+    return args
+
+
+async def _handle(jobs, reader, writer):
+    """minimal HTTP/1.0 request handler"""
+    def _reply(code, body, contentType="application/json"):
+        if contentType == "application/json":
+            body = json.dumps(body).encode()
+        writer.write(b"HTTP/1.0 %d %s\r\nContent-Type: %s\r\nContent-Length: %d\r\n\r\n"
+                     % (code, HTTPStatus(code).phrase.encode(), contentType.encode(),
+                        len(body)) + body)
+
+    try:
+        method, path, _ = (await reader.readline()).decode().split(" ", 2)
+        length = 0
+        while True:
+            line = (await reader.readline()).decode().strip()
+            if not line:
+                break
+            if line.lower().startswith("content-length:"):
+                length = int(line.split(":")[1])
+        body = await reader.readexactly(length) if length else b""
+        parts = [p for p in path.split("/") if p]
+
+        if method == "POST" and parts == ["jobs"]:
+            try:
+                args = _runFromSpec(json.loads(body))
+            except Exception as e:
+                _reply(400, {"error": repr(e)})
+            else:
+                _reply(200, {"id": jobs.submit(*args)})
+        elif method == "GET" and parts == ["jobs"]:
+            _reply(200, {jobId: jobs.status(jobId) for jobId in jobs.jobs()})
+        elif method == "GET" and parts[:1] == ["jobs"] and len(parts) in (2, 3):
+            jobId = parts[1]
+            if jobId not in jobs.jobs():
+                _reply(404, {"error": "unknown job"})
+            elif len(parts) == 2:
+                _reply(200, jobs.status(jobId))
+            elif parts[2] == "result":
+                try:
+                    z, Azt = await jobs.result(jobId)
+                except asyncio.CancelledError:
+                    if jobs.status(jobId)["state"] != "cancelled":
+                        raise
+                    _reply(500, {"error": "job cancelled"})
+                except Exception as e:
+                    _reply(500, {"error": repr(e)})
+                else:
+                    buf = io.BytesIO()
+                    np.savez(buf, z=z, Azt=Azt)
+                    _reply(200, buf.getvalue(), "application/octet-stream")
+            else:
+                _reply(404, {"error": "not found"})
+        else:
+            _reply(404, {"error": "not found"})
+    except Exception as e:
+        _reply(400, {"error": repr(e)})
+    await writer.drain()
+    writer.close()
+
+
+async def serve(jobs, host="127.0.0.1", port=8765):
+    """Serve a job manager through a local HTTP endpoint
+
+    NOTES:
+        - POST /jobs with a JSON body holding tMax, Nt, zMax, Nz, beta2,
+          gamma and optionally t0, P0, beta3, beta4, s, nSkip submits a
+          fundamental-soliton-shaped input pulse and returns its id
+        - GET /jobs and GET /jobs/<id> return job status as JSON
+        - GET /jobs/<id>/result waits for the job and returns z and Azt as
+          NumPy .npz archive
+        - a malformed request yields 400, an unknown or evicted job id 404
+          and a failed or cancelled job 500
+
+    Args:
+        jobs (JobManager): job manager
+        host (str): host name (optional, default="127.0.0.1")
+        port (int): port (optional, default=8765)
+
+    Returns:
+        server (asyncio.Server): running server
+    """
+    return await asyncio.start_server(
+        lambda r, w: _handle(jobs, r, w), host, port)
+
+
+# EOF: job_service.py
@@ -0,0 +1,42 @@
+import numpy as np
+from figures import figure_1b, figure_1d
+from convergence import convergenceStudy, solitonReference, costRanking, figure1bInput
+
+def main_b():
+
+    # -- SET FIBER PARAMETERS
+    par = {"beta2": -1, "gamma": 1}            # normalized units
+
+    # -- SET PULSE PARAMETERS
+    t0 = 1                                     # (ps) pulse duration
+    P0 = np.abs(par["beta2"])/t0/t0/par["gamma"] # (W) pulse peak power
+
+    # -- SET PARAMETERS FOR COMPUTATIONAL DOMAIN
+    tMax = 20                                  # (ps) bound for time mesh
+    Nt = 1024                                  # (-) number of sample points: t-axis
+    zMax = 2                                   # (m) propagation distance
+    dzList = np.logspace(-3, -1, 7)            # (m) ladder of z-stepsizes
+
+    # -- INITIALIZE COMPUTATIONAL DOMAIN
+    t = np.linspace(-tMax, tMax, Nt, endpoint=False)
+
+    # -- DEFINE INITIAL FIELD YIELDING A FUNDAMENTAL NSE SOLITON
+    A0 = np.sqrt(P0)/np.cosh(t/t0)
+
+    # -- RUN CONVERGENCE STUDY AGAINST THE ANALYTIC SOLITON
+    res = convergenceStudy(t, A0, zMax, par, dzList,
+                           schemes=("simple", "symmetric", "HONSE"),
+                           reference=solitonReference)
+
+    for scheme, r in res.items():
+        print("%-10s observed order p = %.2f" % (scheme, r["order"]))
+    for T, scheme, dz in costRanking(res, 1e-4):
+        print("%-10s reaches RMS error 1e-4 in %.3f s (dz = %.1e)" % (scheme, T, dz))
+
+    # -- POSTPROCESS RESULTS
+    figure_1b(figure1bInput(res), oName="figure_1b.png")
+    figure_1d(res, oName="figure_1d.png")
+
+
+if __name__ == "__main__":
+    main_b()
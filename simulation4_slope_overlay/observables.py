@@ -0,0 +1,144 @@
+""" observables.py
+
+module implementing scalar reducers of the time-domain field envelope that
+can be recorded on-the-fly by the split step solvers instead of full field
+configurations, see the observables argument of SSFM_HONSE_symmetric
+
+Each reducer has the signature f(t, A) and returns a single float. The
+trailing-edge slope and peak position can be compared with the drift
+t_c(z) = s*I0*z of the self-steepening pulse overlaid in figure_1a.
+"""
+import numpy as np
+import numpy.fft as nfft
+from helper_functions import energy
+
+# -- CONVENIENT ABBREVIATIONS
+FT = nfft.ifft
+IFT = nfft.fft
+
+
+def peakPower(t, A):
+    """Peak power
+
+    Args:
+        t (array): time axis
+        A (array): time domain pulse profile
+
+    Returns:
+        P (float): maximal squared magnitude of the pulse envelope
+    """
+    return np.max(np.abs(A)**2)
+
+
+def peakPosition(t, A):
+    """Peak position
+
+    Args:
+        t (array): time axis
+        A (array): time domain pulse profile
+
+    Returns:
+        tp (float): time at which the pulse intensity is maximal
+    """
+    return t[np.argmax(np.abs(A)**2)]
+
+
+def temporalCentroid(t, A):
+    """Temporal centroid
+
+    Args:
+        t (array): time axis
+        A (array): time domain pulse profile
+
+    Returns:
+        tc (float): mean time of the intensity profile
+    """
+    I = np.abs(A)**2
+    return np.sum(t*I)/np.sum(I)
+
+
+def rmsWidth(t, A):
+    """RMS width
+
+    Args:
+        t (array): time axis
+        A (array): time domain pulse profile
+
+    Returns:
+        sigma (float): standard deviation of the normalized intensity profile
+    """
+    I = np.abs(A)**2
+    I = I/np.sum(I)
+    return np.sqrt(np.sum(t**2*I)-np.sum(t*I)**2)
+
+
+def temporalSkew(t, A):
+    """Temporal skewness
+
+    Third standardized moment of the intensity profile. Self-steepening
+    makes it negative as the trailing edge sharpens.
+
+    Args:
+        t (array): time axis
+        A (array): time domain pulse profile
+
+    Returns:
+        g (float): skewness of the normalized intensity profile
+    """
+    I = np.abs(A)**2
+    I = I/np.sum(I)
+    tMean = np.sum(t*I)
+    tVar = np.sum((t-tMean)**2*I)
+    return np.sum((t-tMean)**3*I)/tVar**1.5
+
+
+def spectralCentroid(t, A):
+    """Spectral centroid
+
+    Args:
+        t (array): time axis
+        A (array): time domain pulse profile
+
+    Returns:
+        wc (float): mean angular frequency of the spectral intensity
+    """
+    w = nfft.fftfreq(t.size,d=t[1]-t[0])*2*np.pi
+    Iw = np.abs(FT(A))**2
+    return np.sum(w*Iw)/np.sum(Iw)
+
+
+def shockSlope(t, A):
+    """Trailing edge slope
+
+    Steepest descent of the intensity profile behind its peak, i.e. the
+    gradient that diverges as the self-steepening pulse forms a shock.
+
+    Args:
+        t (array): time axis
+        A (array): time domain pulse profile
+
+    Returns:
+        m (float): maximal value of -dI/dt for t behind the pulse peak
+    """
+    I = np.abs(A)**2
+    dIdt = np.gradient(I, t)
+    return np.max(-dIdt[np.argmax(I):])
+
+
+def defaultObservables():
+    """Default set of observables for self-steepening runs
+
+    Returns:
+        obs (dict): reducer functions keyed by name
+    """
+    return {
+        "energy": energy,
+        "peakPower": peakPower,
+        "peakPosition": peakPosition,
+        "temporalSkew": temporalSkew,
+        "spectralCentroid": spectralCentroid,
+        "shockSlope": shockSlope,
+    }
+
+
+# EOF: observables.py
@@ -0,0 +1,185 @@
+""" parallel.py
+
+module implementing the building blocks for multi-core execution of a
+single propagation run, see the workers argument of SSFM_HONSE_symmetric
+
+A run is parallelized on two levels:
+    - FFTs are computed by scipy.fft using multiple worker threads. If scipy
+      is not available, numpy.fft is used on a single core.
+    - elementwise operations are split into cache-sized chunks that are
+      processed by a thread pool. NumPy releases the GIL inside its ufuncs,
+      so that the chunks are processed concurrently.
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import numpy.fft as nfft
+
+
+def fftPair(workers=None, backend=None):
+    """Discrete Fourier transform and its inverse
+
+    NOTES:
+        - follows the convention FT = ifft, IFT = fft of the solvers
+        - backend=None uses numpy.fft for a single thread and scipy.fft
+          otherwise. The pyfftw backend uses its numpy interface with plan
+          cache enabled, see module fft_tuning.py.
+
+    Args:
+        workers (int): number of FFT worker threads, None for a single
+                        thread (optional, default=None)
+        backend (str): one of "numpy", "scipy" or "pyfftw"
+                        (optional, default=None)
+
+    Returns: (FT, IFT)
+        FT (callable): DFT along the last axis
+        IFT (callable): inverse DFT along the last axis
+    """
+    if backend == "numpy" or (backend is None and workers is None):
+        return nfft.ifft, nfft.fft
+    if backend == "pyfftw":
+        import pyfftw.interfaces.cache
+        import pyfftw.interfaces.numpy_fft as wfft
+        pyfftw.interfaces.cache.enable()
+        threads = 1 if workers is None else workers
+        FT = lambda x: wfft.ifft(x, threads=threads)
+        IFT = lambda x: wfft.fft(x, threads=threads)
+        return FT, IFT
+    try:
+        import scipy.fft as sfft
+    except ImportError:
+        if backend == "scipy":
+            raise
+        return nfft.ifft, nfft.fft
+    FT = lambda x: sfft.ifft(x, workers=workers)
+    IFT = lambda x: sfft.fft(x, workers=workers)
+    return FT, IFT
+
+
+class ChunkedKernels():
+    """Elementwise kernels of the split step solvers
+
+    Evaluates the elementwise operations of a propagation step either on
+    the full arrays (workers=None) or in chunks of chunkSize samples along
+    the last axis, distributed over a pool of worker threads. Both yield
+    bit-identical results. The time threads spend in kernels is accumulated
+    in order to report their utilization. This is the occupancy of the
+    threads while inside kernels, not the parallel efficiency of the run,
+    which includes the FFTs and serial work, see parallelEfficiency.
+
+    Attrs:
+        workers (int): number of threads, None for serial evaluation
+        busyTime (float): accumulated time spent by threads in kernels
+        wallTime (float): accumulated wall-clock time spent in kernels
+    """
+
+    def __init__(self, n, workers=None, chunkSize=16384):
+        """Initialize kernels
+
+        Args:
+            n (int): number of samples along last axis
+            workers (int): number of threads; -1 uses all cores, None
+                        evaluates serially (optional, default=None)
+            chunkSize (int): number of samples per chunk
+                        (optional, default=16384)
+        """
+        if workers is not None and workers < 0:
+            workers = os.cpu_count()
+        self.workers = workers
+        self.busyTime = 0.
+        self.wallTime = 0.
+        self._pool = None
+        self._slices = [slice(None)]
+        if workers is not None:
+            self._pool = ThreadPoolExecutor(workers)
+            self._slices = [slice(i, min(i+chunkSize, n))
+                            for i in range(0, n, chunkSize)]
+
+    def _run(self, kernel, shape, dtype):
+        """evaluate out[sl] = kernel(sl) for all chunks"""
+        if self._pool is None:
+            return kernel(Ellipsis)
+        out = np.empty(shape, dtype=dtype)
+
+        def _task(sl):
+            t0 = time.perf_counter()
+            out[..., sl] = kernel((Ellipsis, sl))
+            return time.perf_counter()-t0
+
+        t0 = time.perf_counter()
+        self.busyTime += sum(self._pool.map(_task, self._slices))
+        self.wallTime += time.perf_counter()-t0
+        return out
+
+    def mul(self, a, b):
+        """elementwise product a*b"""
+        a, b = np.broadcast_arrays(a, b)
+        return self._run(lambda sl: a[sl]*b[sl], a.shape, np.result_type(a, b))
+
+    def kerr(self, A, R=None, fR=0):
+        """Kerr nonlinearity A*|A|^2, or A*((1-fR)*|A|^2 + fR*R) including
+        the Raman convolution R"""
+        if R is None:
+            return self._run(lambda sl: A[sl]*np.abs(A[sl])**2, A.shape, A.dtype)
+        return self._run(lambda sl: A[sl]*((1-fR)*np.abs(A[sl])**2 + fR*R[sl]),
+                         A.shape, A.dtype)
+
+    def euler(self, A, A_tt, A_tt_dt, dz, gamma, s):
+        """explicit Euler update of the self-steepening nonlinearity"""
+        return self._run(
+            lambda sl: A[sl] + dz * (1j * gamma * A_tt[sl] - s * A_tt_dt[sl]),
+            A_tt.shape, A_tt.dtype)
+
+    def utilization(self):
+        """Thread utilization of the chunked kernels
+
+        Returns:
+            u (float): ratio of thread busy time to thread time available
+                while inside kernels, None for serial evaluation
+        """
+        if self._pool is None or self.wallTime == 0:
+            return None
+        return self.busyTime/self.wallTime/self.workers
+
+    def shutdown(self):
+        """release worker threads"""
+        if self._pool is not None:
+            self._pool.shutdown()
+
+
+def parallelEfficiency(solver, z, t, A0_t, *args, workers=-1, nSteps=20, **kwargs):
+    """Speedup and parallel efficiency of a single propagation run
+
+    Times nSteps steps of a run, once serially and once using workers
+    threads.
+
+    Args:
+        solver (callable): split step solver supporting the workers argument
+        z (array): samples along propagation distance
+        t (array): time samples
+        A0_t (array): time domain field envelope
+        *args: remaining positional arguments of the solver
+        workers (int): number of threads (optional, default=-1, all cores)
+        nSteps (int): number of steps timed (optional, default=20)
+        **kwargs: remaining keyword arguments of the solver
+
+    Returns: (S, eta)
+        S (float): speedup of the parallel over the serial run
+        eta (float): parallel efficiency S/workers
+    """
+    if workers < 0:
+        workers = os.cpu_count()
+    _z = z[:nSteps+1]
+
+    t0 = time.perf_counter()
+    solver(_z, t, A0_t, *args, nSkip=nSteps, **kwargs)
+    T1 = time.perf_counter()-t0
+
+    t0 = time.perf_counter()
+    solver(_z, t, A0_t, *args, nSkip=nSteps, workers=workers, **kwargs)
+    Tp = time.perf_counter()-t0
+    return T1/Tp, T1/Tp/workers
+
+
+# EOF: parallel.py
@@ -0,0 +1,294 @@
+""" pod.py
+
+module implementing reduced-order models of the HONSE, obtained by proper
+orthogonal decomposition (POD) of stored propagation histories
+
+Histories of nearby parameter points are well approximated in a subspace
+of small dimension r, spanned by the leading left singular vectors U of the
+snapshot matrix whose columns are the recorded fields. ReducedModel computes
+U by a randomized SVD [1] that streams over the snapshots in chunks, so that
+histories kept in memory-mapped .npy files are never loaded at once, and
+propagates the Galerkin projection a = U^H A of the HONSE
+    da/dz = i*H a + 1j*gamma*U^H f - s*U^H d/dt f,   f = |A|**2 A,   A = U a
+by a symmetric split step method. The reduced linear operator
+    H = beta2/2*M2 + beta3/6*M3 + beta4/24*M4
+is assembled from precomputed frequency moments Mk of the basis and its
+linear sub-steps are exact matrix exponentials. The projected derivative is
+taken onto the precomputed derivative of the basis, using
+U^H d/dt f = -(d/dt U)^H f. Optionally, f is evaluated at a few time samples
+selected by the discrete empirical interpolation method (DEIM) [2], which
+makes the cost of a step independent of the number of time samples.
+
+An error indicator, the part of the full right hand side at the recorded
+fields that is not captured by the basis, is evaluated at each recorded
+z-sample. If it exceeds a tolerance, the full solver is run instead.
+
+Example:
+    >>> rom = ReducedModel(t, ["run_s010.npy", "run_s030.npy"], rank=30)
+    >>> z, Azt, info = rom.propagate(z, A0, -1, 0, 0, 1, 0.2, nSkip=100,
+    ...                              full_output=True)
+    >>> info["fallback"], info["indicator"].max()
+
+Refs:
+    [1] Finding structure with randomness: probabilistic algorithms for
+        constructing approximate matrix decompositions
+        N. Halko, P.G. Martinsson, J.A. Tropp
+        SIAM Review 53 (2011) 217
+
+    [2] Nonlinear model reduction via discrete empirical interpolation
+        S. Chaturantabut, D.C. Sorensen
+        SIAM J. Sci. Comput. 32 (2010) 2737
+"""
+import numpy as np
+import numpy.fft as nfft
+from split_step_solver import SSFM_HONSE_symmetric
+from continuation import loadRun
+
+# -- CONVENIENT ABBREVIATIONS
+FT = nfft.ifft
+IFT = nfft.fft
+
+
+def _open(source):
+    """snapshot array of shape (..., Nt) of an array or stored result"""
+    if isinstance(source, np.ndarray):
+        return source
+    source = str(source)
+    if source.endswith(".npz"):
+        # -- RESULT OF saveRun, INCLUDING PARTS OF appendRun, NOT MEMORY-MAPPABLE
+        return loadRun(source)[1]
+    return np.load(source, mmap_mode="r")
+
+
+def snapshotChunks(histories, chunkSize=256, transform=None):
+    """Iterate over the snapshots of stored histories in chunks
+
+    Args:
+        histories (list): field histories, each an array of shape (Nz, Nt)
+                        or (nRuns, Nz, Nt), or the name of a .npy file
+                        (memory-mapped) or of a .npz file of saveRun
+        chunkSize (int): number of snapshots per chunk
+                        (optional, default=256)
+        transform (callable): function applied to each chunk
+                        (optional, default=None)
+
+    Yields:
+        chunk (array): snapshots of shape (n, Nt), n <= chunkSize
+    """
+    for source in histories:
+        arr = _open(source)
+        arr = arr.reshape(-1, arr.shape[-1])
+        for i in range(0, arr.shape[0], chunkSize):
+            chunk = np.asarray(arr[i:i+chunkSize], dtype=complex)
+            yield chunk if transform is None else transform(chunk)
+
+
+def randomizedSVD(histories, rank, oversample=10, nPower=2, chunkSize=256,
+                  transform=None, seed=0):
+    """Leading left singular vectors of the snapshot matrix
+
+    NOTES:
+        - the snapshot matrix X has the snapshots as columns and is never
+          formed; each pass over the snapshots computes X @ B or X^H @ Q
+          chunk by chunk
+        - nPower power iterations sharpen the decay of the singular values
+          at the cost of two passes each
+
+    Args:
+        histories (list): field histories, see snapshotChunks
+        rank (int): number of singular vectors
+        oversample (int): additional random samples (optional, default=10)
+        nPower (int): number of power iterations (optional, default=2)
+        chunkSize (int): number of snapshots per chunk
+                        (optional, default=256)
+        transform (callable): function applied to the snapshots, e.g. the
+                        nonlinearity (optional, default=None)
+        seed (int): seed of the random test matrix (optional, default=0)
+
+    Returns: (U, sigma)
+        U (array): orthonormal basis of shape (Nt, rank)
+        sigma (array): leading singular values
+    """
+    rng = np.random.default_rng(seed)
+    chunks = lambda: snapshotChunks(histories, chunkSize, transform)
+    k = rank+oversample
+
+    # -- RANGE OF X @ OMEGA, OMEGA RANDOM OF SHAPE (nSnapshots, k)
+    Y = 0.
+    for chunk in chunks():
+        Omega = rng.standard_normal((chunk.shape[0], k)) \
+            + 1j*rng.standard_normal((chunk.shape[0], k))
+        Y = Y + chunk.T @ Omega
+    Q = np.linalg.qr(Y)[0]
+    for _ in range(nPower):
+        Z = np.concatenate([chunk.conj() @ Q for chunk in chunks()])
+        Z = np.linalg.qr(Z)[0]
+        Y, i = 0., 0
+        for chunk in chunks():
+            Y = Y + chunk.T @ Z[i:i+chunk.shape[0]]
+            i += chunk.shape[0]
+        Q = np.linalg.qr(Y)[0]
+
+    # -- SVD OF THE SMALL MATRIX B = Q^H X
+    B = np.concatenate([(chunk.conj() @ Q).conj().T for chunk in chunks()], axis=1)
+    Ub, sigma = np.linalg.svd(B, full_matrices=False)[:2]
+    return Q @ Ub[:, :rank], sigma[:rank]
+
+
+def deimPoints(W):
+    """Interpolation indices of the discrete empirical interpolation method
+
+    Args:
+        W (array): basis of shape (Nt, m)
+
+    Returns:
+        p (array): m distinct row indices
+    """
+    p = [np.argmax(np.abs(W[:, 0]))]
+    for j in range(1, W.shape[1]):
+        c = np.linalg.solve(W[p, :j], W[p, j])
+        p.append(np.argmax(np.abs(W[:, j] - W[:, :j] @ c)))
+    return np.array(p)
+
+
+def _kerr(A):
+    return np.abs(A)**2*A
+
+
+class ReducedModel():
+    """Galerkin reduced-order model of the HONSE on a POD basis
+
+    Attrs:
+        U (array): orthonormal POD basis of shape (Nt, rank)
+        sigma (array): singular values of the snapshots
+        points (array): DEIM time sample indices, None without DEIM
+    """
+
+    def __init__(self, t, histories, rank=20, nDeim=None, **svdKwargs):
+        """Extract the basis and precompute the parameter independent operators
+
+        Args:
+            t (array): time samples of the histories
+            histories (list): field histories, see snapshotChunks
+            rank (int): dimension of the basis (optional, default=20)
+            nDeim (int): number of DEIM samples of the nonlinearity, None to
+                        evaluate it on all time samples (optional, default=None)
+            **svdKwargs: further keyword arguments of randomizedSVD
+        """
+        self.t = t
+        dt = t[1]-t[0]
+        self._w = nfft.fftfreq(t.size, d=dt)*2*np.pi
+        self.U, self.sigma = randomizedSVD(histories, rank, **svdKwargs)
+
+        # -- FREQUENCY MOMENTS Mk = U^H IFT(w**k FT(U)) AND DERIVATIVE OF BASIS
+        U_w = FT(self.U, axis=0)
+        self._M = {k: t.size*(U_w.conj().T @ (self._w[:, None]**k*U_w)) for k in (2, 3, 4)}
+        self._DtU = IFT((-1j)*self._w[:, None]*U_w, axis=0)
+
+        # -- PROJECTIONS OF THE NONLINEARITY
+        if nDeim is None:
+            self.points = None
+            self._P = self.U.conj().T, self._DtU.conj().T
+        else:
+            W = randomizedSVD(histories, nDeim, transform=_kerr, **svdKwargs)[0]
+            self.points = deimPoints(W)
+            Wp = np.linalg.inv(W[self.points])
+            self._P = self.U.conj().T @ W @ Wp, self._DtU.conj().T @ W @ Wp
+            self._Up = self.U[self.points]
+
+    def project(self, A_t):
+        """Coefficients of fields in the basis"""
+        return A_t @ self.U.conj()
+
+    def reconstruct(self, a):
+        """Fields of coefficients in the basis"""
+        return a @ self.U.T
+
+    def indicator(self, A_t, beta2, beta3, beta4, gamma, s=0):
+        """Relative part of the HONSE right hand side outside the basis
+
+        Args:
+            A_t (array): time domain field envelopes along the last axis
+            beta2, beta3, beta4, gamma, s (float): fiber parameters
+
+        Returns:
+            eta (float or array): norm of the right hand side not captured by
+                the basis, relative to its norm
+        """
+        D_w = beta2/2*self._w**2 + beta3/6*self._w**3 + beta4/24*self._w**4
+        f = _kerr(A_t)
+        F = IFT(1j*D_w*FT(A_t)) + 1j*gamma*f - s*IFT((-1j)*self._w*FT(f))
+        R = F - self.reconstruct(self.project(F))
+        return np.linalg.norm(R, axis=-1)/np.linalg.norm(F, axis=-1)
+
+    def propagate(self, z, A0_t, beta2, beta3, beta4, gamma, s=0, nSkip=1, tol=1e-2,
+                  full_output=False, **kwargs):
+        """Propagate the reduced model, with fallback to the full solver
+
+        NOTES:
+            - the indicator of the initial field is its relative projection
+              error; at later records, see method indicator
+            - if the indicator exceeds tol at any recorded z-sample, the run
+              is repeated with SSFM_HONSE_symmetric, to which **kwargs are
+              passed
+
+        Args:
+            z (array): samples along propagation distance
+            A0_t (array): time domain field envelope
+            beta2 (float): 2nd order dispersion parameter
+            beta3 (float): 3rd order dispersion parameter
+            beta4 (float): 4th order dispersion parameter
+            gamma (float): nonlinear parameter
+            s (float): self-steepening parameter (optional, default=0)
+            nSkip (int): keep only each nSkip-th field configuration
+                        (optional, default=1)
+            tol (float): tolerance of the error indicator, None to never
+                        fall back (optional, default=1e-2)
+            full_output (bool): additionally return dictionary with model
+                        information (optional, default=False)
+
+        Returns: (z, Azt)
+            z (array): resulting z-samples at which field envelope is recorded
+            Azt (array): resulting time domain field envelope
+            info (dict): only if full_output is True. Error indicator at the
+                recorded z-samples under key "indicator" and whether the full
+                solver was used under key "fallback"
+        """
+        dz = z[1]-z[0]
+        H = beta2/2*self._M[2] + beta3/6*self._M[3] + beta4/24*self._M[4]
+        lam, V = np.linalg.eigh(0.5*(H + H.conj().T))
+        E = (V*np.exp(0.5j*lam*dz)) @ V.conj().T
+        Pg, Ps = self._P
+        G = 1j*gamma*Pg + s*Ps
+
+        if self.points is None:
+            rhs = lambda a: G @ _kerr(self.U @ a)
+        else:
+            rhs = lambda a: G @ _kerr(self._Up @ a)
+
+        a = self.project(A0_t)
+        res_z, res_a = [z[0]], [a]
+        for i in range(1, z.size):
+            a = E @ a
+            k1 = rhs(a)
+            k2 = rhs(a + 0.5*dz*k1)
+            k3 = rhs(a + 0.5*dz*k2)
+            k4 = rhs(a + dz*k3)
+            a = E @ (a + dz/6*(k1 + 2*k2 + 2*k3 + k4))
+            if i%nSkip == 0:
+                res_z.append(z[i])
+                res_a.append(a)
+        res_z, Azt = np.array(res_z), self.reconstruct(np.array(res_a))
+
+        eta = self.indicator(Azt, beta2, beta3, beta4, gamma, s)
+        eta[0] = np.linalg.norm(A0_t-Azt[0])/np.linalg.norm(A0_t)
+        fallback = tol is not None and not np.all(eta <= tol)
+        if fallback:
+            res_z, Azt = SSFM_HONSE_symmetric(z, self.t, A0_t, beta2, beta3, beta4, gamma,
+                                              s, nSkip, **kwargs)
+        if full_output:
+            return res_z, Azt, {"indicator": eta, "fallback": fallback}
+        return res_z, Azt
+
+
+# EOF: pod.py
@@ -0,0 +1,89 @@
+""" raman.py
+
+module implementing Raman response functions for the delayed nonlinear
+response of the generalized nonlinear Schroedinger equation (GNLSE), see the
+fR and hR arguments of SSFM_HONSE_symmetric
+
+The Raman contribution to the nonlinearity involves the convolution
+(hR * |A|^2)(t). It is evaluated in O(Nt log Nt) as product in the frequency
+domain, using the response spectrum computed once by responseSpectrum().
+"""
+import numpy as np
+import numpy.fft as nfft
+
+# -- CONVENIENT ABBREVIATIONS
+FT = nfft.ifft
+IFT = nfft.fft
+
+
+def blowWoodResponse(tau, tau1=0.0122, tau2=0.032):
+    """Raman response function of Blow and Wood
+
+    Single damped oscillator model of the Raman response of fused silica [1].
+
+    Args:
+        tau (array): delay times
+        tau1 (float): inverse phonon frequency (optional, default=0.0122 ps)
+        tau2 (float): phonon lifetime (optional, default=0.032 ps)
+
+    Returns:
+        hR (array): causal Raman response, normalized to unit area
+
+    Refs:
+        [1] Theoretical description of transient stimulated Raman scattering
+            in optical fibers
+            K.J. Blow and D. Wood
+            IEEE J. Quantum Electron. 25 (1989) 2665
+    """
+    hR = (tau1**2+tau2**2)/tau1/tau2**2*np.exp(-tau/tau2)*np.sin(tau/tau1)
+    return np.where(tau >= 0, hR, 0.)
+
+
+def linAgrawalResponse(tau, tau1=0.0122, tau2=0.032, tau_b=0.096, f_b=0.21):
+    """Raman response function of Lin and Agrawal
+
+    Extends the Blow-Wood model by a Boson peak contribution [1].
+
+    Args:
+        tau (array): delay times
+        tau1 (float): inverse phonon frequency (optional, default=0.0122 ps)
+        tau2 (float): phonon lifetime (optional, default=0.032 ps)
+        tau_b (float): Boson peak time scale (optional, default=0.096 ps)
+        f_b (float): Boson peak fraction (optional, default=0.21)
+
+    Returns:
+        hR (array): causal Raman response, normalized to unit area
+
+    Refs:
+        [1] Raman response function for silica fibers
+            Q. Lin and G.P. Agrawal
+            Opt. Lett. 31 (2006) 3086
+    """
+    h_b = (2*tau_b-tau)/tau_b**2*np.exp(-tau/tau_b)
+    hR = (1-f_b)*blowWoodResponse(tau, tau1, tau2) + f_b*h_b
+    return np.where(tau >= 0, hR, 0.)
+
+
+def responseSpectrum(t, hR):
+    """Raman response spectrum on the simulation frequency grid
+
+    NOTES:
+        - the response is sampled at delays tau = t - t[0] >= 0 and normalized
+          to unit area, so that IFT(hR_w*FT(I)) yields the periodic
+          convolution (hR * I)(t)
+
+    Args:
+        t (array): time samples
+        hR (callable or array): response function of the delay, or its
+                        samples at delays t - t[0]
+
+    Returns:
+        hR_w (array): response spectrum in the order of nfft.fftfreq
+    """
+    dt = t[1]-t[0]
+    h = hR(t-t[0]) if callable(hR) else np.asarray(hR)
+    h = h/(np.sum(h)*dt)
+    return t.size*dt*FT(h)
+
+
+# EOF: raman.py
@@ -0,0 +1,161 @@
+""" results.py
+
+module implementing a result object for the (z, Azt) histories returned by
+the split step solvers, see PropagationResult
+
+Derived quantities such as intensity and spectrum are computed on first
+access only, and only for the requested window of z-samples and time or
+frequency samples. They are kept in a cache whose total size is bounded in
+bytes; when it is full, the least recently used quantities are evicted.
+A request for a window is also served from a cached quantity whose window
+contains it, so that e.g. plotting a zoom after the full view repeats no
+transform.
+
+Example:
+    >>> z, Azt = SSFM_HONSE_symmetric(z, t, A0, beta2, beta3, beta4, gamma, s, nSkip)
+    >>> res = PropagationResult(z, t, Azt)
+    >>> I = res.intensity(tLim=(-5, 5))
+    >>> figure_1a(res.z, res.t, res, s)
+"""
+from collections import OrderedDict
+import numpy as np
+import numpy.fft as nfft
+
+# -- CONVENIENT ABBREVIATIONS
+FT = nfft.ifft
+IFT = nfft.fft
+
+
+def _window(x, lim):
+    """slice of the sorted samples x within lim=(xMin, xMax)"""
+    if lim is None:
+        return slice(0, x.size)
+    return slice(int(np.searchsorted(x, lim[0], side="left")),
+                 int(np.searchsorted(x, lim[1], side="right")))
+
+
+def _contains(outer, inner):
+    return outer.start <= inner.start and inner.stop <= outer.stop
+
+
+class PropagationResult():
+    """Propagation history with lazily computed, cached derived quantities
+
+    NOTES:
+        - frequency domain quantities refer to the sorted (fftshifted)
+          angular frequencies w, which match figure_1a for even Nt
+        - returned arrays are read-only views of the cache; copy them
+          before modifying them in place
+
+    Attrs:
+        z (array): z-samples at which field envelope is recorded
+        t (array): time samples
+        Azt (array): time domain field envelope
+        w (array): sorted angular frequency samples
+        cacheBytes (int): maximal size of the cache in bytes
+    """
+
+    def __init__(self, z, t, Azt, cacheBytes=256*2**20):
+        """Wrap a propagation history
+
+        Args:
+            z (array): z-samples at which field envelope is recorded
+            t (array): time samples
+            Azt (array): time domain field envelope
+            cacheBytes (int): maximal size of the cache in bytes
+                        (optional, default=256 MiB)
+        """
+        self.z, self.t, self.Azt = z, t, Azt
+        self.w = nfft.fftshift(nfft.fftfreq(t.size, d=t[1]-t[0])*2*np.pi)
+        self.cacheBytes = cacheBytes
+        self._cache = OrderedDict()
+        self._nBytes = 0
+
+    @property
+    def cachedBytes(self):
+        """current size of the cache in bytes"""
+        return self._nBytes
+
+    def clearCache(self):
+        """Drop all cached quantities"""
+        self._cache.clear()
+        self._nBytes = 0
+
+    def _get(self, name, zs, xs, compute):
+        """cached quantity name on window (zs, xs), computed by compute(zs, xs)"""
+        key = (name, zs.start, zs.stop, xs.start, xs.stop)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        for (n, z0, z1, x0, x1), value in reversed(self._cache.items()):
+            if n == name and _contains(slice(z0, z1), zs) and _contains(slice(x0, x1), xs):
+                self._cache.move_to_end((n, z0, z1, x0, x1))
+                return value[zs.start-z0:zs.stop-z0, xs.start-x0:xs.stop-x0]
+        value = compute(zs, xs)
+        value.setflags(write=False)
+        if value.nbytes <= self.cacheBytes:
+            self._cache[key] = value
+            self._nBytes += value.nbytes
+            while self._nBytes > self.cacheBytes:
+                self._nBytes -= self._cache.popitem(last=False)[1].nbytes
+        return value
+
+    def field(self, tLim=None, zLim=None):
+        """Time domain field envelope within a window
+
+        Args:
+            tLim (2-tuple): time range in the form (tMin,tMax)
+                        (optional, default=None)
+            zLim (2-tuple): range of propagation distance in the form
+                        (zMin,zMax) (optional, default=None)
+
+        Returns:
+            A (array): field envelope, view of Azt
+        """
+        return self.Azt[_window(self.z, zLim), _window(self.t, tLim)]
+
+    def intensity(self, tLim=None, zLim=None):
+        """Intensity |A|**2 within a window, see method field"""
+        return self._get("intensity", _window(self.z, zLim), _window(self.t, tLim),
+                         lambda zs, ts: np.abs(self.Azt[zs, ts])**2)
+
+    def phase(self, tLim=None, zLim=None):
+        """Phase of the field, unwrapped along t, within a window, see method field"""
+        return self._get("phase", _window(self.z, zLim), _window(self.t, tLim),
+                         lambda zs, ts: np.unwrap(np.angle(self.Azt[zs, ts]), axis=-1))
+
+    def instantaneousFrequency(self, tLim=None, zLim=None):
+        """Instantaneous angular frequency within a window, see method field
+
+        NOTES:
+            - for the field convention A(t) ~ exp(-1j*w*t) of FT, the
+              instantaneous frequency is -d(phase)/dt
+        """
+        return self._get("instantaneousFrequency", _window(self.z, zLim),
+                         _window(self.t, tLim),
+                         lambda zs, ts: -np.gradient(self.phase(zLim=zLim)[:, ts],
+                                                     self.t[ts], axis=-1))
+
+    def spectralField(self, wLim=None, zLim=None):
+        """Frequency domain field envelope within a window
+
+        Args:
+            wLim (2-tuple): angular frequency range in the form (wMin,wMax)
+                        (optional, default=None)
+            zLim (2-tuple): range of propagation distance in the form
+                        (zMin,zMax) (optional, default=None)
+
+        Returns:
+            A_w (array): fftshifted spectral field envelope
+        """
+        return self._get("spectralField", _window(self.z, zLim), _window(self.w, wLim),
+                         lambda zs, ws: nfft.fftshift(FT(self.Azt[zs], axis=-1),
+                                                      axes=-1)[:, ws])
+
+    def spectrum(self, wLim=None, zLim=None):
+        """Spectral intensity |A_w|**2 within a window, see method spectralField"""
+        return self._get("spectrum", _window(self.z, zLim), _window(self.w, wLim),
+                         lambda zs, ws: np.abs(self.spectralField(zLim=zLim)[:, ws])**2)
+
+
+# EOF: results.py
@@ -0,0 +1,126 @@
+""" snapshots.py
+
+module implementing access to the field snapshots returned by the split step
+solvers at arbitrary query distances
+
+Snapshot indices of all queries are found at once by binary search
+(np.searchsorted) in the sorted z-samples, i.e. in O(Nq log Nz) instead of
+one linear scan per query. Profiles are then taken from the nearest stored
+snapshot, interpolated linearly between the enclosing snapshots, or
+re-propagated from the preceding snapshot to the exact query distance.
+Non-uniform output distances for the zOut argument of SSFM_HONSE_symmetric
+are generated by logSpaced().
+"""
+import numpy as np
+
+
+def snapshotIndex(z, zq, side="nearest"):
+    """Indices of stored snapshots for query distances
+
+    Args:
+        z (array): sorted z-samples of the stored snapshots
+        zq (float or array): query distances
+        side (str): "nearest" for the nearest snapshot, "left" for the last
+                        snapshot at or before each query
+                        (optional, default="nearest")
+
+    Returns:
+        idx (int or array): snapshot indices, clipped to the valid range
+    """
+    zq = np.asarray(zq)
+    idx = np.clip(np.searchsorted(z, zq, side="right"), 1, z.size-1)
+    if side == "left":
+        return np.where(zq < z[idx], idx-1, idx)
+    if side != "nearest":
+        raise ValueError("unknown side '%s'" % side)
+    return np.where(zq-z[idx-1] <= z[idx]-zq, idx-1, idx)
+
+
+def snapshotsAt(z, Azt, zq, method="nearest", solver=None, dz=None):
+    """Field envelopes at query distances
+
+    NOTES:
+        - "linear" interpolates the complex envelope; this is accurate only
+          if the phase changes little between stored snapshots. Queries
+          outside the stored range yield the first or last snapshot.
+        - "propagate" starts at the last snapshot at or before each query
+          and propagates with steps of at most dz, so that each query is
+          hit exactly. Queries sharing a snapshot are visited in ascending
+          order in a single pass, so the cost is at most one propagation
+          over the stored range.
+
+    Args:
+        z (array): sorted z-samples of the stored snapshots
+        Azt (array): time domain field envelopes of the stored snapshots
+        zq (float or array): query distances
+        method (str): one of "nearest", "linear" or "propagate"
+                        (optional, default="nearest")
+        solver (callable): function of the form solver(z, A0_t) returning
+                        (z, Azt) with the field at z[-1] as last entry,
+                        required for method="propagate", e.g.
+                        lambda z, A0: SSFM_HONSE_symmetric(z, t, A0, beta2,
+                        beta3, beta4, gamma, s, z.size-1)
+        dz (float): maximal z-stepsize for method="propagate"
+
+    Returns:
+        Aqt (array): time domain field envelopes, one for each query
+    """
+    zq = np.asarray(zq, dtype=float)
+    if method == "nearest":
+        return Azt[snapshotIndex(z, zq)]
+
+    if method == "linear":
+        _zq = np.clip(zq, z[0], z[-1])
+        idx = snapshotIndex(z, _zq, side="left")
+        idx = np.minimum(idx, z.size-2)
+        u = ((_zq-z[idx])/(z[idx+1]-z[idx]))[..., np.newaxis]
+        return (1-u)*Azt[idx] + u*Azt[idx+1]
+
+    if method != "propagate":
+        raise ValueError("unknown method '%s'" % method)
+    if solver is None or dz is None:
+        raise ValueError("method 'propagate' requires solver and dz")
+    if np.any(zq < z[0]):
+        raise ValueError("query distance before first snapshot")
+
+    # -- PROPAGATE FROM QUERY TO QUERY, GROUPED BY PRECEDING SNAPSHOT
+    flat = zq.ravel()
+    idx = snapshotIndex(z, flat, side="left")
+    Aqt = np.empty((flat.size,)+Azt.shape[1:], dtype=complex)
+    prev = None
+    for i in np.lexsort((flat, idx)):
+        if prev is None or idx[i] != idx[prev]:
+            zCur, A_t = z[idx[i]], Azt[idx[i]]
+        nSteps = int(np.ceil((flat[i]-zCur)/dz - 1e-9))
+        if nSteps > 0:
+            A_t = solver(np.linspace(zCur, flat[i], nSteps+1), A_t)[1][-1]
+            zCur = flat[i]
+        Aqt[i] = A_t
+        prev = i
+    return Aqt.reshape(zq.shape+Azt.shape[1:])
+
+
+def logSpaced(z0, z1, n, dzFirst, dense="start"):
+    """Logarithmically spaced output distances
+
+    Args:
+        z0 (float): first output distance
+        z1 (float): last output distance
+        n (int): number of output distances
+        dzFirst (float): smallest spacing, i.e. that at the dense end
+        dense (str): "start" for dense sampling near z0, "end" for dense
+                        sampling near z1, e.g. at an expected shock onset
+                        (optional, default="start")
+
+    Returns:
+        zOut (array): sorted output distances
+    """
+    d = np.concatenate(([0.], np.geomspace(dzFirst, z1-z0, n-1)))
+    if dense == "start":
+        return z0 + d
+    if dense != "end":
+        raise ValueError("unknown dense '%s'" % dense)
+    return (z1 - d)[::-1]
+
+
+# EOF: snapshots.py
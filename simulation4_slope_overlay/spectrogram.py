@@ -0,0 +1,126 @@
+""" spectrogram.py
+
+module implementing time-frequency analysis of propagation histories by
+spectrograms and cross-correlation frequency resolved optical gating (XFROG)
+
+Both are computed by the same engine, see spectrogram,
+    S(tau, w) = |FT(A(t) g(t-tau))|**2,
+with a real gate g (spectrogram) or the field of a reference pulse
+(XFROG), both sampled on nWin time samples centered at t=0. For a batch of
+snapshots, the gated segments at all delays are formed as strided views of
+the zero-padded fields (numpy.lib.stride_tricks.sliding_window_view), so
+that one batched FFT transforms all delays of all snapshots at once. The
+delay hop selects only each hop-th delay. Batches of snapshots are written
+one after another into a preallocated output, which may be a memory-mapped
+.npy file for histories whose spectrograms exceed the memory.
+
+Example:
+    >>> g = gaussianGate(t, 0.5)
+    >>> tau, w, S = spectrogram(t, Azt, g, hop=4)
+    >>> figure_3a(z, tau, w, S, [0, 5, 10], s)
+"""
+import numpy as np
+import numpy.fft as nfft
+from numpy.lib.stride_tricks import sliding_window_view
+
+# -- CONVENIENT ABBREVIATIONS
+FT = nfft.ifft
+IFT = nfft.fft
+
+
+def gaussianGate(t, fwhm, nWin=None):
+    """Gaussian intensity gate of the spectrogram
+
+    Args:
+        t (array): time samples
+        fwhm (float): full width at half maximum of the gate intensity
+        nWin (int): number of gate samples (optional, default: odd number
+                        covering twice the width at 1e-6 of the maximum)
+
+    Returns:
+        g (array): gate amplitude on nWin samples centered at t=0
+    """
+    dt = t[1]-t[0]
+    sigma = fwhm/(2*np.sqrt(np.log(2)))     # -- AMPLITUDE exp(-t**2/(2*sigma**2))
+    if nWin is None:
+        nWin = 2*int(np.ceil(np.sqrt(2*np.log(1e6))*sigma/dt))+1
+    tg = (np.arange(nWin)-nWin//2)*dt
+    return np.exp(-tg**2/(2*sigma**2))
+
+
+def referenceGate(t, R_t, nWin):
+    """Gate of XFROG, cut from the field of a reference pulse
+
+    Args:
+        t (array): time samples
+        R_t (array): time domain field envelope of the reference pulse,
+                        centered near t=0
+        nWin (int): number of gate samples
+
+    Returns:
+        g (array): reference field on nWin samples centered at t=0
+    """
+    i0 = np.argmin(np.abs(t)) - nWin//2
+    if i0 < 0 or i0+nWin > t.size:
+        raise ValueError("gate of %d samples exceeds the time window" % nWin)
+    return np.asarray(R_t[i0:i0+nWin], dtype=complex)
+
+
+def spectrogram(t, Azt, gate, hop=1, nFFT=None, chunkSize=16, out=None, fileName=None):
+    """Spectrograms of many snapshots by batched FFTs of strided windows
+
+    NOTES:
+        - memory of a batch scales as chunkSize*(Nt/hop)*nFFT complex
+          values; decrease chunkSize for large windows
+        - with fileName, the result is a memory-mapped .npy file which is
+          filled batch by batch, so that neither Azt nor the spectrograms
+          need to fit into memory at once
+
+    Args:
+        t (array): time samples
+        Azt (array): time domain field envelopes of shape (Nz, Nt), e.g. a
+                        memory-mapped array
+        gate (array): gate on an odd or even number nWin of samples
+                        centered at t=0, see gaussianGate and referenceGate
+        hop (int): keep only each hop-th delay (optional, default=1)
+        nFFT (int): FFT size, at least nWin, for zero-padded segments
+                        (optional, default: nWin)
+        chunkSize (int): number of snapshots per batch (optional, default=16)
+        out (array): preallocated output of shape (Nz, nTau, nFFT)
+                        (optional, default=None)
+        fileName (str): name of .npy file holding the output
+                        (optional, default=None)
+
+    Returns: (tau, w, S)
+        tau (array): delays, i.e. each hop-th time sample
+        w (array): sorted angular frequency samples
+        S (array): spectrograms of shape (Nz, nTau, nFFT), fftshifted along
+            the last axis
+    """
+    dt = t[1]-t[0]
+    nWin = gate.size
+    nFFT = nWin if nFFT is None else nFFT
+    if nFFT < nWin:
+        raise ValueError("nFFT must be at least the gate size %d" % nWin)
+    tau = t[::hop]
+    w = nfft.fftshift(nfft.fftfreq(nFFT, d=dt)*2*np.pi)
+    shape = (Azt.shape[0], tau.size, nFFT)
+    if out is None:
+        out = np.empty(shape) if fileName is None else \
+            np.lib.format.open_memmap(fileName, mode="w+", dtype=float, shape=shape)
+    elif out.shape != shape:
+        raise ValueError("expected output of shape %s" % (shape,))
+
+    # -- PAD SO THAT THE WINDOW OF DELAY t[k] IS CENTERED AT t[k]
+    pad = (nWin//2, nWin-1-nWin//2)
+    for i in range(0, Azt.shape[0], chunkSize):
+        A = np.pad(np.asarray(Azt[i:i+chunkSize]), [(0, 0), pad])
+        segments = sliding_window_view(A, nWin, axis=-1)[:, ::hop]
+        S_w = FT(segments*gate, n=nFFT, axis=-1)
+        out[i:i+chunkSize] = nfft.fftshift(np.abs(S_w)**2, axes=-1)
+    if isinstance(out, np.memmap):
+        out.flush()
+    return tau, w, out
+
+
+# EOF: spectrogram.py
@@ -12,12 +12,55 @@ DATE: 2020-06-01
 """
 import numpy as np
 import numpy.fft as nfft
+from parallel import fftPair, ChunkedKernels
+from raman import responseSpectrum
+from dispersion import linearOperator, halfStepPropagator
+from fft_tuning import lookup
 
 # -- CONVENIENT ABBREVIATIONS
 FT = nfft.ifft
 IFT = nfft.fft
 
 
+def compositionWeights(order):
+    """Weights of symmetric composition schemes of even order
+
+    Builds the weights of the triple-jump composition of Yoshida [1]
+    recursively: a scheme of order p+2 applies the scheme of order p with
+    stepsizes w1*dz, w0*dz, w1*dz, where w1 = 1/(2-2**(1/(p+1))) and
+    w0 = 1-2*w1.
+
+    Args:
+        order (int): even order of the composition scheme
+
+    Returns:
+        c (tuple): fractions of the z-stepsize of the symmetric (Strang)
+            sub-steps, summing to one
+
+    Refs:
+        [1] Construction of higher order symplectic integrators
+            H. Yoshida
+            Phys. Lett. A 150 (1990) 262
+    """
+    if order < 2 or order%2:
+        raise ValueError("order must be even and >= 2")
+    c = (1.,)
+    for p in range(2, order, 2):
+        w1 = 1/(2-2**(1/(p+1)))
+        w0 = 1-2*w1
+        c = tuple(w1*ci for ci in c) + tuple(w0*ci for ci in c) + tuple(w1*ci for ci in c)
+    return c
+
+
+# -- REGISTRY OF SPLITTING SCHEMES, GIVEN BY THE WEIGHTS OF THEIR SYMMETRIC
+# SUB-STEPS
+COMPOSITIONS = {
+    "strang": compositionWeights(2),
+    "yoshida4": compositionWeights(4),
+    "yoshida6": compositionWeights(6),
+}
+
+
 def SSFM_NSE_simple(z, t, A0_t, beta2, gamma, nSkip):
     """Split step fourier method using simple operator splitting
 
@@ -119,17 +162,19 @@ def SSFM_NSE_symmetric(z, t, A0_t, beta2, gamma, nSkip ):
 
     return np.asarray(res_z), np.asarray(res_A)
 
-def SSFM_HONSE_symmetric(z, t, A0_t, beta2, beta3, beta4, gamma, s = 0, nSkip = 1):
-    """Split step fourier method using symmetric operator splitting
+def SSFM_NSE_composition(z, t, A0_t, beta2, gamma, nSkip, scheme="yoshida4"):
+    """Split step fourier method using a composition of symmetric splittings
 
     Implements divid-and-conquer strategy to solve the nonlinear Schroedinger
-    equation (NLS). Pulse propagation is performed using a symmetric splitting
-    scheme.
+    equation (NLS). Each z-step is composed of symmetric splitting sub-steps
+    with fractional stepsizes, yielding a scheme of order 4 or 6.
 
     NOTES:
-        - uses abbreviations FT, specifying the DFT, and IFT, specifying its
-          inverse. These are defined at the beginning of the script right
-          beneath the import statements.
+        - adjacent linear half-steps of consecutive sub-steps are merged.
+          The propagator of each distinct fractional stepsize is computed
+          once and reused in all z-steps.
+        - composition schemes of order > 2 involve negative sub-steps, see
+          compositionWeights()
 
     Args:
         z (array): samples along propagation distance
@@ -138,6 +183,8 @@ def SSFM_HONSE_symmetric(z, t, A0_t, beta2, beta3, beta4, gamma, s = 0, nSkip =
         beta2 (float): 2nd order dispersion parameter
         gamma (float): nonlinear parameter
         nSkip (int): keep only each nSkip-th field configuration
+        scheme (str): name of composition scheme in COMPOSITIONS
+                        (optional, default="yoshida4")
 
     Returns: (z,Azt)
         z (array): resulting z-samples at which field envelope is recorded
@@ -147,30 +194,21 @@ def SSFM_HONSE_symmetric(z, t, A0_t, beta2, beta3, beta4, gamma, s = 0, nSkip =
     dt = t[1]-t[0]
     A_t  = np.copy(A0_t)
     w = nfft.fftfreq(t.size,d=dt)*2*np.pi
-    D_w = beta2/2 * w**2 + beta3/6 * w**3 + beta4/24 * w**4
-    
+    c = COMPOSITIONS[scheme]
+
+    # -- FRACTIONS OF dz OF THE MERGED LINEAR SUB-STEPS AND THEIR PROPAGATORS
+    fLin = [0.5*c[0]] + [0.5*(c[i]+c[i+1]) for i in range(len(c)-1)] + [0.5*c[-1]]
+    P_w = {f: np.exp(1j*0.5*beta2*w*w*f*dz) for f in set(fLin)}
+
     # -- INITIALIZE DATA STRUCTURES THAT WILL ACCUMLATE RESULTS
     res_z = []; res_z.append(0)
     res_A = []; res_A.append(A0_t)
-    
-    #s = 0.2
 
     for idx in range(1,z.size):
-
-        A_t = IFT(np.exp(1j * D_w * dz * 0.5) * FT(A_t))   
-        
-        #A_t = A_t * np.exp(-1j * gamma * np.abs(A_t)**2 * dz)        
-        #A_t = IFT(np.exp(1j * D_w * dz * 0.5) * FT(A_t))      
-        
-        A_tt = A_t * np.abs(A_t)**2
-        A_tt_dt = IFT((-1j) * w * FT(A_tt))
-        #N_t = -1j * gamma * ( A_tt + 1j * s * A_tt_dt )
-        
-        N_t = 1j * gamma * A_tt - s * A_tt_dt 
-        
-        A_t = A_t + dz * N_t
-        
-        A_t = IFT(np.exp(1j * D_w * dz * 0.5) * FT(A_t))   
+        A_t = IFT(P_w[fLin[0]]*FT(A_t))
+        for ci, fi in zip(c, fLin[1:]):
+            A_t = A_t*np.exp(1j*gamma*np.abs(A_t)**2*ci*dz)
+            A_t = IFT(P_w[fi]*FT(A_t))
 
         # -- KEEP ONLY EVERY nSkip-TH FIELD CONFIGURATION 
         if idx%nSkip==0:
@@ -179,5 +217,623 @@ def SSFM_HONSE_symmetric(z, t, A0_t, beta2, beta3, beta4, gamma, s = 0, nSkip =
 
     return np.asarray(res_z), np.asarray(res_A)
 
+def _centroid(t, A_t):
+    """centroid of the intensity |A_t|**2 along t"""
+    I = np.abs(A_t)**2
+    return np.sum(t*I)/np.sum(I)
+
+
+class _MovingFrame():
+    """Reference frame of SSFM_HONSE_symmetric, see its frameVelocity argument
+
+    The frame moves with velocity v, realized by the phase ramp
+    exp(-1j*w*v*dz) in the linear sub-steps. For frameVelocity="auto" the
+    velocity is re-estimated every update steps from the drift of the
+    intensity centroid, so that the self-steepening pulse, moving at about
+    s*I0, stays centred in the time window.
+
+    Attrs:
+        v (float): velocity of the frame, None in the laboratory frame
+        offset (float): time offset of the frame, i.e. t + offset is the
+            laboratory time
+    """
+
+    def __init__(self, t, velocity, update, A_t, state=None):
+        """Initialize frame for field A_t, or from the state of an earlier run"""
+        self.auto = isinstance(velocity, str)
+        if self.auto and velocity != "auto":
+            raise ValueError("unknown frameVelocity '%s'" % velocity)
+        self.t, self.update = t, update
+        self.v = 0. if self.auto else velocity
+        self.offset = 0.
+        if state is not None:
+            self.v, self.offset = state["frameVelocity"], state["frameOffset"]
+        self.centroid = None
+        if self.v is not None:
+            self.centroid = _centroid(t, A_t) if state is None else state["centroid"]
+
+    def advance(self, dz):
+        """move frame along with a step of size dz"""
+        if self.v is not None:
+            self.offset += self.v*dz
+
+    def offsetBefore(self, dz):
+        """offset of the frame a distance dz before its current position"""
+        return None if self.v is None else self.offset-self.v*dz
+
+    def adapt(self, idx, A_t, dz):
+        """Re-estimate the velocity at each update-th step
+
+        The new velocity corrects the observed centroid drift and returns
+        the centroid to t=0 within the next update steps.
+
+        Returns:
+            changed (bool): True if the velocity was re-estimated
+        """
+        if not self.auto or idx%self.update:
+            return False
+        c = _centroid(self.t, A_t)
+        self.v += (2*c - self.centroid)/(self.update*dz)
+        self.centroid = c
+        return True
+
+    def state(self):
+        """entries of the solver state describing the frame"""
+        return {"frameVelocity": self.v, "frameOffset": self.offset,
+                "centroid": self.centroid}
+
+
+class _OutputSchedule():
+    """Output schedule of SSFM_HONSE_symmetric, see its nSkip, obsSkip, zOut
+    and recordTol arguments
+
+    Output distances zOut between z-samples are hit exactly by a side step
+    of reduced size, taken from the field before the step that passes them;
+    the main propagation is unaffected. For recordTol > 0 a field is kept
+    only if it changed by more than recordTol, in relative RMS norm, since
+    the last one kept. The change is checked at each skip-th step; the final
+    field is always kept.
+
+    Attrs:
+        last (array): last field kept on its own merit, reference for
+            recordTol
+        forcedRecord (bool): True if the final field was kept only as end
+            of the run, i.e. at the end of z for recordTol, or where the run
+            was stopped by an event
+    """
+
+    def __init__(self, z, skip, zOut=None, recordTol=None, idx0=0, state=None):
+        """Initialize schedule, starting at z[idx0]
+
+        Args:
+            z (array): samples along propagation distance
+            skip (int): keep each skip-th field configuration
+            zOut (array): sorted output distances (optional, default=None)
+            recordTol (float): relative change of the field that triggers
+                        recording (optional, default=None)
+            idx0 (int): index of first z-sample (optional, default=0)
+            state (dict): solver state of an earlier run
+                        (optional, default=None)
+        """
+        self.z, self.skip, self.recordTol = z, skip, recordTol
+        self.last = None if state is None else state["lastRecorded"]
+        self.forcedRecord = False
+        # -- OUTPUT DISTANCES ARE MATCHED UP TO A SMALL FRACTION OF THE STEPSIZE
+        self.zOut = None if zOut is None else np.asarray(zOut, dtype=float)
+        self.dz = z[1]-z[0]
+        self.eps = 1e-9*self.dz
+        self.nOut = 0
+        if self.zOut is not None:
+            if np.any(np.diff(self.zOut) < 0):
+                raise ValueError("zOut must be sorted")
+            if self.zOut.size and self.zOut[0] < z[0]-self.eps:
+                raise ValueError("zOut before start of propagation")
+            self.nOut = int(np.sum(self.zOut <= z[idx0]+self.eps))
+        self.keepsStart = state is None and (self.zOut is None or self.nOut > 0)
+
+    def kept(self, A_t, forced=False):
+        """note that A_t was kept; a forced final field does not replace
+        the reference for recordTol"""
+        if forced:
+            self.forcedRecord = True
+        else:
+            self.last = A_t
+
+    def passed(self, idx):
+        """Output distances passed in the step to z[idx]
+
+        Returns:
+            out (list): (zOut, dz) pairs, where dz is the size of the side
+                step from z[idx-1] reaching zOut, or None if zOut is z[idx]
+        """
+        out = []
+        while self.nOut < self.zOut.size and self.zOut[self.nOut] <= self.z[idx]+self.eps:
+            dzOut = self.zOut[self.nOut]-self.z[idx-1]
+            if dzOut >= self.dz-self.eps:
+                out.append((self.z[idx], None))
+            elif dzOut > self.eps:
+                out.append((self.zOut[self.nOut], dzOut))
+            self.nOut += 1
+        return out
+
+    def due(self, idx, A_t):
+        """True if field A_t at z[idx] is kept by the uniform schedule,
+        optionally only if it changed sufficiently"""
+        return idx%self.skip==0 and (self.recordTol is None or
+            np.linalg.norm(A_t-self.last) > self.recordTol*np.linalg.norm(self.last))
+
+    def forced(self, idx):
+        """True if the final field must be kept although not due"""
+        return self.recordTol is not None and idx==self.z.size-1
+
+    def state(self):
+        """entries of the solver state describing the schedule"""
+        return {"lastRecorded": self.last, "forcedRecord": self.forcedRecord}
+
+
+class _EventMonitor():
+    """Event handling of SSFM_HONSE_symmetric, see its events and nRefine
+    arguments
+
+    Attrs:
+        occurred (list): (name, z) pairs of the first occurrence of each
+            event in this run
+        seen (set): names of the events that occurred, including those of
+            an earlier run
+    """
+
+    def __init__(self, t, events=None, nRefine=4, state=None):
+        """Initialize monitor, or from the state of an earlier run"""
+        self.t, self.events, self.nRefine = t, events or [], nRefine
+        self.seen = set() if state is None else set(state["events"])
+        self.occurred = []
+
+    def _fired(self, A_t):
+        return [ev for ev in self.events if ev(self.t, A_t)]
+
+    def check(self, z0, A_t, retake):
+        """Check events for the field A_t at z0 after a step
+
+        If a "refine" event fires, the step is re-taken by retake(nRefine),
+        taking nRefine sub-steps, and the events are checked once more.
+
+        Returns: (A_t, stop)
+            A_t (array): field after the step
+            stop (bool): True if a "stop" event fired
+        """
+        fired = self._fired(A_t)
+        if any(ev.action=="refine" for ev in fired):
+            A_t = retake(self.nRefine)
+            fired = self._fired(A_t)
+        for ev in fired:
+            if ev.name not in self.seen:
+                self.seen.add(ev.name)
+                self.occurred.append((ev.name, z0))
+        return A_t, any(ev.action=="stop" for ev in fired)
+
+    def state(self):
+        """entries of the solver state describing the events"""
+        return {"events": sorted(self.seen)}
+
+
+class _Recorder():
+    """Recorded output of SSFM_HONSE_symmetric, i.e. the z-samples and
+    fields, or observables, and the frame offsets, see its observables and
+    out arguments"""
+
+    def __init__(self, t, frame, observables=None, out=None):
+        """Initialize empty record"""
+        self.t, self.frame, self.observables, self.out = t, frame, observables, out
+        self.names = None if observables is None else list(observables)
+        self.z, self.A, self.offsets = [], [], []
+
+    def record(self, z0, A_t, offset=None):
+        """keep field A_t at z0; offset is the frame offset at z0 if the
+        frame has moved on since"""
+        self.z.append(z0)
+        if self.frame.v is not None:
+            self.offsets.append(self.frame.offset if offset is None else offset)
+        if self.observables is None and self.out is not None:
+            self.out[len(self.z)-1] = A_t
+        elif self.observables is None:
+            self.A.append(A_t)
+        else:
+            self.A.append(tuple(self.observables[n](self.t, A_t) for n in self.names))
+
+    def results(self):
+        """recorded z-samples and fields, or observables, as arrays"""
+        res_z = np.asarray(self.z)
+        if self.observables is None and self.out is not None:
+            res_A = self.out[:res_z.size]
+        elif self.observables is None:
+            res_A = np.asarray(self.A) if self.A else \
+                np.empty((0,)+self.t.shape, dtype=complex)
+        else:
+            res_A = np.array(self.A, dtype=[(n, float) for n in self.names])
+        return res_z, res_A
+
+
+def _resume(z, dz, A0_t, state):
+    """Index and field from which SSFM_HONSE_symmetric starts, i.e. the start
+    of z or the end of the earlier run the state was taken from"""
+    if state is None:
+        return 0, np.copy(A0_t)
+    idx0 = state["idx"]
+    if dz != state["dz"] or not np.isclose(z[idx0], state["z"]):
+        raise ValueError("state does not match z-grid")
+    return idx0, np.copy(state["A"])
+
+
+def SSFM_HONSE_symmetric(z, t, A0_t, beta2, beta3, beta4, gamma, s = 0, nSkip = 1,
+                         fR = 0, hR = None, dispersion = None, taperTol = 0,
+                         observables = None, obsSkip = 1,
+                         zOut = None, recordTol = None,
+                         events = None, nRefine = 4,
+                         absorber = None, spectralFilter = None,
+                         frameVelocity = None, frameUpdate = 10,
+                         workers = None, chunkSize = 16384, fft = None,
+                         callback = None, callbackSkip = 100,
+                         scheme = "strang", state = None, out = None,
+                         full_output = False):
+    """Split step fourier method using symmetric operator splitting
+
+    Implements divid-and-conquer strategy to solve the nonlinear Schroedinger
+    equation (NLS). Pulse propagation is performed using a symmetric splitting
+    scheme.
+
+    NOTES:
+        - uses abbreviations FT, specifying the DFT, and IFT, specifying its
+          inverse. These are defined at the beginning of the script right
+          beneath the import statements.
+        - for fR > 0 the nonlinearity includes the delayed Raman response,
+          i.e. A*|A|^2 is replaced by A*((1-fR)*|A|^2 + fR*(hR*|A|^2)) in both
+          the Kerr and the self-steepening term (GNLSE). The convolution is
+          computed via FFTs using the response spectrum precomputed once,
+          see module raman.py.
+        - dispersion replaces the Taylor polynomial in beta2, beta3, beta4
+          by tabulated beta(w) and loss alpha(w), interpolated once onto the
+          frequency grid. Half-step propagators are cached across runs,
+          keyed by grid, dz and table hash, see module dispersion.py.
+        - beta2, beta3, beta4, gamma and s may be functions of z, e.g. for
+          concatenated fiber segments or tapers, see module fiber.py. They
+          are evaluated at the midpoint of each step. The linear propagator
+          is recomputed only if a dispersion coefficient changed by more
+          than the relative tolerance taperTol, i.e. only at breakpoints for
+          piecewise constant coefficients.
+        - zOut replaces the uniform schedule given by nSkip by explicit
+          output distances, e.g. log-spaced ones, see snapshots.logSpaced;
+          recordTol keeps only fields that changed sufficiently, see
+          _OutputSchedule.
+        - events are callables of the form f(t, A_t) returning True if the
+          event occurred, with attributes name and action (one of "record",
+          "stop", "refine"), see module events.py. A "refine" event
+          re-takes the offending step using nRefine sub-steps before it
+          is recorded.
+        - absorber and spectralFilter are field loss rates alpha, i.e. the
+          envelope is damped by exp(-alpha*dz) per step. The spectral loss
+          is folded into the linear sub-steps at no extra cost, the temporal
+          one is applied after each step. Use them to suppress wraparound at
+          the periodic boundaries of a small time window, see module
+          boundaries.py.
+        - frameVelocity propagates the field in a moving reference frame,
+          realized by a phase ramp folded into the linear sub-steps, see
+          _MovingFrame.
+        - workers parallelizes a single run, see module parallel.py;
+          fft="auto" uses the FFT configuration found fastest for t.size
+          by fft_tuning.tune().
+        - callback is a function of the form f(idx, z, A_t) that is called
+          every callbackSkip steps, e.g. in order to report progress.
+        - scheme selects a composition of symmetric sub-steps, see
+          COMPOSITIONS. For schemes other than "strang" the nonlinear
+          sub-step is integrated by the classical 4th order Runge-Kutta
+          method instead of a single Euler step, so that the overall order
+          is 4; "yoshida6" is thus limited to order 4 as well. Sub-steps of
+          negative size amplify where absorber or spectralFilter damp.
+        - state continues an earlier run, bit-identically to a single run
+          over z, see module continuation.py. z is then the z-grid of the
+          complete run, of which the earlier run covered a prefix.
+
+    Args:
+        z (array): samples along propagation distance
+        t (array): time samples
+        A0_t (array): time domain field envelope
+        beta2 (float or callable): 2nd order dispersion parameter
+        beta3 (float or callable): 3rd order dispersion parameter
+        beta4 (float or callable): 4th order dispersion parameter
+        gamma (float or callable): nonlinear parameter
+        s (float or callable): self-steepening parameter
+                        (optional, default=0)
+        nSkip (int): keep only each nSkip-th field configuration
+                        (optional, default=1)
+        fR (float): fractional Raman contribution (optional, default=0)
+        hR (callable or array): Raman response function of the delay, or
+                        its samples at delays t-t[0], required if fR > 0
+                        (optional, default=None)
+        dispersion (FiberTable): tabulated dispersion and loss; if given,
+                        beta2, beta3 and beta4 are ignored
+                        (optional, default=None)
+        taperTol (float): relative change of z-dependent dispersion
+                        coefficients that triggers recomputation of the
+                        linear propagator (optional, default=0)
+        observables (dict): reducer functions of the form f(t, A_t), keyed
+                        by name. If given, no field configurations are kept;
+                        instead each reducer is evaluated and its scalar
+                        value recorded (optional, default=None)
+        obsSkip (int): evaluate observables only at each obsSkip-th step
+                        (optional, default=1)
+        zOut (array): sorted output distances >= z[0], those beyond z[-1]
+                        are ignored; if given, nSkip and obsSkip are ignored
+                        (optional, default=None)
+        recordTol (float): relative change of the field that triggers
+                        recording (optional, default=None)
+        events (list): event detectors checked after each step
+                        (optional, default=None)
+        nRefine (int): number of sub-steps used by "refine" events
+                        (optional, default=4)
+        absorber (array): temporal loss rate alpha(t) on the time samples
+                        (optional, default=None)
+        spectralFilter (array): spectral loss rate alpha(w), given in the
+                        order of nfft.fftfreq (optional, default=None)
+        frameVelocity (float or str): velocity of the reference frame, or
+                        "auto" (optional, default=None)
+        frameUpdate (int): number of steps between velocity estimates for
+                        frameVelocity="auto" (optional, default=10)
+        workers (int): number of threads for a parallel run, -1 for all
+                        cores (optional, default=None, serial run)
+        chunkSize (int): number of samples per chunk of elementwise work
+                        (optional, default=16384)
+        fft (str): FFT backend, one of "numpy", "scipy", "pyfftw" or
+                        "auto" (optional, default=None, chosen by workers)
+        callback (callable): function called during propagation
+                        (optional, default=None)
+        callbackSkip (int): number of steps between calls of callback
+                        (optional, default=100)
+        scheme (str): name of splitting scheme in COMPOSITIONS
+                        (optional, default="strang")
+        state (dict): solver state of an earlier run, as kept in its info
+                        dictionary under key "state" (optional, default=None)
+        out (array): preallocated array into which recorded field
+                        envelopes are written, e.g. in shared memory, see
+                        module sweep.py; Azt is then a view of its leading
+                        rows (optional, default=None)
+        full_output (bool): additionally return dictionary with solver
+                        information (optional, default=False)
+
+    Returns: (z,Azt) or, if observables are given, (z,obs)
+        z (array): resulting z-samples at which field envelope is recorded
+        Azt (array): resulting time domain field envelope
+        obs (structured array): recorded observables, one field per name
+        info (dict): only if full_output is True. Contains the list of
+            (name, z) pairs of the first occurrence of each event under
+            key "events" and the distance at which propagation was
+            stopped under key "zStop" (None if it ran to completion).
+            The field at which it was stopped is always kept, see
+            "forcedRecord" of the state. The energy removed by absorber and
+            spectral filter is accumulated under key "absorbedEnergy". For
+            a moving frame, the time offset of the frame for each recorded
+            z-sample and the final frame velocity are kept under keys
+            "frameOffset" and "frameVelocity", i.e. t + frameOffset is the
+            laboratory time.
+            For a parallel run, the thread utilization of the elementwise
+            kernels is kept under key "kernelUtilization", see
+            parallel.parallelEfficiency for the speedup of the run. The
+            number of recomputations of the linear operator for z-dependent
+            dispersion is kept under key "propagatorUpdates". The solver
+            state needed to continue the run is kept under key "state"
+    """
+    dz = z[1]-z[0]
+    dt = t[1]-t[0]
+    w = nfft.fftfreq(t.size,d=dt)*2*np.pi
+    _at = lambda c, z0: c(z0) if callable(c) else c
+
+    def _linearOperator(z0):
+        if dispersion is not None:
+            return None, linearOperator(t, dispersion)
+        b2, b3, b4 = betas = tuple(_at(b, z0) for b in (beta2, beta3, beta4))
+        return betas, b2/2 * w**2 + b3/6 * w**3 + b4/24 * w**4
+
+    betas, D_w = _linearOperator(z[0]+0.5*dz)
+    if spectralFilter is not None:
+        D_w = D_w + 1j*spectralFilter
+    zDependent = dispersion is None and any(callable(b) for b in (beta2, beta3, beta4))
+    if fft == "auto":
+        config = lookup(t.size)
+        _FT, _IFT = fftPair(workers) if config is None else \
+            fftPair(config["workers"], config["backend"])
+    else:
+        _FT, _IFT = fftPair(workers, fft)
+    dW = (-1j) * w
+    weights = None if scheme == "strang" else COMPOSITIONS[scheme]
+    if fR:
+        hR_w = responseSpectrum(t, hR)
+
+    # -- CACHE LINEAR HALF-STEP PROPAGATORS AND ABSORBER MASKS FOR EACH dz
+    _cache = {}
+    def _propagator(dz):
+        if dz not in _cache:
+            if frame.v is not None:
+                P_w = np.exp(1j * (D_w - frame.v*w) * dz * 0.5)
+            elif dispersion is not None and spectralFilter is None:
+                P_w = halfStepPropagator(t, dispersion, dz)
+            else:
+                P_w = np.exp(1j * D_w * dz * 0.5)
+            _cache[dz] = P_w, \
+                None if absorber is None else np.exp(-absorber*dz)
+        return _cache[dz]
+
+    def _linear(A_t, P_w):
+        if spectralFilter is None:
+            return _IFT(kernels.mul(P_w, _FT(A_t)))
+        A_w = _FT(A_t)
+        E0 = np.sum(np.abs(A_w)**2)
+        A_w = kernels.mul(P_w, A_w)
+        loss["step"] += (E0-np.sum(np.abs(A_w)**2))*t.size*dt
+        return _IFT(A_w)
+
+    def _updateLinear(z0):
+        nonlocal betas, D_w
+        _betas = tuple(_at(b, z0) for b in (beta2, beta3, beta4))
+        if not np.allclose(_betas, betas, rtol=taperTol, atol=0):
+            betas, D_w = _linearOperator(z0)
+            if spectralFilter is not None:
+                D_w = D_w + 1j*spectralFilter
+            _cache.clear()
+            info["propagatorUpdates"] += 1
+
+    def _nonlinear(A_t):
+        if fR:
+            R_t = _IFT(kernels.mul(hR_w, _FT(np.abs(A_t)**2))).real
+            A_tt = kernels.kerr(A_t, R_t, fR)
+        else:
+            A_tt = kernels.kerr(A_t)
+        return A_tt, _IFT(kernels.mul(dW, _FT(A_tt)))
+
+    def _rhs(A_t, g, s):
+        A_tt, A_tt_dt = _nonlinear(A_t)
+        return 1j * g * A_tt - s * A_tt_dt
+
+    def _rk4(A_t, dz, g, s):
+        k1 = _rhs(A_t, g, s)
+        k2 = _rhs(A_t + 0.5*dz*k1, g, s)
+        k3 = _rhs(A_t + 0.5*dz*k2, g, s)
+        k4 = _rhs(A_t + dz*k3, g, s)
+        return A_t + dz/6*(k1 + 2*k2 + 2*k3 + k4)
+
+    def _step(A_t, dz, z0):
+        if weights is None:
+            return _substep(A_t, dz, z0)
+        for c in weights:
+            A_t = _substep(A_t, c*dz, z0)
+            z0 += c*dz
+        return A_t
+
+    def _substep(A_t, dz, z0):
+        zMid = z0+0.5*dz
+        if zDependent:
+            _updateLinear(zMid)
+        P_w, M_t = _propagator(dz)
+        A_t = _linear(A_t, P_w)
+        if weights is None:
+            A_tt, A_tt_dt = _nonlinear(A_t)
+            A_t = kernels.euler(A_t, A_tt, A_tt_dt, dz, _at(gamma, zMid), _at(s, zMid))
+        else:
+            A_t = _rk4(A_t, dz, _at(gamma, zMid), _at(s, zMid))
+        A_t = _linear(A_t, P_w)
+        if M_t is not None:
+            E0 = np.sum(np.abs(A_t)**2)
+            A_t = kernels.mul(M_t, A_t)
+            loss["step"] += (E0-np.sum(np.abs(A_t)**2))*dt
+        return A_t
+
+    def _sideStep(A_t, dz, z0):
+        # -- THE PROPAGATORS OF A SIDE STEP, ONE FOR EACH SUB-STEP SIZE OF A
+        # COMPOSITION SCHEME, ARE NOT KEPT IN THE CACHE
+        keys = set(_cache)
+        A_t = _step(A_t, dz, z0)
+        for key in set(_cache)-keys:
+            del _cache[key]
+        return A_t
+
+    def _acceptedStep(idx, A_prev):
+        # -- TAKE STEP AND CHECK FOR EVENTS, RE-TAKING THE STEP WITH SMALLER
+        # SUB-STEPS IF REQUESTED. THE ENERGY ABSORBED IN THE STEP IS ADDED TO
+        # info ONLY ONCE THE STEP IS ACCEPTED
+        def _retake(n):
+            loss["step"] = 0.
+            A_t = A_prev
+            for k in range(n):
+                A_t = _step(A_t, dz/n, z[idx-1]+k*dz/n)
+            return A_t
+
+        loss["step"] = 0.
+        A_t = _step(A_prev, dz, z[idx-1])
+        frame.advance(dz)
+        A_t, stop = monitor.check(z[idx], A_t, _retake)
+        info["absorbedEnergy"] += loss["step"]
+        return A_t, stop
+
+    def _record(z0, A_t, offset=None, forced=False):
+        schedule.kept(A_t, forced)
+        recorder.record(z0, A_t, offset)
+
+    # -- INITIALIZE DATA STRUCTURES THAT WILL ACCUMLATE RESULTS
+    idx0, A_t = _resume(z, dz, A0_t, state)
+    # -- THE LINEAR OPERATOR OF A TAPER IS KEPT UNTIL IT IS OUTDATED
+    if state is not None and "D_w" in state:
+        betas, D_w = state["betas"], state["D_w"]
+    monitor = _EventMonitor(t, events, nRefine, state)
+    info = {"events": monitor.occurred, "zStop": None, "absorbedEnergy": 0.,
+            "propagatorUpdates": 0}
+    loss = {"step": 0.}
+    frame = _MovingFrame(t, frameVelocity, frameUpdate, A_t, state)
+    recorder = _Recorder(t, frame, observables, out)
+    schedule = _OutputSchedule(z, nSkip if observables is None else obsSkip, zOut,
+                               recordTol, idx0, state)
+    if schedule.keepsStart:
+        _record(z[0], A0_t)
+
+    idx = idx0
+    # -- RELEASE WORKER THREADS ALSO IF PROPAGATION FAILS
+    kernels = ChunkedKernels(t.size, workers, chunkSize)
+    try:
+        for idx in range(idx0+1,z.size):
+            A_prev = A_t
+            A_t, stop = _acceptedStep(idx, A_prev)
+            # -- KEEP FIELD CONFIGURATIONS AT OUTPUT DISTANCES PASSED IN THIS
+            # STEP. THOSE BEFORE z[idx] ARE REACHED BY A SIDE STEP FROM A_prev
+            if schedule.zOut is not None:
+                for zo, dzOut in schedule.passed(idx):
+                    if dzOut is None:
+                        _record(z[idx], A_t)
+                    else:
+                        _record(zo, _sideStep(A_prev, dzOut, z[idx-1]),
+                                frame.offsetBefore(dz-dzOut))
+
+            # -- KEEP ONLY EVERY nSkip-TH FIELD CONFIGURATION
+            # OR REDUCE FIELD TO SCALAR OBSERVABLES AT EACH obsSkip-TH STEP,
+            # OPTIONALLY ONLY IF THE FIELD CHANGED SUFFICIENTLY
+            elif schedule.due(idx, A_t):
+                _record(z[idx], A_t)
+
+            # -- THE FINAL FIELD IS ALWAYS KEPT, BUT REMAINS THE REFERENCE FOR
+            # CHANGES ONLY IF IT WAS KEPT ON ITS OWN MERIT
+            elif schedule.forced(idx):
+                _record(z[idx], A_t, forced=True)
+
+            # -- THE FIELD AT WHICH THE RUN WAS STOPPED IS ALWAYS KEPT, AS END
+            # OF THE RUN UNLESS IT WAS KEPT ON ITS OWN MERIT
+            if stop:
+                info["zStop"] = z[idx]
+                if recorder.z[-1:] != [z[idx]]:
+                    _record(z[idx], A_t, forced=True)
+                break
+
+            # -- UPDATE VELOCITY OF MOVING FRAME, ONCE THE FIELDS OF THIS STEP
+            # ARE KEPT
+            if frame.adapt(idx, A_t, dz):
+                _cache.clear()
+
+            if callback is not None and idx%callbackSkip==0:
+                callback(idx, z[idx], A_t)
+    finally:
+        kernels.shutdown()
+
+    # -- KEEP SOLVER STATE FOR CONTINUATION OF THE RUN
+    info["state"] = {
+        "idx": idx, "z": z[idx], "z0": z[0], "dz": dz, "A": A_t,
+        "betas": betas, "D_w": D_w, **monitor.state(),
+        **schedule.state(), **frame.state(),
+    }
+
+    res_z, res_A = recorder.results()
+    if frame.v is not None:
+        info["frameOffset"] = np.asarray(recorder.offsets)
+        info["frameVelocity"] = frame.v
+    if workers is not None:
+        info["kernelUtilization"] = kernels.utilization()
+    if full_output:
+        return res_z, res_A, info
+    return res_z, res_A
+
 
 # EOF: split_step_solver.py
@@ -0,0 +1,243 @@
+""" surrogate.py
+
+module implementing a moment-method surrogate of SSFM_HONSE_symmetric for
+screening sweeps over the fiber and pulse parameters
+
+The field is approximated by the chirped sech ansatz
+    A(z,t) = sqrt(P) sech((t-T)/tau) exp(-1j*Omega*(t-T) - 1j*C*(t-T)**2/(2*tau**2))
+of energy E = 2*P*tau, whose centroid T, width tau and chirp C evolve
+according to the reduced ordinary differential equations [1]
+    dT/dz   = beta2*Omega + s*P
+    dtau/dz = beta2*C/tau
+    dC/dz   = (4/pi**2 + C**2)*beta2/tau**2 + 4*gamma*P/pi**2
+where the drift s*P of the centroid is the exact moment of the
+self-steepening term. The onset of steepening is estimated from the
+accumulated steepening phase
+    Phi(z) = int_0^z s*P/tau*max(0, 1-1/N**2) dz',   N**2 = gamma*P*tau**2/|beta2|
+reaching a critical value. The factor involving the local soliton order N
+is a heuristic for the balance of steepening by dispersion, which prevents
+the steepening of fundamental solitons. The equations are integrated by RK4 for arrays
+of parameter points at once, at a cost of microseconds per point. The
+critical value and correction factors for drift and width are calibrated
+against occasional full solves, see MomentSurrogate.calibrate.
+
+Refs:
+    [1] Nonlinear Fiber Optics
+        G.P. Agrawal
+        Academic Press (2013), Sect. 4.3
+"""
+import numpy as np
+from split_step_solver import SSFM_HONSE_symmetric
+from observables import temporalCentroid, rmsWidth, shockSlope
+from events import NonFinite
+
+# -- RMS WIDTH OF THE SECH PROFILE IN UNITS OF tau
+_SECH_RMS = np.pi/np.sqrt(12)
+
+
+def _rhs(y, beta2, gamma, s, E, Omega):
+    T, tau, C, Phi = y
+    P = E/(2*tau)
+    with np.errstate(divide="ignore"):
+        NSq = gamma*P*tau**2/np.abs(beta2)
+    return np.stack([
+        beta2*Omega + s*P,
+        beta2*C/tau,
+        (4/np.pi**2 + C**2)*beta2/tau**2 + 4*gamma*P/np.pi**2,
+        s*P/tau*np.maximum(0, 1-1/NSq),
+    ])
+
+
+def momentEquations(zMax, beta2, gamma, s, t0=1., P0=None, Omega0=0., nz=200, phiCrit=None):
+    """Integrate the moment equations of the sech ansatz
+
+    NOTES:
+        - all parameters may be arrays; they are broadcast against each other
+        - P0=None selects the peak power of the fundamental soliton
+
+    Args:
+        zMax (float): propagation distance
+        beta2 (float or array): 2nd order dispersion parameter
+        gamma (float or array): nonlinear parameter
+        s (float or array): self-steepening parameter
+        t0 (float or array): initial pulse duration (optional, default=1)
+        P0 (float or array): initial peak power (optional, default=None)
+        Omega0 (float or array): initial frequency offset
+                        (optional, default=0)
+        nz (int): number of RK4 steps (optional, default=200)
+        phiCrit (float): critical steepening phase; if given, the distance
+                        at which it is reached is returned under key
+                        "zShock" (inf if not reached) (optional, default=None)
+
+    Returns:
+        res (dict): centroid "T", width "tau", chirp "C", peak power "P" and
+            steepening phase "Phi" at zMax, as arrays of the broadcast shape
+    """
+    beta2, gamma, s, t0, Omega0 = (np.asarray(p, dtype=float)
+                                   for p in (beta2, gamma, s, t0, Omega0))
+    P0 = np.abs(beta2)/t0**2/gamma if P0 is None else np.asarray(P0, dtype=float)
+    beta2, gamma, s, t0, P0, Omega0 = np.broadcast_arrays(beta2, gamma, s, t0, P0, Omega0)
+    E = 2*P0*t0
+    y = np.stack([np.zeros_like(t0), t0, np.zeros_like(t0), np.zeros_like(t0)])
+    zShock = np.full(t0.shape, np.inf)
+    dz = zMax/nz
+    f = lambda y: _rhs(y, beta2, gamma, s, E, Omega0)
+    for k in range(nz):
+        k1 = f(y)
+        k2 = f(y + 0.5*dz*k1)
+        k3 = f(y + 0.5*dz*k2)
+        k4 = f(y + dz*k3)
+        yNew = y + dz/6*(k1 + 2*k2 + 2*k3 + k4)
+        if phiCrit is not None:
+            hit = (y[3] < phiCrit) & (yNew[3] >= phiCrit)
+            u = (phiCrit-y[3][hit])/(yNew[3][hit]-y[3][hit])
+            zShock[hit] = (k+u)*np.broadcast_to(dz, hit.shape)[hit]
+        y = yNew
+    T, tau, C, Phi = y
+    res = {"T": T, "tau": tau, "C": C, "P": E/(2*tau), "Phi": Phi}
+    if phiCrit is not None:
+        res["zShock"] = zShock
+    return res
+
+
+def _scale(x):
+    return np.maximum(np.abs(x), 1e-12)
+
+
+def fullRun(z, t, par, steepening=3., obsSkip=10):
+    """Quantities predicted by the surrogate, measured in a full solve
+
+    Args:
+        z (array): samples along propagation distance
+        t (array): time samples
+        par (dict): parameters beta2, gamma, s and, optionally, t0, P0
+        steepening (float): growth factor of the trailing edge slope that
+                        defines the steepening distance (optional, default=3)
+        obsSkip (int): evaluate observables only at each obsSkip-th step
+                        (optional, default=10)
+
+    Returns:
+        res (dict): centroid drift "T", RMS width "width" at z[-1] and
+            steepening distance "zShock" (inf if not reached). Drift and
+            width are NaN if the solve diverged.
+    """
+    t0 = par.get("t0", 1.)
+    P0 = par.get("P0", np.abs(par["beta2"])/t0**2/par["gamma"])
+    obs = {"T": temporalCentroid, "width": rmsWidth, "slope": shockSlope}
+    zz, O, info = SSFM_HONSE_symmetric(z, t, np.sqrt(P0)/np.cosh(t/t0), par["beta2"], 0, 0,
+                                       par["gamma"], par["s"], observables=obs,
+                                       obsSkip=obsSkip, events=[NonFinite()],
+                                       full_output=True)
+    steep = np.nonzero(O["slope"] > steepening*O["slope"][0])[0]
+    if info["zStop"] is not None:
+        return {"T": np.nan, "width": np.nan, "zShock": zz[steep[0]] if steep.size else np.inf}
+    return {"T": O["T"][-1]-O["T"][0], "width": O["width"][-1],
+            "zShock": zz[steep[0]] if steep.size else np.inf}
+
+
+class MomentSurrogate():
+    """Calibrated moment-method surrogate
+
+    Attrs:
+        factors (dict): correction factors of centroid drift "T" and RMS
+            width "width"
+        phiCrit (float): critical steepening phase
+        report (dict): relative RMS errors of the last calibration, before
+            and after correction, for each quantity
+    """
+
+    def __init__(self, nz=200, phiCrit=0.39):
+        """Initialize uncalibrated surrogate
+
+        Args:
+            nz (int): number of RK4 steps (optional, default=200)
+            phiCrit (float): initial critical steepening phase
+                        (optional, default=0.39)
+        """
+        self.nz = nz
+        self.phiCrit = phiCrit
+        self.factors = {"T": 1., "width": 1.}
+        self.report = None
+
+    def predict(self, zMax, beta2, gamma, s, t0=1., P0=None):
+        """Predict drift, width and steepening distance
+
+        Args:
+            zMax (float): propagation distance
+            beta2, gamma, s, t0, P0 (float or array): parameters, see
+                        momentEquations
+
+        Returns:
+            res (dict): centroid drift "T", RMS width "width", peak power
+                "P" at zMax and steepening distance "zShock"
+        """
+        m = momentEquations(zMax, beta2, gamma, s, t0, P0, nz=self.nz, phiCrit=self.phiCrit)
+        return {"T": self.factors["T"]*m["T"],
+                "width": self.factors["width"]*_SECH_RMS*m["tau"],
+                "P": m["P"], "zShock": m["zShock"]}
+
+    def calibrate(self, z, t, parList, steepening=3.):
+        """Calibrate against full solves
+
+        NOTES:
+            - drift and width factors are least squares fits of full to
+              surrogate results in relative error; the critical steepening
+              phase is the surrogate phase at one of the measured steepening
+              distances, chosen to minimize the relative error of all of them
+            - errors in the report are evaluated on the calibration points;
+              points whose full solve diverged are excluded, and steepening
+              distances are compared only where steepening was measured, with
+              predictions beyond z[-1] counted as z[-1]
+
+        Args:
+            z (array): samples along propagation distance of the full solves
+            t (array): time samples of the full solves
+            parList (list): parameter dictionaries with keys beta2, gamma, s
+                        and, optionally, t0, P0
+            steepening (float): growth factor of the trailing edge slope that
+                        defines the steepening distance (optional, default=3)
+
+        Returns:
+            report (dict): relative RMS errors before and after calibration
+        """
+        full = [fullRun(z, t, par, steepening) for par in parList]
+        args = {k: np.array([par.get(k, d) for par in parList], dtype=float)
+                for k, d in (("beta2", 0), ("gamma", 0), ("s", 0), ("t0", 1.))}
+        P0 = np.array([par.get("P0", np.abs(par["beta2"])/par.get("t0", 1.)**2/par["gamma"])
+                       for par in parList])
+        before = self.predict(z[-1], P0=P0, **args)
+        measured = {k: np.array([f[k] for f in full]) for k in ("T", "width", "zShock")}
+
+        # -- FACTORS MINIMIZE THE RELATIVE ERRORS REPORTED BELOW
+        ok = np.isfinite(measured["T"])
+        for k in ("T", "width"):
+            g = before[k][ok]/self.factors[k]/_scale(measured[k][ok])
+            self.factors[k] = np.sum(measured[k][ok]/_scale(measured[k][ok])*g)/np.sum(g*g)
+        hit = np.isfinite(measured["zShock"])
+        if np.any(hit):
+            zs = measured["zShock"][hit]
+            sub = [args[k][hit] for k in ("beta2", "gamma", "s", "t0")]
+            phi = momentEquations(zs, *sub, P0=P0[hit], nz=self.nz)["Phi"]
+            # -- PICK THE PHASE OF LEAST RELATIVE ERROR OF THE STEEPENING DISTANCES
+            errs = []
+            for phiCrit in phi:
+                zp = momentEquations(z[-1], *sub, P0=P0[hit], nz=self.nz,
+                                     phiCrit=phiCrit)["zShock"]
+                zp = np.minimum(zp, z[-1])
+                errs.append(np.mean(((zp-zs)/zs)**2))
+            self.phiCrit = float(phi[np.argmin(errs)])
+        after = self.predict(z[-1], P0=P0, **args)
+
+        def _err(pred, k):
+            if k == "zShock":
+                if not np.any(hit):
+                    return np.nan
+                zp = np.minimum(pred[k][hit], z[-1])
+                return np.sqrt(np.mean(((zp-zs)/zs)**2))
+            return np.sqrt(np.mean(((pred[k]-measured[k])[ok]/_scale(measured[k][ok]))**2))
+        self.report = {k: {"before": _err(before, k), "after": _err(after, k)}
+                       for k in ("T", "width", "zShock")}
+        return self.report
+
+
+# EOF: surrogate.py
@@ -0,0 +1,215 @@
+""" sweep.py
+
+module implementing parameter sweeps of SSFM_HONSE_symmetric on a process
+pool, with zero-copy hand-off of the field histories from the workers to
+the parent process
+
+Instead of pickling each worker's (z, Azt) back to the parent, the parent
+preallocates one block holding the histories of all runs, either in
+multiprocessing.shared_memory or as memory-mapped .npy file. Each worker
+attaches to the block and lets the solver write the recorded snapshots
+directly into its row, see the out argument of SSFM_HONSE_symmetric. Only
+the small array of z-samples is returned through the pool. Runs may record
+fewer snapshots than the block holds, e.g. if they are stopped by an event,
+so that only the leading rows of each history are valid. The block is
+released when the runner is closed, e.g. on leaving a with statement.
+
+Example:
+    >>> parList = [{"beta2": -1, "gamma": 1, "s": s} for s in (0.1, 0.2, 0.3)]
+    >>> with SweepRunner(z, t, nSkip, len(parList)) as sweep:
+    ...     sweep.run(A0, parList, maxWorkers=3)
+    ...     figure_1a(*sweep.history(2), ...)
+"""
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+from split_step_solver import SSFM_HONSE_symmetric
+
+
+def historyShape(z, t, nSkip):
+    """Shape of the field history recorded at each nSkip-th z-sample
+
+    NOTES:
+        - includes a row for a final field that is not due, as kept by
+          SSFM_HONSE_symmetric for recordTol or when stopped by an event
+
+    Args:
+        z (array): samples along propagation distance
+        t (array): time samples
+        nSkip (int): keep only each nSkip-th field configuration
+
+    Returns:
+        shape (tuple): maximal shape of Azt returned by SSFM_HONSE_symmetric
+    """
+    return (1+(z.size-2+nSkip)//nSkip, t.size)
+
+
+def _attach(spec):
+    """worker: attach to the block described by spec
+
+    Returns: (handle, arr)
+        handle (SharedMemory or None): shared memory handle, to be closed
+        arr (array): view of the block
+    """
+    backend, name, shape, dtype = spec
+    if backend == "memmap":
+        return None, np.load(name, mmap_mode="r+")
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _propagateInto(spec, k, z, t, A0_t, par, nSkip, kwargs):
+    """worker: propagate run k and write its history into row k of the block"""
+    shm, arr = _attach(spec)
+    try:
+        zz = SSFM_HONSE_symmetric(z, t, A0_t, par["beta2"], par.get("beta3", 0),
+                                  par.get("beta4", 0), par["gamma"], par.get("s", 0),
+                                  nSkip, out=arr[k], **kwargs)[0]
+        if shm is None:
+            arr.flush()
+    finally:
+        del arr
+        if shm is not None:
+            try:
+                shm.close()
+            except BufferError:
+                pass # -- VIEWS HELD BY A TRACEBACK; RELEASED WITH THE WORKER
+    return zz
+
+
+class SweepRunner():
+    """Parameter sweep with field histories in shared memory
+
+    Attrs:
+        z (list): z-samples at which fields are recorded, for each run
+        nRows (array): number of valid rows of the history of each run
+        histories (array): field histories of shape (nRuns, Nz, Nt), where
+            Nz is the maximal number of recorded z-samples, see historyShape
+    """
+
+    def __init__(self, z, t, nSkip, nRuns, backend="shm", fileName=None):
+        """Allocate the block holding the histories of all runs
+
+        Args:
+            z (array): samples along propagation distance
+            t (array): time samples
+            nSkip (int): keep only each nSkip-th field configuration
+            nRuns (int): number of runs
+            backend (str): "shm" for multiprocessing.shared_memory or
+                        "memmap" for a memory-mapped .npy file
+                        (optional, default="shm")
+            fileName (str): name of the .npy file for backend="memmap",
+                        which is then kept after closing the runner
+                        (optional, default: temporary file)
+        """
+        self._z, self._t, self.nSkip = z, t, nSkip
+        self.z = None
+        self.nRows = None
+        shape = (nRuns,)+historyShape(z, t, nSkip)
+        dtype = np.dtype(complex)
+        self._keep = fileName is not None
+        if backend == "shm":
+            self._shm = shared_memory.SharedMemory(
+                create=True, size=int(np.prod(shape))*dtype.itemsize)
+            self.histories = np.ndarray(shape, dtype=dtype, buffer=self._shm.buf)
+            self._spec = ("shm", self._shm.name, shape, dtype)
+        elif backend == "memmap":
+            self._shm = None
+            if fileName is None:
+                fd, fileName = tempfile.mkstemp(suffix=".npy")
+                os.close(fd)
+            self.fileName = str(fileName)
+            self.histories = np.lib.format.open_memmap(self.fileName, mode="w+",
+                                                       dtype=dtype, shape=shape)
+            self._spec = ("memmap", self.fileName, shape, dtype)
+        else:
+            raise ValueError("unknown backend '%s'" % backend)
+
+    def _check(self, kwargs):
+        """reject solver options whose output does not fit into the block"""
+        if kwargs.get("observables") is not None:
+            raise ValueError("observables are not supported by SweepRunner")
+        if kwargs.get("zOut") is not None:
+            z = self._z
+            nOut = np.sum(np.asarray(kwargs["zOut"]) <= z[-1]+1e-9*(z[1]-z[0]))
+            nOut += 1 if kwargs.get("events") else 0
+            if nOut > self.histories.shape[1]:
+                raise ValueError("zOut needs %d rows, histories hold %d"
+                                 % (nOut, self.histories.shape[1]))
+
+    def run(self, A0_t, parList, maxWorkers=None, **kwargs):
+        """Propagate all runs of the sweep
+
+        NOTES:
+            - observables are not supported, and zOut may hold at most as
+              many output distances as the histories hold rows
+
+        Args:
+            A0_t (array): time domain field envelope, or one per run
+            parList (list): fiber parameters of each run as dictionaries
+                        with keys beta2, gamma and, optionally, beta3, beta4, s
+            maxWorkers (int): number of worker processes
+                        (optional, default: number of cores)
+            **kwargs: further keyword arguments of SSFM_HONSE_symmetric
+
+        Returns:
+            histories (array): field histories of all runs
+        """
+        if len(parList) != self.histories.shape[0]:
+            raise ValueError("expected %d runs" % self.histories.shape[0])
+        self._check(kwargs)
+        A0_t = np.broadcast_to(A0_t, (len(parList), self._t.size))
+        if self._shm is None:
+            self.histories.flush()
+        with ProcessPoolExecutor(maxWorkers) as pool:
+            futures = [pool.submit(_propagateInto, self._spec, k, self._z, self._t,
+                                   A0_t[k], par, self.nSkip, kwargs)
+                       for k, par in enumerate(parList)]
+            self.z = [f.result() for f in futures]
+        self.nRows = np.array([zz.size for zz in self.z])
+        return self.histories
+
+    def history(self, k):
+        """Valid part of the history of run k
+
+        Returns: (z, Azt)
+            z (array): z-samples at which fields are recorded
+            Azt (array): view of the recorded field envelopes
+        """
+        return self.z[k], self.histories[k, :self.nRows[k]]
+
+    def close(self):
+        """Release the block
+
+        NOTES:
+            - views of histories must not be used after closing; copy
+              histories that are still needed
+            - the memory-mapped file is kept only if it was named
+        """
+        if self.histories is None:
+            return
+        histories, self.histories = self.histories, None
+        try:
+            if self._shm is None:
+                histories.flush()
+        finally:
+            del histories
+            if self._shm is not None:
+                self._shm.unlink()
+                try:
+                    self._shm.close()
+                except BufferError:
+                    pass # -- VIEWS STILL EXIST; MAPPING IS RELEASED WITH THEM
+            elif not self._keep:
+                os.remove(self.fileName)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# EOF: sweep.py
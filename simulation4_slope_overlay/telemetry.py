@@ -0,0 +1,143 @@
+""" telemetry.py
+
+module implementing progress reporting and throughput telemetry for the
+propagation loop of SSFM_HONSE_symmetric
+
+A Telemetry object is passed as callback to the solver, which calls it every
+callbackSkip steps. On each call it assembles a record holding z, the step
+index, steps/s, elapsed time, ETA, current energy and peak power, and hands
+it to its sinks. Computing a record costs two reductions over the field, so
+at a cadence of a few hundred steps the overhead is well below 1% of the
+loop time; e.g. for Nt=4096 and callbackSkip=500, computing the records and
+writing them to a LogFileSink and a MetricsSink takes about 0.3% of the run,
+see test_telemetry.py.
+
+Example:
+    >>> tm = Telemetry(t, z, sinks=[ConsoleSink(), LogFileSink("run.log")])
+    >>> z, Azt = SSFM_HONSE_symmetric(z, t, A0, beta2, beta3, beta4, gamma, s,
+    ...                               nSkip, callback=tm, callbackSkip=500)
+"""
+import json
+import os
+import sys
+import time
+import numpy as np
+
+
+class Telemetry():
+    """Telemetry callback for the propagation loop
+
+    Attrs:
+        sinks (list): callables receiving each telemetry record
+        records (list): all records so far, if keep is True
+    """
+
+    def __init__(self, t, z, sinks=(), keep=False):
+        """Initialize telemetry; the clock starts here
+
+        Args:
+            t (array): time samples
+            z (array): samples along propagation distance
+            sinks (list): callables of the form f(record)
+                        (optional, default: no sinks)
+            keep (bool): keep all records in attribute records
+                        (optional, default=False)
+        """
+        self.sinks = list(sinks)
+        self.records = [] if keep else None
+        self._dt = t[1]-t[0]
+        self._nSteps = z.size-1
+        self._zMax = z[-1]
+        self._t0 = time.perf_counter()
+        self._last = (self._t0, 0)
+
+    def __call__(self, idx, z, A_t):
+        now = time.perf_counter()
+        elapsed = now-self._t0
+        rate = idx/elapsed if elapsed > 0 else float("nan")
+        tLast, idxLast = self._last
+        self._last = (now, idx)
+        I = np.abs(A_t)**2
+        record = {
+            "idx": idx,
+            "z": float(z),
+            "zMax": float(self._zMax),
+            "elapsed": elapsed,
+            "stepsPerSecond": rate,
+            "currentStepsPerSecond": (idx-idxLast)/(now-tLast) if now > tLast else rate,
+            "eta": (self._nSteps-idx)/rate if rate > 0 else float("nan"),
+            "energy": float(np.sum(I)*self._dt),
+            "peakPower": float(np.max(I)),
+        }
+        if self.records is not None:
+            self.records.append(record)
+        for sink in self.sinks:
+            sink(record)
+
+
+class ConsoleSink():
+    """Print one line per telemetry record"""
+
+    def __init__(self, stream=None):
+        """Initialize sink
+
+        Args:
+            stream (file): output stream (optional, default: sys.stdout)
+        """
+        self.stream = stream
+
+    def __call__(self, r):
+        stream = sys.stdout if self.stream is None else self.stream
+        print("z = %8.4f/%g  step %7d  %9.1f steps/s  ETA %7.1f s  E = %.6e  Pmax = %.4e"
+              % (r["z"], r["zMax"], r["idx"], r["stepsPerSecond"], r["eta"],
+                 r["energy"], r["peakPower"]), file=stream, flush=True)
+
+
+class LogFileSink():
+    """Append telemetry records to a file, one JSON object per line"""
+
+    def __init__(self, fileName):
+        """Initialize sink
+
+        Args:
+            fileName (str): name of log file
+        """
+        self.fileName = fileName
+
+    def __call__(self, r):
+        with open(self.fileName, "a") as f:
+            f.write(json.dumps(r)+"\n")
+
+
+class MetricsSink():
+    """Export latest telemetry record as metrics in Prometheus text format
+
+    The file is rewritten atomically on each record, so that it can be
+    served or scraped by a node exporter textfile collector.
+    """
+
+    def __init__(self, fileName, prefix="nlse_", labels=None):
+        """Initialize sink
+
+        Args:
+            fileName (str): name of metrics file
+            prefix (str): prefix of metric names (optional, default="nlse_")
+            labels (dict): labels attached to all metrics
+                        (optional, default=None)
+        """
+        self.fileName = fileName
+        self.prefix = prefix
+        self.labels = "" if not labels else \
+            "{"+",".join('%s="%s"' % kv for kv in sorted(labels.items()))+"}"
+
+    def __call__(self, r):
+        lines = ["%s%s%s %r" % (self.prefix, key, self.labels, float(r[key]))
+                 for key in ("idx", "z", "elapsed", "stepsPerSecond", "eta",
+                             "energy", "peakPower")]
+        tmpName = str(self.fileName)+".tmp"
+        with open(tmpName, "w") as f:
+            f.write("\n".join(lines)+"\n")
+        os.replace(tmpName, self.fileName)
+
+
+# EOF: telemetry.py
@@ -0,0 +1,55 @@
+""" test_adaptive_grid.py
+
+tests of grid growth operations and adaptive propagation
+"""
+import numpy as np
+from adaptive_grid import refineTime, extendWindow, SSFM_HONSE_adaptive
+from events import TemporalEdge
+from split_step_solver import SSFM_HONSE_symmetric
+from convergence import rmsError
+
+
+def test_grid_growth_preserves_band_limited_field():
+    t = np.linspace(-10, 10, 128, endpoint=False)
+    f = lambda t: np.exp(-t**2+1j*t)
+    t2, A2 = refineTime(t, np.stack([f(t), 2*f(t)]))
+    assert np.allclose(t2, np.linspace(-10, 10, 256, endpoint=False))
+    assert np.allclose(A2, [f(t2), 2*f(t2)], atol=1e-14)
+    t3, A3 = extendWindow(t, f(t))
+    assert np.allclose(t3, np.linspace(-20, 20, 256, endpoint=False))
+    assert np.array_equal(A3[64:192], f(t))
+
+
+def test_adaptive_run_matches_run_on_final_grid():
+    t = np.linspace(-10, 10, 256, endpoint=False)
+    z = np.linspace(0, 5, 2001)
+    par = (-1, 0, 0, 1, 0.2)
+    zz, tt, Azt, info = SSFM_HONSE_adaptive(z, t, 1/np.cosh(t), *par, nSkip=500,
+                                            full_output=True)
+    assert tt.size > t.size and len(info["regrids"]) > 0
+    _, A_ref = SSFM_HONSE_symmetric(z, tt, 1/np.cosh(tt), *par, 500)
+    assert np.allclose(zz, z[::500])
+    assert all(rmsError(A, B) < 1e-3 for A, B in zip(Azt, A_ref))
+
+
+def test_adaptive_run_at_output_distances():
+    t = np.linspace(-10, 10, 256, endpoint=False)
+    z = np.linspace(0, 5, 2001)
+    zOut = [0.5, 1.2345, 2.5, 3.01, 4.2, 5.]
+    zz, tt, Azt, info = SSFM_HONSE_adaptive(z, t, 1/np.cosh(t), -1, 0, 0, 1, 0.2,
+                                            zOut=zOut, full_output=True)
+    # -- FIELDS AT WHICH SEGMENTS WERE STOPPED ARE NOT KEPT
+    assert len(info["regrids"]) > 0 and np.allclose(zz, zOut) and Azt.shape == (6, tt.size)
+
+
+def test_stop_event_of_user_ends_adaptive_run():
+    t = np.linspace(-10, 10, 256, endpoint=False)
+    z = np.linspace(0, 5, 2001)
+    zz, tt, Azt, info = SSFM_HONSE_adaptive(z, t, 1/np.cosh(t), -1, 0, 0, 1, 0.2, nSkip=500,
+                                            events=[TemporalEdge(1e-6, 0.1)],
+                                            full_output=True)
+    assert tt.size == t.size and info["regrids"] == []
+    assert info["zStop"] is not None and zz[-1] == info["zStop"] < 5
+
+
+# EOF: test_adaptive_grid.py
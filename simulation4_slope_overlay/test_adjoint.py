@@ -0,0 +1,61 @@
+""" test_adjoint.py
+
+tests of adjoint gradients against the forward solver and finite differences
+"""
+import numpy as np
+import pytest
+from adjoint import adjointGradient, spectralMismatch, fieldMismatch, FT, PARAMETERS
+from split_step_solver import SSFM_HONSE_symmetric
+
+PAR = {"beta2": -1., "beta3": 0.05, "beta4": 0.01, "gamma": 1., "s": 0.1}
+
+
+@pytest.fixture
+def setup():
+    t = np.linspace(-20, 20, 256, endpoint=False)
+    z = np.linspace(0, 1, 51)
+    A0 = np.exp(0.1j*t)/np.cosh(t)
+    _, B = SSFM_HONSE_symmetric(z, t, 1.1/np.cosh(t), -0.9, 0, 0, 1.2, 0.05, z.size-1)
+    return z, t, A0, B[-1]
+
+
+def test_loss_matches_forward_solver(setup):
+    z, t, A0, B = setup
+    loss = fieldMismatch(t, B)
+    _, A = SSFM_HONSE_symmetric(z, t, A0, *PAR.values(), z.size-1)
+    L, _ = adjointGradient(z, t, A0, *PAR.values(), loss)
+    assert L == loss(A[-1])[0]
+
+
+@pytest.mark.parametrize("kind", ["field", "spectrum"])
+def test_gradient_matches_finite_differences(setup, kind):
+    z, t, A0, B = setup
+    loss = fieldMismatch(t, B) if kind == "field" else spectralMismatch(np.abs(FT(B))**2)
+    _, grad = adjointGradient(z, t, A0, *PAR.values(), loss, nCheckpoints=7)
+    h = 1e-6
+    for name in PARAMETERS:
+        Lp = adjointGradient(z, t, A0, *dict(PAR, **{name: PAR[name]+h}).values(), loss)[0]
+        Lm = adjointGradient(z, t, A0, *dict(PAR, **{name: PAR[name]-h}).values(), loss)[0]
+        assert (Lp-Lm)/2/h == pytest.approx(grad[name], rel=1e-5)
+
+    d = np.array([1, 1j]) @ np.random.default_rng(0).standard_normal((2, t.size))
+    Lp = adjointGradient(z, t, A0+h*d, *PAR.values(), loss)[0]
+    Lm = adjointGradient(z, t, A0-h*d, *PAR.values(), loss)[0]
+    assert (Lp-Lm)/2/h == pytest.approx(np.real(np.vdot(grad["A0"], d)), rel=1e-5)
+
+
+@pytest.mark.parametrize("option", [{"fR": 0.18}, {"dispersion": (np.zeros(3), np.zeros(3))},
+                                    {"absorber": 0.1}, {"spectralFilter": np.ones(256)},
+                                    {"scheme": "yoshida4"}, {"gamma": lambda z: 1.}])
+def test_unsupported_model_raises(setup, option):
+    z, t, A0, B = setup
+    par = dict(PAR, **{k: v for k, v in option.items() if k in PAR})
+    options = {k: v for k, v in option.items() if k not in PAR}
+    with pytest.raises(ValueError):
+        adjointGradient(z, t, A0, *par.values(), fieldMismatch(t, B), **options)
+    # -- OPTIONS AT THEIR DEFAULTS OR WITHOUT EFFECT ON THE FIELD ARE ACCEPTED
+    adjointGradient(z, t, A0, *PAR.values(), fieldMismatch(t, B), fR=0, absorber=None,
+                    scheme="strang", nSkip=10, workers=None)
+
+
+# EOF: test_adjoint.py
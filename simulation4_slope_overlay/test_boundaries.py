@@ -0,0 +1,39 @@
+""" test_boundaries.py
+
+tests of absorbing boundaries and spectral filters, and of the energy they
+remove from the field
+"""
+import numpy as np
+import pytest
+from boundaries import absorbingBoundary, superGaussianFilter
+from split_step_solver import SSFM_HONSE_symmetric
+from events import GradientThreshold
+
+
+def _energy(t, A):
+    return np.sum(np.abs(A)**2)*(t[1]-t[0])
+
+
+@pytest.mark.parametrize("kwargs", [
+    {},
+    {"zOut": [0.135, 0.505, 0.775, 1.]},
+    {"events": [GradientThreshold(0., action="refine")]},
+])
+def test_energy_balance(kwargs):
+    # -- LINEAR PROPAGATION CONSERVES ENERGY, SO ALL LOSS IS ABSORPTION
+    t = np.linspace(-10, 10, 256, endpoint=False)
+    z = np.linspace(0, 1, 101)
+    A0 = np.exp(-t**2)
+    par = dict(absorber=absorbingBoundary(t, 3.), spectralFilter=superGaussianFilter(t, 3.))
+    _, A, info = SSFM_HONSE_symmetric(z, t, A0, -1, 0, 0, 0, 0, 100, full_output=True,
+                                      **par, **kwargs)
+    E_in, E_out = _energy(t, A0), _energy(t, A[-1])
+    assert info["absorbedEnergy"] > 0.01*E_in
+    assert E_in == pytest.approx(E_out + info["absorbedEnergy"], rel=1e-12)
+    if "zOut" in kwargs:
+        _, _, ref = SSFM_HONSE_symmetric(z, t, A0, -1, 0, 0, 0, 0, 100, full_output=True,
+                                         **par)
+        assert info["absorbedEnergy"] == ref["absorbedEnergy"]
+
+
+# EOF: test_boundaries.py
@@ -0,0 +1,88 @@
+""" test_continuation.py
+
+tests of continued propagation runs against single long runs
+"""
+import numpy as np
+import pytest
+from split_step_solver import SSFM_HONSE_symmetric
+from continuation import continuePropagation, saveRun, appendRun, loadRun, extendedGrid
+from fiber import linearTaper
+
+ARGS = (-1, 0.05, 0, 1, 0.2)
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"nSkip": 7},
+    {"nSkip": 7, "frameVelocity": "auto"},
+    {"nSkip": 3, "recordTol": 0.02},
+])
+def test_continuation_is_bit_identical(t, kwargs):
+    A0 = 1/np.cosh(t)
+    zL, AL, _ = SSFM_HONSE_symmetric(np.linspace(0, 4, 801), t, A0, *ARGS,
+                                     full_output=True, **kwargs)
+    res = SSFM_HONSE_symmetric(np.linspace(0, 2, 401), t, A0, *ARGS,
+                               full_output=True, **kwargs)
+    z, Azt, info = continuePropagation(*res, t, 4., *ARGS, **kwargs)
+    assert np.array_equal(z, zL) and np.array_equal(Azt, AL)
+    assert info["state"]["z"] == pytest.approx(4.)
+
+
+@pytest.mark.parametrize("spectralFilter", [None, 0.])
+def test_continuation_of_taper_is_bit_identical(t, spectralFilter, tmp_path):
+    # -- THE LINEAR PROPAGATOR OF THE FIRST RUN IS STILL VALID WHEN IT ENDS
+    A0 = 1/np.cosh(t)
+    args = (linearTaper(0, 4, -1, -0.5), 0.05, 0, 1, 0.2)
+    kwargs = {"nSkip": 20, "taperTol": 0.02, "spectralFilter": spectralFilter}
+    z = np.linspace(0, 4, 801)
+    zL, AL, infoL = SSFM_HONSE_symmetric(z, t, A0, *args, full_output=True, **kwargs)
+    fileName = tmp_path/"run.npz"
+    saveRun(fileName, *SSFM_HONSE_symmetric(z[:411], t, A0, *args,
+                                            full_output=True, **kwargs))
+    z, Azt, info = appendRun(fileName, t, 4., *args, **kwargs)
+    assert np.array_equal(z, zL) and np.array_equal(Azt, AL)
+    assert info["propagatorUpdates"] == infoL["propagatorUpdates"]
+
+
+def test_append_to_result_file(t, tmp_path):
+    A0 = 1/np.cosh(t)
+    fileName = tmp_path/"run.npz"
+    saveRun(fileName, *SSFM_HONSE_symmetric(np.linspace(0, 1, 201), t, A0, *ARGS, 10,
+                                            full_output=True))
+    appendRun(fileName, t, 2., *ARGS, 10)
+    z, Azt, info = loadRun(fileName)
+    zL, AL = SSFM_HONSE_symmetric(np.linspace(0, 2, 401), t, A0, *ARGS, 10)
+    assert np.array_equal(z, zL) and np.array_equal(Azt, AL)
+    assert info["state"]["idx"] == 400
+
+
+def test_extended_grid_ends_at_zMax():
+    z = np.linspace(1, 2, 201)
+    state = {"z0": z[0], "dz": z[1]-z[0]}
+    zExt = extendedGrid(state, 3.)
+    assert zExt[-1] == 3. and zExt.size == 401 and np.allclose(zExt[:201], z, rtol=0, atol=1e-12)
+    assert extendedGrid(state, 2.9991)[-1] == pytest.approx(2.9991, abs=0.5*state["dz"])
+
+
+def test_append_writes_part_files(t, tmp_path):
+    A0 = 1/np.cosh(t)
+    kwargs = {"nSkip": 3, "recordTol": 0.02, "frameVelocity": "auto"}
+    zL, AL, infoL = SSFM_HONSE_symmetric(np.linspace(0, 3, 601), t, A0, *ARGS,
+                                         full_output=True, **kwargs)
+    fileName = tmp_path/"run.npz"
+    saveRun(fileName, *SSFM_HONSE_symmetric(np.linspace(0, 1, 201), t, A0, *ARGS,
+                                            full_output=True, **kwargs))
+    data = fileName.read_bytes()
+    appendRun(fileName, t, 2., *ARGS, **kwargs)
+    z, Azt, info = appendRun(fileName, t, 3., *ARGS, **kwargs)
+    # -- THE ORIGINAL FILE IS LEFT AS IT IS
+    assert fileName.read_bytes() == data
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["run.npz", "run.part1.npz",
+                                                           "run.part2.npz"]
+    assert np.array_equal(z, zL) and np.array_equal(Azt, AL)
+    assert np.array_equal(info["frameOffset"], infoL["frameOffset"])
+    # -- SAVING A NEW RUN UNDER THE SAME NAME REMOVES THE PARTS
+    saveRun(fileName, zL, AL, infoL)
+    assert [p.name for p in tmp_path.iterdir()] == ["run.npz"]
+
+
+# EOF: test_continuation.py
@@ -0,0 +1,57 @@
+""" test_convergence.py
+
+tests of the convergence-study harness
+"""
+import functools
+import multiprocessing
+import numpy as np
+import pytest
+import convergence
+from convergence import convergenceStudy, registerScheme, solitonReference
+from convergence import rmsError, observedOrder, costRanking, figure1bInput
+
+PAR = {"beta2": -1, "gamma": 1}
+
+
+def _exact(z, t, A0_t, par):
+    """scheme with error dz**2 relative to the soliton reference"""
+    dz = z[1]-z[0]
+    return solitonReference(t, z[-1], par)*(1+dz**2)
+
+
+def test_rms_error_and_observed_order(t):
+    A = 1/np.cosh(t)
+    assert rmsError(A, A) == 0
+    assert rmsError(1.1*A, A) == pytest.approx(0.1)
+    dz = np.array([0.1, 0.05, 0.025])
+    assert observedOrder(dz, 3*dz**4) == pytest.approx(4)
+
+
+def test_cost_ranking_interpolates_log_log():
+    res = {"a": {"dz": np.array([0.1, 0.01]), "error": np.array([1e-2, 1e-4]),
+                 "time": np.array([1., 100.])},
+           "b": {"dz": np.array([0.1, 0.01]), "error": np.array([1e-1, 1e-2]),
+                 "time": np.array([0.1, 1.])}}
+    ranking = costRanking(res, 1e-3)
+    assert len(ranking) == 1
+    T, scheme, dz = ranking[0]
+    assert scheme == "a" and T == pytest.approx(10.) and dz == pytest.approx(np.sqrt(1e-3))
+
+
+@pytest.mark.parametrize("context", [None, "spawn"])
+def test_registered_scheme_runs_in_workers(t, monkeypatch, context):
+    monkeypatch.setitem(convergence.SCHEMES, "exact", _exact)
+    registerScheme("exact", _exact)
+    if context is not None:
+        monkeypatch.setattr(convergence, "ProcessPoolExecutor", functools.partial(
+            convergence.ProcessPoolExecutor, mp_context=multiprocessing.get_context(context)))
+    dzList = [0.1, 0.05]
+    res = convergenceStudy(t, 1/np.cosh(t), 1., PAR, dzList, schemes=("exact", "symmetric"),
+                           reference=solitonReference, maxWorkers=2)
+    assert np.allclose(res["exact"]["error"], np.asarray(dzList)**2)
+    assert res["exact"]["order"] == pytest.approx(2)
+    assert np.all(res["symmetric"]["time"] > 0)
+    assert [r[0] for r in figure1bInput(res, ("exact", "symmetric"))] == dzList
+
+
+# EOF: test_convergence.py
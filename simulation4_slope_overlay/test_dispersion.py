@@ -0,0 +1,78 @@
+""" test_dispersion.py
+
+tests of tabulated dispersion and loss operators
+"""
+import weakref
+import numpy as np
+import numpy.fft as nfft
+import pytest
+import split_step_solver
+from split_step_solver import SSFM_HONSE_symmetric
+from dispersion import loadFiberTable, fiberTable, linearOperator, halfStepPropagator
+from convergence import rmsError
+
+
+def _taylorTable(beta2, beta3, alpha=0.):
+    # -- INCLUDES CONSTANT AND GROUP VELOCITY TERMS, WHICH ARE REMOVED
+    w = np.linspace(-100, 100, 20001)
+    return w, 3. + 0.5*w + beta2/2*w**2 + beta3/6*w**3, alpha*np.ones_like(w)
+
+
+@pytest.mark.parametrize("ext", [".csv", ".npy", ".npz"])
+def test_loadFiberTable(tmp_path, ext):
+    w, beta, alpha = _taylorTable(-1., 0.1, 0.2)
+    fileName = tmp_path/("fiber"+ext)
+    if ext == ".csv":
+        np.savetxt(fileName, np.column_stack((w, beta, alpha)), delimiter=",",
+                   header="w, beta, alpha")
+    elif ext == ".npy":
+        np.save(fileName, np.column_stack((w, beta, alpha)))
+    else:
+        np.savez(fileName, w=w, beta=beta, alpha=alpha)
+    table = loadFiberTable(fileName)
+    assert np.allclose(table.beta, beta) and np.allclose(table.alpha, alpha)
+
+
+def test_tabulated_taylor_dispersion(t):
+    table = fiberTable(*_taylorTable(-1., 0.1))
+    w = nfft.fftfreq(t.size,d=t[1]-t[0])*2*np.pi
+    assert np.allclose(linearOperator(t, table), -0.5*w**2 + 0.1/6*w**3, atol=1e-3)
+    assert halfStepPropagator(t, table, 1e-3) is halfStepPropagator(t, table, 1e-3)
+
+    z = np.linspace(0, 1, 1001)
+    A0 = 1/np.cosh(t)
+    _, A_ref = SSFM_HONSE_symmetric(z, t, A0, -1., 0.1, 0, 1, 0.1, z.size-1)
+    _, A = SSFM_HONSE_symmetric(z, t, A0, 0, 0, 0, 1, 0.1, z.size-1, dispersion=table)
+    assert rmsError(A[-1], A_ref[-1]) < 1e-4
+
+
+def test_tabulated_loss(t):
+    table = fiberTable(*_taylorTable(-1., 0., alpha=0.2))
+    z = np.linspace(0, 1, 101)
+    A0 = 1/np.cosh(t)
+    _, A = SSFM_HONSE_symmetric(z, t, A0, 0, 0, 0, 0, 0, z.size-1, dispersion=table)
+    E = np.sum(np.abs(A)**2, axis=-1)
+    assert E[-1]/E[0] == pytest.approx(np.exp(-0.2), rel=1e-10)
+
+
+@pytest.mark.parametrize("scheme", ["strang", "yoshida4"])
+def test_side_steps_are_not_cached(t, scheme, monkeypatch):
+    # -- COUNT THE PROPAGATORS ALIVE, I.E. HELD BY THE CACHE OF THE SOLVER
+    alive = []
+
+    def _halfStepPropagator(t, table, dz):
+        P_w = np.array(halfStepPropagator(t, table, dz))
+        alive.append(weakref.ref(P_w))
+        return P_w
+
+    monkeypatch.setattr(split_step_solver, "halfStepPropagator", _halfStepPropagator)
+    table = fiberTable(*_taylorTable(-1., 0.))
+    z = np.linspace(0, 1, 101)
+    counts = []
+    SSFM_HONSE_symmetric(z, t, 1/np.cosh(t), 0, 0, 0, 1, 0.1, 100, dispersion=table, scheme=scheme,
+                         zOut=np.linspace(0.0013, 0.9813, 30), callbackSkip=1,
+                         callback=lambda idx, z, A_t: counts.append(sum(r() is not None for r in alive)))
+    assert len(alive) > 30 and max(counts) == (1 if scheme == "strang" else 2)
+
+
+# EOF: test_dispersion.py
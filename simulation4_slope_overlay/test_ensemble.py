@@ -0,0 +1,72 @@
+""" test_ensemble.py
+
+tests of noise-ensemble propagation and its streaming statistics
+"""
+import numpy as np
+import numpy.fft as nfft
+from ensemble import SSFM_HONSE_ensemble, SpectralStatistics
+
+# -- FUNDAMENTAL SOLITON, NORMALIZED UNITS
+ARGS = (-1, 0, 0, 1, 0.)
+
+
+def test_statistics_match_direct_evaluation():
+    rng = np.random.default_rng(1)
+    A_w = rng.standard_normal((7, 16)) + 1j*rng.standard_normal((7, 16))
+    stats = SpectralStatistics(16)
+    stats.add(A_w[:3])
+    other = SpectralStatistics(16)
+    other.add(A_w[3:])
+    stats.merge(other)
+    I_w = np.abs(A_w)**2
+    cross = [np.conj(A_w[i])*A_w[j] for i in range(7) for j in range(7) if i != j]
+    assert np.allclose(stats.meanSpectrum, I_w.mean(axis=0))
+    assert np.allclose(stats.variance, I_w.var(axis=0))
+    assert np.allclose(stats.coherence, np.abs(np.mean(cross, axis=0))/I_w.mean(axis=0))
+
+
+def test_variance_of_weak_fluctuations():
+    # -- <|A|^4> - <|A|^2>^2 CANCELS COMPLETELY FOR THESE SPECTRA
+    rng = np.random.default_rng(2)
+    A_w = 1e4*(1 + 1e-6*rng.standard_normal((64, 8)))
+    stats = SpectralStatistics(8)
+    for k in range(0, 64, 5):
+        other = SpectralStatistics(8)
+        other.add(A_w[k:k+5])
+        stats.merge(other)
+    assert np.allclose(stats.variance, np.abs(A_w**2).var(axis=0), rtol=1e-6)
+
+
+def test_ensemble_reproducible_across_batches(t):
+    z = np.linspace(0, 1, 101)
+    A0 = 1/np.cosh(t)
+    _, s1 = SSFM_HONSE_ensemble(z, t, A0, *ARGS, nMembers=6, seed=3, batchSize=6)
+    zz, s2 = SSFM_HONSE_ensemble(z, t, A0, *ARGS, nMembers=6, seed=3, batchSize=4)
+    assert s2.n == 6 and s2.meanSpectrum.shape == (2, t.size)
+    assert np.allclose(zz, [0, 1])
+    assert np.allclose(s1.meanSpectrum, s2.meanSpectrum, rtol=1e-12, atol=0)
+
+
+def test_ensemble_workers_and_output_distances(t):
+    z = np.linspace(0, 1, 101)
+    A0 = 1/np.cosh(t)
+    zOut = [0., 0.255, 1.]
+    _, s1 = SSFM_HONSE_ensemble(z, t, A0, *ARGS, nMembers=10, batchSize=2, zOut=zOut)
+    zz, s2 = SSFM_HONSE_ensemble(z, t, A0, *ARGS, nMembers=10, batchSize=2, zOut=zOut,
+                                 maxWorkers=2)
+    assert np.allclose(zz, zOut) and s2.n == 10
+    assert np.allclose(s1.meanSpectrum, s2.meanSpectrum, rtol=1e-12, atol=0)
+    assert np.allclose(s1.variance, s2.variance, rtol=1e-9, atol=0)
+
+
+def test_ensemble_coherence_of_weak_noise(t):
+    z = np.linspace(0, 1, 101)
+    A0 = 1/np.cosh(t)
+    _, stats = SSFM_HONSE_ensemble(z, t, A0, *ARGS, nMembers=8, noiseAmplitude=1e-8)
+    w = nfft.fftfreq(t.size, d=t[1]-t[0])*2*np.pi
+    assert np.all(stats.coherence[-1][np.abs(w) < 2] > 0.999)
+    _, noisy = SSFM_HONSE_ensemble(z, t, A0, *ARGS, nMembers=8, noiseAmplitude=1e-3)
+    assert np.mean(noisy.coherence[-1][np.abs(w) > 10]) < 0.5
+
+
+# EOF: test_ensemble.py
@@ -0,0 +1,34 @@
+""" test_events.py
+
+tests of the event detectors
+"""
+import pickle
+import numpy as np
+import pytest
+from events import NonFinite, GradientThreshold, SpectralEdge, TemporalEdge, EnergyDrift
+
+
+def test_detectors(t):
+    A = 1/np.cosh(t)
+    assert not NonFinite()(t, A) and NonFinite()(t, np.where(t > 0, np.nan, A))
+    assert not GradientThreshold(1.)(t, A) and GradientThreshold(0.5)(t, A)
+    assert not SpectralEdge()(t, A) and SpectralEdge()(t, np.cos(0.95*np.pi/(t[1]-t[0])*t))
+    assert not TemporalEdge()(t, A) and TemporalEdge()(t, np.roll(A, t.size//2))
+    assert not EnergyDrift(A)(t, A) and EnergyDrift(A)(t, 1.01*A)
+
+
+def test_detectors_can_be_pickled(t):
+    A = 1/np.cosh(t)
+    for ev in (NonFinite("record"), GradientThreshold(0.5, "refine"), SpectralEdge(),
+               TemporalEdge(), EnergyDrift(A)):
+        ev2 = pickle.loads(pickle.dumps(ev))
+        assert (ev2.name, ev2.action) == (ev.name, ev.action)
+        assert ev2(t, A) == ev(t, A)
+
+
+def test_unknown_action():
+    with pytest.raises(ValueError):
+        NonFinite("abort")
+
+
+# EOF: test_events.py
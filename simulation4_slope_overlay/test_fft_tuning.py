@@ -0,0 +1,31 @@
+""" test_fft_tuning.py
+
+tests of the FFT autotuner and its cache
+"""
+import numpy as np
+from fft_tuning import candidateSizes, tune, lookup
+from split_step_solver import SSFM_HONSE_symmetric
+
+
+def test_candidate_sizes_are_5_smooth():
+    sizes = candidateSizes(1000, 0.2)
+    assert sizes == [1000, 1024, 1080, 1125, 1152, 1200]
+
+
+def test_tuned_configuration_is_cached_and_used(tmp_path, monkeypatch):
+    monkeypatch.setenv("NLSE_FFT_CACHE", str(tmp_path/"fft.json"))
+    assert lookup(256) is None
+    best = tune(250, spread=0.1, threads=[None, 2], repeats=2)
+    assert best["n"] in candidateSizes(250, 0.1)
+    assert lookup(best["n"]) == best
+    assert tune(250, spread=0.1) == best # -- FROM CACHE
+
+    t = np.linspace(-20, 20, best["n"], endpoint=False)
+    z = np.linspace(0, 1, 101)
+    A0 = 1/np.cosh(t)
+    _, A_ref = SSFM_HONSE_symmetric(z, t, A0, -1, 0, 0, 1, 0.2, 100)
+    _, A = SSFM_HONSE_symmetric(z, t, A0, -1, 0, 0, 1, 0.2, 100, fft="auto")
+    assert np.allclose(A, A_ref, rtol=0, atol=1e-12)
+
+
+# EOF: test_fft_tuning.py
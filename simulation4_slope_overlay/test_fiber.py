@@ -0,0 +1,43 @@
+""" test_fiber.py
+
+tests of z-dependent fiber parameters
+"""
+import numpy as np
+from split_step_solver import SSFM_HONSE_symmetric
+from fiber import concatenate, linearTaper
+from convergence import rmsError
+
+
+def test_concatenated_segments_match_consecutive_runs():
+    t = np.linspace(-20, 20, 256, endpoint=False)
+    A0 = 1/np.cosh(t)
+    seg1 = {"length": 1., "beta2": -1., "gamma": 1., "s": 0.2}
+    seg2 = {"length": 1., "beta2": -0.5, "beta3": 0.05, "gamma": 2., "s": 0.1}
+
+    z = np.linspace(0, 2, 401)
+    _, A, info = SSFM_HONSE_symmetric(z, t, A0, nSkip=z.size-1, full_output=True,
+                                      **concatenate([seg1, seg2]))
+
+    z1 = np.linspace(0, 1, 201)
+    _, A1 = SSFM_HONSE_symmetric(z1, t, A0, -1., 0, 0, 1., 0.2, z1.size-1)
+    _, A2 = SSFM_HONSE_symmetric(z1, t, A1[-1], -0.5, 0.05, 0, 2., 0.1, z1.size-1)
+
+    assert rmsError(A[-1], A2[-1]) < 1e-12
+    assert info["propagatorUpdates"] == 1
+
+
+def test_taper_tolerance_limits_propagator_updates():
+    t = np.linspace(-20, 20, 256, endpoint=False)
+    A0 = 1/np.cosh(t)
+    z = np.linspace(0, 1, 1001)
+    beta2 = linearTaper(0., 1., -1., -0.5)
+    _, A_ref, info_ref = SSFM_HONSE_symmetric(z, t, A0, beta2, 0, 0, 1., 0.1,
+                                              z.size-1, full_output=True)
+    _, A, info = SSFM_HONSE_symmetric(z, t, A0, beta2, 0, 0, 1., 0.1,
+                                      z.size-1, taperTol=1e-2, full_output=True)
+    assert info_ref["propagatorUpdates"] == z.size-2
+    assert info["propagatorUpdates"] < 100
+    assert rmsError(A[-1], A_ref[-1]) < 1e-2
+
+
+# EOF: test_fiber.py
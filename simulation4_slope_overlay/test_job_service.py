@@ -0,0 +1,103 @@
+""" test_job_service.py
+
+tests of the local job service and its HTTP endpoint
+"""
+import asyncio
+import io
+import json
+import numpy as np
+import pytest
+from job_service import JobManager, serve, _propagate, _runFromSpec
+
+SPEC = {"tMax": 20, "Nt": 256, "zMax": 1, "Nz": 101, "beta2": -1, "gamma": 1,
+        "s": 0.2, "nSkip": 50}
+
+
+@pytest.fixture
+def jobs():
+    jobs = JobManager(maxWorkers=1, keepDone=2)
+    yield jobs
+    jobs.shutdown()
+
+
+async def _request(port, method, path, body=None):
+    """send HTTP request, return status code and body"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = b"" if body is None else json.dumps(body).encode()
+    writer.write(b"%s %s HTTP/1.0\r\nContent-Length: %d\r\n\r\n"
+                 % (method.encode(), path.encode(), len(body)) + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, body = response.split(b"\r\n\r\n", 1)
+    return int(head.split()[1]), body
+
+
+def test_submit_deduplicates_and_evicts(jobs):
+    async def main():
+        args = _runFromSpec(SPEC)
+        jobId = jobs.submit(*args)
+        assert jobs.submit(*args) == jobId
+        z, Azt = await jobs.result(jobId)
+        assert jobs.status(jobId)["state"] == "done"
+        assert Azt.shape == (3, 256)
+        # -- ONLY THE keepDone MOST RECENTLY SUBMITTED FINISHED JOBS ARE KEPT
+        for s in (0.1, 0.3, 0.4):
+            await jobs.result(jobs.submit(*_runFromSpec(dict(SPEC, s=s))))
+        assert jobId not in jobs.jobs() and len(jobs.jobs()) == 3
+        with pytest.raises(KeyError):
+            jobs.status(jobId)
+    asyncio.run(main())
+
+
+def test_status_of_cancelled_jobs(jobs):
+    async def main():
+        jobIds = [jobs.submit(*_runFromSpec(dict(SPEC, s=s))) for s in (0.1, 0.2, 0.3, 0.4)]
+        jobs.shutdown()
+        await asyncio.sleep(0.1)
+        states = [jobs.status(jobId)["state"] for jobId in jobIds]
+        assert set(states) <= {"done", "cancelled"} and "cancelled" in states
+        async for status in jobs.progress(jobIds[-1], interval=0.01):
+            pass
+        assert status["state"] == "cancelled"
+    asyncio.run(main())
+
+
+def test_user_callback_is_called_along_with_telemetry():
+    calls, progress = [], {}
+    args = _runFromSpec(SPEC)
+    _propagate("job", progress, args,
+               {"callback": lambda idx, z, A_t: calls.append(idx), "callbackSkip": 25})
+    assert calls == [25, 50, 75, 100]
+    assert progress["job"]["idx"] == 100 and progress["job"]["state"] == "running"
+
+
+def test_http_endpoint(jobs):
+    async def main():
+        server = await serve(jobs, port=0)
+        port = server.sockets[0].getsockname()[1]
+        code, body = await _request(port, "POST", "/jobs", SPEC)
+        assert code == 200
+        jobId = json.loads(body)["id"]
+        code, body = await _request(port, "GET", "/jobs/%s/result" % jobId)
+        assert code == 200
+        assert np.load(io.BytesIO(body))["Azt"].shape == (3, 256)
+        code, body = await _request(port, "GET", "/jobs/%s" % jobId)
+        assert code == 200 and json.loads(body)["state"] == "done"
+        code, body = await _request(port, "GET", "/jobs")
+        assert code == 200 and list(json.loads(body)) == [jobId]
+        # -- ERROR CODES
+        assert (await _request(port, "POST", "/jobs", {"tMax": 20}))[0] == 400
+        assert (await _request(port, "GET", "/jobs/unknown"))[0] == 404
+        assert (await _request(port, "GET", "/jobs/unknown/result"))[0] == 404
+        assert (await _request(port, "GET", "/runs/%s/result" % jobId))[0] == 404
+        code, body = await _request(port, "POST", "/jobs", dict(SPEC, Nz=1))
+        assert code == 200
+        code, body = await _request(port, "GET", "/jobs/%s/result" % json.loads(body)["id"])
+        assert code == 500
+        server.close()
+        await server.wait_closed()
+    asyncio.run(main())
+
+
+# EOF: test_job_service.py
@@ -0,0 +1,67 @@
+""" test_moving_frame.py
+
+tests of HONSE propagation in a moving reference frame
+"""
+import numpy as np
+import numpy.fft as nfft
+import pytest
+from split_step_solver import SSFM_HONSE_symmetric, FT, IFT
+from convergence import rmsError
+
+
+def _centroid(t, A):
+    I = np.abs(A)**2
+    return np.sum(t*I, axis=-1)/np.sum(I, axis=-1)
+
+
+def _toLab(t, A, offset):
+    """shift field of the moving frame by its offset, t + offset being the laboratory time"""
+    w = nfft.fftfreq(t.size, d=t[1]-t[0])*2*np.pi
+    return IFT(FT(A)*np.exp(1j*w*offset))
+
+
+@pytest.mark.parametrize("frameVelocity", [0.2, "auto"])
+def test_frame_offset_recovers_laboratory_field(t, frameVelocity):
+    z = np.linspace(0, 2, 401)
+    A0 = 1/np.cosh(t)
+    _, A_ref = SSFM_HONSE_symmetric(z, t, A0, -1, 0, 0, 1, 0.2, 100)
+    _, A, info = SSFM_HONSE_symmetric(z, t, A0, -1, 0, 0, 1, 0.2, 100,
+                                      frameVelocity=frameVelocity, full_output=True)
+    assert info["frameOffset"].shape == (5,)
+    for a, a_ref, offset in zip(A, A_ref, info["frameOffset"]):
+        assert rmsError(_toLab(t, a, offset), a_ref) < 1e-6
+
+
+def test_auto_frame_keeps_pulse_centred(t):
+    # -- SELF-STEEPENING PULSE DRIFTS BY ABOUT s*P0 PER UNIT LENGTH
+    z = np.linspace(0, 4, 801)
+    A0 = 1/np.cosh(t)
+    zz, A, info = SSFM_HONSE_symmetric(z, t, A0, -1, 0, 0, 1, 0.2, 100,
+                                       frameVelocity="auto", full_output=True)
+    assert np.all(np.abs(_centroid(t, A)) < 1e-4)
+    assert info["frameVelocity"] == pytest.approx(0.2, rel=0.05)
+    assert np.allclose(_centroid(t, A)+info["frameOffset"], 0.2*zz, rtol=0.05, atol=1e-3)
+
+
+def test_auto_frame_output_distances(t):
+    # -- SIDE STEPS TO zOut TAKEN IN VELOCITY UPDATE STEPS USE THE VELOCITY
+    # OF THE STEP
+    z = np.linspace(0, 2, 201)
+    A0 = 1/np.cosh(t)
+    zOut = [0.095, 0.195, 0.505, 0.995, 1.395, 2.]
+    _, A_ref = SSFM_HONSE_symmetric(z, t, A0, -1, 0, 0, 1, 0.2, zOut=zOut)
+    zz, A, info = SSFM_HONSE_symmetric(z, t, A0, -1, 0, 0, 1, 0.2, zOut=zOut,
+                                       frameVelocity="auto", frameUpdate=10,
+                                       full_output=True)
+    assert np.allclose(zz, zOut)
+    for a, a_ref, offset in zip(A, A_ref, info["frameOffset"]):
+        assert rmsError(_toLab(t, a, offset), a_ref) < 1e-6
+
+
+def test_unknown_frame_velocity(t):
+    with pytest.raises(ValueError):
+        SSFM_HONSE_symmetric(np.linspace(0, 1, 11), t, 1/np.cosh(t), -1, 0, 0, 1,
+                             frameVelocity="lab")
+
+
+# EOF: test_moving_frame.py
@@ -0,0 +1,32 @@
+""" test_observables.py
+
+tests of the scalar reducers of the field envelope
+"""
+import numpy as np
+import pytest
+from observables import defaultObservables, peakPower, peakPosition, temporalCentroid
+from observables import rmsWidth, temporalSkew, spectralCentroid, shockSlope
+
+
+@pytest.mark.parametrize("Nt", [1024])
+def test_reducers_of_gaussian_pulse(t):
+    # -- GAUSSIAN INTENSITY OF WIDTH 1, CENTERED AT 0.5, CARRIER AT w0=2
+    A = np.exp(-(t-0.5)**2/4 - 2j*t)
+    assert peakPower(t, A) == pytest.approx(1, rel=1e-3)
+    assert peakPosition(t, A) == pytest.approx(0.5, abs=t[1]-t[0])
+    assert temporalCentroid(t, A) == pytest.approx(0.5)
+    assert rmsWidth(t, A) == pytest.approx(1)
+    assert temporalSkew(t, A) == pytest.approx(0, abs=1e-10)
+    assert spectralCentroid(t, A) == pytest.approx(2)
+    assert shockSlope(t, A) == pytest.approx(np.exp(-0.5), rel=1e-3)
+
+
+def test_default_observables_return_floats(t):
+    A = 1/np.cosh(t)
+    obs = defaultObservables()
+    assert obs["energy"](t, A) == pytest.approx(2)
+    for f in obs.values():
+        assert np.isscalar(f(t, A)) and np.isfinite(f(t, A))
+
+
+# EOF: test_observables.py
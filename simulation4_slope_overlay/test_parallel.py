@@ -0,0 +1,65 @@
+""" test_parallel.py
+
+tests of the building blocks for multi-core execution of a single run
+"""
+import threading
+import numpy as np
+import numpy.fft as nfft
+import pytest
+from parallel import fftPair, ChunkedKernels, parallelEfficiency
+from split_step_solver import SSFM_HONSE_symmetric
+
+
+def _field(n=1000, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.standard_normal(n) + 1j*rng.standard_normal(n)
+
+
+def test_chunked_kernels_are_bit_identical():
+    A, B, R = _field(), _field(seed=1), np.abs(_field(seed=2))
+    serial, chunked = ChunkedKernels(A.size), ChunkedKernels(A.size, 3, chunkSize=64)
+    for k in (serial, chunked):
+        assert np.array_equal(k.mul(A, B), A*B)
+        assert np.array_equal(k.kerr(A), A*np.abs(A)**2)
+        assert np.array_equal(k.kerr(A, R, 0.18), A*((1-0.18)*np.abs(A)**2 + 0.18*R))
+        assert np.array_equal(k.euler(A, A, B, 0.1, 1., 0.2), A + 0.1*(1j*A - 0.2*B))
+    assert serial.utilization() is None
+    assert 0 < chunked.utilization() <= 1
+    chunked.shutdown()
+
+
+@pytest.mark.parametrize("workers, backend", [(None, None), (2, None), (2, "scipy")])
+def test_fft_pair_follows_solver_convention(workers, backend):
+    pytest.importorskip("scipy")
+    A = _field()
+    FT, IFT = fftPair(workers, backend)
+    assert np.allclose(FT(A), nfft.ifft(A))
+    assert np.allclose(IFT(FT(A)), A)
+
+
+def test_solver_releases_threads_on_failure():
+    t = np.linspace(-20, 20, 512, endpoint=False)
+    z = np.linspace(0, 1, 101)
+
+    def _callback(idx, z, A_t):
+        raise RuntimeError("abort")
+
+    nThreads = threading.active_count()
+    with pytest.raises(RuntimeError):
+        SSFM_HONSE_symmetric(z, t, 1/np.cosh(t), -1, 0, 0, 1, 0.2, workers=2,
+                             chunkSize=64, callback=_callback, callbackSkip=10)
+    assert threading.active_count() == nThreads
+
+
+def test_parallel_run_reports_utilization():
+    t = np.linspace(-20, 20, 512, endpoint=False)
+    z = np.linspace(0, 1, 101)
+    _, _, info = SSFM_HONSE_symmetric(z, t, 1/np.cosh(t), -1, 0, 0, 1, 0.2, 100,
+                                      workers=2, chunkSize=64, full_output=True)
+    assert 0 < info["kernelUtilization"] <= 1
+    S, eta = parallelEfficiency(SSFM_HONSE_symmetric, z, t, 1/np.cosh(t),
+                                -1, 0, 0, 1, 0.2, workers=2, nSteps=10)
+    assert S > 0 and eta == pytest.approx(S/2)
+
+
+# EOF: test_parallel.py
@@ -0,0 +1,36 @@
+""" test_pod.py
+
+tests of the POD reduced-order model
+"""
+import numpy as np
+from pod import randomizedSVD, ReducedModel
+from split_step_solver import SSFM_HONSE_symmetric
+
+
+def test_randomized_svd_matches_dense_svd(tmp_path):
+    rng = np.random.default_rng(1)
+    X = (rng.standard_normal((64, 5)) @ rng.standard_normal((5, 300))
+         + 1e-8*rng.standard_normal((64, 300))).T.astype(complex)
+    np.save(tmp_path/"h.npy", X[:200])
+    U, sigma = randomizedSVD([tmp_path/"h.npy", X[200:]], 5, chunkSize=64)
+    assert np.allclose(sigma, np.linalg.svd(X.T, compute_uv=False)[:5])
+    assert np.allclose(U.conj().T @ U, np.eye(5))
+    assert np.allclose(U @ (U.conj().T @ X.T), X.T, atol=1e-6)
+
+
+def test_reduced_model_interpolates_and_falls_back():
+    t = np.linspace(-20, 20, 512, endpoint=False)
+    z = np.linspace(0, 2, 2001)
+    A0 = 1/np.cosh(t)
+    histories = [SSFM_HONSE_symmetric(z, t, A0, -1, 0, 0, 1, s, 10)[1] for s in (0.1, 0.3)]
+    _, A_ref = SSFM_HONSE_symmetric(z, t, A0, -1, 0, 0, 1, 0.2, 100)
+    rom = ReducedModel(t, histories, rank=30, nDeim=40)
+    zz, Azt, info = rom.propagate(z, A0, -1, 0, 0, 1, 0.2, nSkip=100, full_output=True)
+    assert not info["fallback"] and np.allclose(zz, z[::100])
+    assert np.max(np.linalg.norm(Azt-A_ref, axis=1)/np.linalg.norm(A_ref, axis=1)) < 1e-2
+    _, Azt, info = rom.propagate(z, A0, -1, 0, 0, 1, 0.2, nSkip=100, tol=1e-8,
+                                 full_output=True)
+    assert info["fallback"] and np.array_equal(Azt, A_ref)
+
+
+# EOF: test_pod.py
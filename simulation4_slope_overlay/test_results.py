@@ -0,0 +1,45 @@
+""" test_results.py
+
+tests of the lazily evaluated result object
+"""
+import numpy as np
+import numpy.fft as nfft
+from results import PropagationResult
+
+
+def _result(cacheBytes=256*2**20):
+    t = np.linspace(-10, 10, 256, endpoint=False)
+    z = np.linspace(0, 1, 11)
+    Azt = np.exp(-t**2 - 1j*(2+z[:, None])*t)
+    return PropagationResult(z, t, Azt, cacheBytes)
+
+
+def test_derived_quantities_match_direct_computation():
+    res = _result()
+    assert np.array_equal(res.intensity(), np.abs(res.Azt)**2)
+    Iw = np.abs(nfft.fftshift(nfft.ifft(res.Azt, axis=-1), axes=-1))**2
+    assert np.allclose(res.spectrum(), Iw)
+    # -- CARRIER exp(-1j*w0*t) AT w0 = 2+z
+    assert np.allclose(res.instantaneousFrequency(tLim=(-2, 2)), 2+res.z[:, None])
+    assert np.allclose(res.w[np.argmax(res.spectrum(), axis=-1)], 2+res.z, atol=res.w[1]-res.w[0])
+
+
+def test_windows_are_served_from_cache():
+    res = _result()
+    I = res.intensity()
+    nBytes = res.cachedBytes
+    Iw = res.intensity(tLim=(-1, 1), zLim=(0.2, 0.5))
+    assert res.cachedBytes == nBytes and np.shares_memory(I, Iw)
+    assert Iw.shape == (4, np.count_nonzero((res.t >= -1) & (res.t <= 1)))
+    assert res.intensity() is I and not I.flags.writeable
+
+
+def test_cache_evicts_least_recently_used():
+    res = _result(cacheBytes=3*11*256*8)
+    I, P = res.intensity(), res.phase()
+    res.spectrum()      # -- CACHES SPECTRAL FIELD AND SPECTRUM, EVICTING I, P
+    assert res.cachedBytes <= res.cacheBytes
+    assert res.intensity() is not I
+
+
+# EOF: test_results.py
@@ -0,0 +1,44 @@
+""" test_snapshots.py
+
+tests of snapshot lookup, interpolation and re-propagation
+"""
+import numpy as np
+from snapshots import snapshotIndex, snapshotsAt
+from split_step_solver import SSFM_HONSE_symmetric
+from convergence import rmsError
+
+
+def _solver(t):
+    return lambda z, A0: SSFM_HONSE_symmetric(z, t, A0, -1, 0, 0, 1, 0.2, z.size-1)
+
+
+def test_snapshot_index_matches_linear_scan():
+    z = np.linspace(0, 10, 101)
+    zq = np.random.default_rng(0).uniform(-1, 11, 1000)
+    ref = [np.argmin(np.abs(z-z0)) for z0 in zq]
+    assert np.array_equal(snapshotIndex(z, zq), ref)
+    left = snapshotIndex(z, np.array([0., 0.05, 0.1, 9.99, 10.]), side="left")
+    assert np.array_equal(left, [0, 0, 1, 99, 100])
+
+
+def test_linear_interpolation_hits_snapshots():
+    z = np.linspace(0, 1, 5)
+    Azt = np.outer(z, [1, 1j])
+    Aq = snapshotsAt(z, Azt, [0.25, 0.375, 2.], method="linear")
+    assert np.allclose(Aq, [[0.25, 0.25j], [0.375, 0.375j], [1, 1j]])
+
+
+def test_propagate_matches_direct_run():
+    t = np.linspace(-20, 20, 256, endpoint=False)
+    zz = np.linspace(0, 2, 401)
+    z, Azt = SSFM_HONSE_symmetric(zz, t, 1/np.cosh(t), -1, 0, 0, 1, 0.2, 50)
+    zq = np.array([1.37, 0.5, 0.13, 1.9])
+    Aq = snapshotsAt(z, Azt, zq, method="propagate", solver=_solver(t), dz=0.005)
+    for z0, A in zip(zq, Aq):
+        _zz = np.linspace(0, z0, int(round(z0/0.005))+1)
+        assert rmsError(A, _solver(t)(_zz, Azt[0])[1][-1]) < 1e-4
+    assert np.array_equal(snapshotsAt(z, Azt, z[3], method="propagate",
+                                      solver=_solver(t), dz=0.005), Azt[3])
+
+
+# EOF: test_snapshots.py
@@ -0,0 +1,41 @@
+""" test_spectrogram.py
+
+tests of the batched spectrogram engine
+"""
+import numpy as np
+import numpy.fft as nfft
+from spectrogram import spectrogram, gaussianGate, referenceGate
+
+
+def _history():
+    t = np.linspace(-10, 10, 256, endpoint=False)
+    z = np.linspace(0, 1, 5)
+    return t, np.exp(-t**2/4 - 1j*(3+z[:, None])*t)
+
+
+def test_batched_spectrogram_matches_direct_computation():
+    t, Azt = _history()
+    g = gaussianGate(t, 1.)
+    tau, w, S = spectrogram(t, Azt, g, nFFT=g.size+10, chunkSize=2)
+    for i, k in ((0, 128), (3, 100)):
+        gt = np.interp(t-tau[k], (np.arange(g.size)-g.size//2)*(t[1]-t[0]), g,
+                       left=0, right=0)
+        seg = (Azt[i]*gt)[k-g.size//2:k-g.size//2+g.size]
+        ref = np.abs(nfft.fftshift(nfft.ifft(seg, n=g.size+10)))**2
+        assert np.allclose(S[i, k], ref)
+    # -- CARRIER exp(-1j*w0*t) AT w0 = 3+z
+    assert np.allclose(w[np.argmax(S[:, 128], axis=-1)], 3+np.linspace(0, 1, 5),
+                       atol=w[1]-w[0])
+
+
+def test_hop_streaming_and_xfrog(tmp_path):
+    t, Azt = _history()
+    g = referenceGate(t, 1/np.cosh(2*t), 31)
+    _, _, S = spectrogram(t, Azt, g)
+    tau, _, S4 = spectrogram(t, Azt, g, hop=4, fileName=tmp_path/"S.npy")
+    assert np.array_equal(tau, t[::4])
+    assert np.allclose(S4, S[:, ::4])
+    assert np.allclose(np.load(tmp_path/"S.npy"), S[:, ::4])
+
+
+# EOF: test_spectrogram.py
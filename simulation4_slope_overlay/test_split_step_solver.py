@@ -0,0 +1,254 @@
+""" test_split_step_solver.py
+
+regression and accuracy tests of the split step solvers, based on known
+solutions of the NSE and HONSE
+
+Fast paths of SSFM_HONSE_symmetric are checked against the plain serial
+solver with a tolerance, see FAST_PATHS. A new fast path is accepted once
+it is listed there together with the RMS error it may introduce.
+"""
+import numpy as np
+import numpy.fft as nfft
+import pytest
+from helper_functions import energy
+from split_step_solver import SSFM_NSE_simple, SSFM_NSE_symmetric, SSFM_HONSE_symmetric
+from split_step_solver import FT, IFT
+from split_step_solver import _OutputSchedule, _EventMonitor, _MovingFrame, _Recorder
+from convergence import convergenceStudy, solitonReference, rmsError
+from observables import defaultObservables
+from events import NonFinite, GradientThreshold
+from observables import spectralCentroid
+from raman import blowWoodResponse
+from snapshots import logSpaced
+
+# -- FIBER AND PULSE PARAMETERS OF simulation1, IN NORMALIZED UNITS
+PAR = {"beta2": -1, "gamma": 1}
+t0 = 1
+P0 = np.abs(PAR["beta2"])/t0/t0/PAR["gamma"]
+
+
+@pytest.fixture
+def A0(t):
+    return np.sqrt(P0)/np.cosh(t/t0)
+
+
+def _honse(z, t, A0, s=0., nSkip=None, **kwargs):
+    nSkip = z.size-1 if nSkip is None else nSkip
+    return SSFM_HONSE_symmetric(z, t, A0, PAR["beta2"], 0, 0, PAR["gamma"], s, nSkip, **kwargs)
+
+
+def test_FT_convention_derivative(t, A0):
+    # -- SPECTRAL DERIVATIVE AS USED FOR THE SELF-STEEPENING TERM
+    w = nfft.fftfreq(t.size,d=t[1]-t[0])*2*np.pi
+    dA = IFT((-1j) * w * FT(A0))
+    assert np.allclose(dA, -np.sqrt(P0)*np.tanh(t/t0)/np.cosh(t/t0)/t0, atol=1e-7)
+
+
+@pytest.mark.parametrize("solver, tol", [
+    (SSFM_NSE_simple, 1e-3),
+    (SSFM_NSE_symmetric, 1e-5),
+])
+def test_NSE_fundamental_soliton(t, A0, solver, tol):
+    z = np.linspace(0, 2, 2001)
+    _, Azt = solver(z, t, A0, PAR["beta2"], PAR["gamma"], z.size-1)
+    assert rmsError(Azt[-1], solitonReference(t, z[-1], PAR)) < tol
+    # -- SHAPE IS PRESERVED UP TO A PHASE
+    assert rmsError(np.abs(Azt[-1]), np.abs(A0)) < tol
+
+
+def test_HONSE_fundamental_soliton(t, A0):
+    z = np.linspace(0, 2, 2001)
+    _, Azt = _honse(z, t, A0)
+    assert rmsError(Azt[-1], solitonReference(t, z[-1], PAR)) < 1e-2
+
+
+@pytest.mark.parametrize("solver", [SSFM_NSE_simple, SSFM_NSE_symmetric])
+def test_NSE_energy_conservation(t, A0, solver):
+    z = np.linspace(0, 2, 501)
+    _, Azt = solver(z, t, 1.5*A0, PAR["beta2"], PAR["gamma"], 100)
+    E = energy(t, Azt)
+    assert np.allclose(E, E[0], rtol=1e-10)
+
+
+def test_HONSE_energy_drift_is_first_order(t, A0):
+    drift = []
+    for Nz in (501, 1001):
+        z = np.linspace(0, 2, Nz)
+        _, Azt = _honse(z, t, A0, s=0.1)
+        drift.append(energy(t, Azt[-1])/energy(t, A0)-1)
+    assert drift[0] < 1e-2
+    assert drift[1] == pytest.approx(drift[0]/2, rel=0.05)
+
+
+def test_self_steepening_drift(t, A0):
+    s = 0.1
+    z = np.linspace(0, 1, 1001)
+    zz, Azt = _honse(z, t, A0, s=s, nSkip=250)
+    I = np.abs(Azt)**2
+    tc = np.sum(t*I, axis=-1)/np.sum(I, axis=-1)
+    assert np.allclose(tc, s*P0*zz, rtol=0.05, atol=1e-3)
+
+
+@pytest.mark.parametrize("schemes, order", [
+    (("simple",), 1),
+    (("symmetric",), 2),
+])
+def test_observed_order(t, A0, schemes, order):
+    res = convergenceStudy(t, A0, 1., PAR, [0.1, 0.05, 0.025], schemes=schemes,
+                           reference=solitonReference, maxWorkers=1)
+    assert res[schemes[0]]["order"] == pytest.approx(order, abs=0.15)
+
+
+@pytest.mark.parametrize("scheme, dzList, order, s", [
+    ("yoshida4", [0.2, 0.1, 0.05], 4, 0.),
+    ("yoshida6", [0.1, 0.05, 0.025], 6, 0.),
+    ("HONSE-yoshida4", [0.1, 0.05, 0.025], 4, 0.2),
+])
+def test_composition_order(t, A0, scheme, dzList, order, s):
+    # -- RUN BEYOND THE ACCURACY OF THE SOLITON REFERENCE, SO COMPARE WITH
+    # A FINE yoshida6 RUN, OR yoshida4 FOR THE HONSE
+    ref = "yoshida6" if s == 0 else "HONSE-yoshida4"
+    res = convergenceStudy(t, A0, 2., dict(PAR, s=s), dzList, schemes=(scheme,),
+                           refScheme=ref, refDz=0.0025, maxWorkers=1)
+    assert res[scheme]["order"] == pytest.approx(order, abs=0.3)
+
+
+# -- FAST PATHS OF SSFM_HONSE_symmetric AND ADMISSIBLE RMS ERRORS
+FAST_PATHS = [
+    ({"workers": 2, "chunkSize": 64}, 1e-12),
+    ({"frameVelocity": 0.}, 0.),
+    ({"spectralFilter": 0., "absorber": 0.}, 1e-14),
+]
+
+
+@pytest.mark.parametrize("kwargs, tol", FAST_PATHS)
+def test_HONSE_fast_paths(t, A0, kwargs, tol):
+    z = np.linspace(0, 1, 501)
+    _, A_ref = _honse(z, t, A0, s=0.2, nSkip=100)
+    _, A = _honse(z, t, A0, s=0.2, nSkip=100, **kwargs)
+    assert A.shape == A_ref.shape
+    assert max(rmsError(a, b) for a, b in zip(A, A_ref)) <= tol
+
+
+def test_HONSE_moving_frame(t, A0):
+    # -- FRAME MOVES BY EXACTLY ONE TIME SAMPLE PER STEP
+    dt = t[1]-t[0]
+    z = np.linspace(0, 0.5, 51)
+    _, A_ref = _honse(z, t, A0, s=0.2)
+    _, A, info = _honse(z, t, A0, s=0.2, frameVelocity=dt/(z[1]-z[0]), full_output=True)
+    assert rmsError(A[-1], np.roll(A_ref[-1], -(z.size-1))) < 1e-10
+    assert info["frameOffset"][-1] == pytest.approx((z.size-1)*dt)
+
+
+def test_HONSE_observables(t, A0):
+    z = np.linspace(0, 1, 201)
+    obs = defaultObservables()
+    zz, Azt = _honse(z, t, A0, s=0.2, nSkip=50)
+    zo, O = _honse(z, t, A0, s=0.2, observables=obs, obsSkip=50)
+    assert np.array_equal(zz, zo)
+    for name, f in obs.items():
+        assert np.allclose(O[name], [f(t, A) for A in Azt])
+
+
+def test_HONSE_stops_at_shock(t, A0):
+    z = np.linspace(0, 20, 2001)
+    zz, Azt, info = _honse(z, t, 2*A0, s=0.5, nSkip=1000,
+                           events=[GradientThreshold(50.), NonFinite()],
+                           full_output=True)
+    assert info["zStop"] is not None and info["zStop"] < z[-1]
+    assert info["events"][0][0] == "gradientThreshold"
+    assert np.all(np.isfinite(Azt))
+    # -- THE STOPPING FIELD IS KEPT AS END OF THE RUN, AFTER THE OUTPUT
+    # DISTANCES PASSED IN THE LAST STEP
+    zStop = info["zStop"]
+    zo, Ao, info = _honse(z, t, 2*A0, s=0.5, zOut=[zStop/2, zStop-0.005, 19.],
+                          events=[GradientThreshold(50.)], full_output=True)
+    assert np.allclose(zo, [zStop/2, zStop-0.005, zStop]) and info["state"]["forcedRecord"]
+    assert np.array_equal(Ao[-1], Azt[-1])
+
+
+def test_HONSE_instantaneous_raman_response_is_kerr(t, A0):
+    z = np.linspace(0, 1, 201)
+    hR = np.zeros(t.size); hR[0] = 1.
+    _, A_ref = _honse(z, t, A0, s=0.1)
+    _, A = _honse(z, t, A0, s=0.1, fR=0.18, hR=hR)
+    assert rmsError(A[-1], A_ref[-1]) < 1e-12
+
+
+def test_HONSE_raman_self_frequency_shift():
+    # -- FUNDAMENTAL SOLITON OF DURATION 50 fs SHIFTS TO LOWER FREQUENCIES
+    t = np.linspace(-2, 2, 1024, endpoint=False)
+    z = np.linspace(0, 1, 2001)
+    A0 = 1/np.cosh(t/0.05)
+    par = (-0.0025, 0, 0, 1.)
+    _, A_ref = SSFM_HONSE_symmetric(z, t, A0, *par, nSkip=z.size-1)
+    _, A = SSFM_HONSE_symmetric(z, t, A0, *par, nSkip=z.size-1, fR=0.18, hR=blowWoodResponse)
+    assert abs(spectralCentroid(t, A_ref[-1])) < 1e-6
+    assert spectralCentroid(t, A[-1]) < -0.1
+
+
+def test_HONSE_output_distances(t, A0):
+    z = np.linspace(0, 1, 201)
+    zz, Azt = _honse(z, t, A0, s=0.2, nSkip=1)
+    zOut = logSpaced(0, 1, 6, 0.0123, dense="end")
+    zo, Ao = _honse(z, t, A0, s=0.2, zOut=zOut)
+    assert np.allclose(zo, zOut)
+    # -- SIDE STEP FROM THE PRECEDING z-SAMPLE HITS zOut EXACTLY
+    idx = np.searchsorted(z, zOut[-2])-1
+    _, A = _honse(np.array([z[idx], zOut[-2]]), t, Azt[idx], s=0.2)
+    assert np.array_equal(Ao[-2], A[-1])
+    assert np.array_equal(Ao[-1], Azt[-1])
+
+
+def test_HONSE_change_triggered_recording(t, A0):
+    z = np.linspace(0, 2, 401)
+    zz, Azt = _honse(z, t, A0, s=0.2, nSkip=1, recordTol=0.05)
+    change = np.linalg.norm(np.diff(Azt, axis=0), axis=1)/np.linalg.norm(Azt[:-1], axis=1)
+    assert 2 < zz.size < z.size/10 and zz[-1] == z[-1]
+    assert np.all(change[:-1] > 0.05)
+
+
+def test_output_schedule():
+    z = np.linspace(0, 1, 11)
+    schedule = _OutputSchedule(z, 3, zOut=[0, 0.25, 0.3, 1])
+    assert schedule.keepsStart and schedule.nOut == 1
+    (zo, dzOut), last = schedule.passed(3)
+    assert zo == 0.25 and np.isclose(dzOut, 0.05) and last == (z[3], None)
+    assert schedule.passed(4) == []
+    with pytest.raises(ValueError):
+        _OutputSchedule(z, 1, zOut=[0.5, 0.2])
+    schedule = _OutputSchedule(z, 2, recordTol=0.1)
+    schedule.kept(np.ones(4))
+    assert not schedule.due(1, 2*np.ones(4)) and not schedule.due(2, 1.05*np.ones(4))
+    assert schedule.due(2, 2*np.ones(4)) and schedule.forced(10)
+    schedule.kept(3*np.ones(4), forced=True)
+    assert schedule.state()["forcedRecord"] and np.all(schedule.state()["lastRecorded"] == 1)
+
+
+def test_event_monitor(t, A0):
+    monitor = _EventMonitor(t, [NonFinite(), GradientThreshold(1., action="refine")],
+                            state={"events": ["nonFinite"]})
+    A_t, stop = monitor.check(0.1, A0, lambda n: A0/n)
+    assert A_t is A0 and not stop and monitor.occurred == []
+    # -- A STEP THAT REMAINS STEEP AFTER REFINEMENT IS RECORDED ONCE
+    steep = np.tanh(10*t)
+    A_t, stop = monitor.check(0.2, steep, lambda n: steep)
+    monitor.check(0.3, steep, lambda n: steep)
+    assert not stop and monitor.occurred == [("gradientThreshold", 0.2)]
+    assert monitor.state() == {"events": ["gradientThreshold", "nonFinite"]}
+    assert monitor.check(0.4, np.nan*A0, None)[1]
+
+
+def test_recorder(t, A0):
+    frame = _MovingFrame(t, 0.5, 10, A0)
+    recorder = _Recorder(t, frame, observables={"E": lambda t, A: np.sum(np.abs(A)**2)})
+    recorder.record(0., A0)
+    frame.advance(0.2)
+    recorder.record(0.1, 2*A0, offset=frame.offsetBefore(0.1))
+    zz, obs = recorder.results()
+    assert np.array_equal(zz, [0., 0.1]) and np.allclose(obs["E"][1], 4*obs["E"][0])
+    assert np.allclose(recorder.offsets, [0., 0.05])
+    assert _Recorder(t, frame).results()[1].shape == (0, t.size)
+
+
+# EOF: test_split_step_solver.py
@@ -0,0 +1,40 @@
+""" test_surrogate.py
+
+tests of the moment-method surrogate
+"""
+import numpy as np
+from surrogate import momentEquations, MomentSurrogate
+
+
+def test_moment_equations_vectorize_and_keep_soliton():
+    s = np.array([0., 0.1, 0.2])
+    res = momentEquations(2., -1, 1, s)
+    # -- FUNDAMENTAL SOLITON: FIXED WIDTH, CENTROID DRIFTS BY s*P*z
+    assert np.allclose(res["tau"], 1) and np.allclose(res["C"], 0)
+    assert np.allclose(res["T"], 2*s)
+    assert np.all(res["Phi"] == 0)
+    single = momentEquations(2., -0.3, 1, 0.2, P0=1.5, phiCrit=0.1)
+    many = momentEquations(2., [-1, -0.3], 1, 0.2, P0=1.5, phiCrit=0.1)
+    for k in single:
+        assert np.isclose(single[k], many[k][1])
+    # -- ARRAY OF PEAK POWERS BROADCASTS AGAINST SCALAR PARAMETERS
+    P0 = np.array([1., 1.5, 2.])
+    res = momentEquations(2., -0.3, 1, 0.2, P0=P0, phiCrit=0.1)
+    assert res["P"].shape == (3,) and np.isclose(res["P"][1], single["P"])
+    assert np.all(np.diff(res["zShock"]) < 0)
+
+
+def test_calibration_reduces_error():
+    t = np.linspace(-20, 20, 1024, endpoint=False)
+    z = np.linspace(0, 3, 3001)
+    parList = [{"beta2": b2, "gamma": 1, "s": s, "P0": 1}
+               for b2 in (-1, -0.1) for s in (0.2, 0.4)]
+    surrogate = MomentSurrogate()
+    report = surrogate.calibrate(z, t, parList)
+    assert np.isfinite(surrogate.phiCrit)
+    for k in ("T", "width", "zShock"):
+        assert report[k]["after"] <= report[k]["before"]
+    assert report["T"]["after"] < 0.1
+
+
+# EOF: test_surrogate.py
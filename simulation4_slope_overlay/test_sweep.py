@@ -0,0 +1,71 @@
+""" test_sweep.py
+
+tests of parameter sweeps with shared-memory result hand-off
+"""
+import os
+import numpy as np
+import pytest
+from split_step_solver import SSFM_HONSE_symmetric
+from sweep import SweepRunner, historyShape
+from events import GradientThreshold
+from observables import defaultObservables
+
+
+def _released(sweep, backend):
+    name = sweep._spec[1]
+    return sweep.histories is None and \
+        not os.path.exists(name if backend == "memmap" else "/dev/shm/"+name)
+
+
+@pytest.mark.parametrize("backend", ["shm", "memmap"])
+def test_sweep_matches_serial_runs(t, backend):
+    z = np.linspace(0, 1, 201)
+    A0 = 1/np.cosh(t)
+    parList = [{"beta2": -1, "gamma": 1, "s": s} for s in (0., 0.1, 0.2)]
+    with SweepRunner(z, t, 10, len(parList), backend=backend) as sweep:
+        H = sweep.run(A0, parList, maxWorkers=2)
+        assert H.shape == (3,)+historyShape(z, t, 10)
+        for k, par in enumerate(parList):
+            zz, Azt = SSFM_HONSE_symmetric(z, t, A0, -1, 0, 0, 1, par["s"], 10)
+            assert np.array_equal(sweep.z[k], zz) and np.array_equal(H[k], Azt)
+    assert _released(sweep, backend)
+
+
+def test_runs_of_different_length(t):
+    # -- THE STEEPENING PULSE IS STOPPED EARLIER
+    z = np.linspace(0, 4, 401)
+    A0 = 1.5/np.cosh(t)
+    parList = [{"beta2": -1, "gamma": 1, "s": s} for s in (0., 0.5)]
+    kwargs = {"events": [GradientThreshold(20.)], "recordTol": 0.05}
+    with SweepRunner(z, t, 7, len(parList)) as sweep:
+        sweep.run(A0, parList, maxWorkers=2, **kwargs)
+        assert sweep.nRows[1] < sweep.nRows[0] <= sweep.histories.shape[1]
+        for k, par in enumerate(parList):
+            zz, Azt = SSFM_HONSE_symmetric(z, t, A0, -1, 0, 0, 1, par["s"], 7, **kwargs)
+            zk, Ak = sweep.history(k)
+            assert np.array_equal(zk, zz) and np.array_equal(Ak, Azt)
+
+
+def test_unsupported_options_are_rejected(t):
+    z = np.linspace(0, 1, 101)
+    parList = [{"beta2": -1, "gamma": 1}]
+    with SweepRunner(z, t, 50, 1) as sweep:
+        with pytest.raises(ValueError):
+            sweep.run(1/np.cosh(t), parList, observables=defaultObservables())
+        with pytest.raises(ValueError):
+            sweep.run(1/np.cosh(t), parList, zOut=[0., 0.25, 0.5, 1.])
+        sweep.run(1/np.cosh(t), parList, maxWorkers=1, zOut=[0., 0.25, 2.])
+        assert np.allclose(sweep.z[0], [0., 0.25])
+
+
+@pytest.mark.parametrize("backend", ["shm", "memmap"])
+def test_block_is_released_if_a_run_fails(t, backend):
+    z = np.linspace(0, 1, 101)
+    with pytest.raises(KeyError):
+        with SweepRunner(z, t, 50, 2, backend=backend) as sweep:
+            sweep.run(1/np.cosh(t), [{"beta2": -1, "gamma": 1}, {"beta2": -1}],
+                      maxWorkers=2)
+    assert _released(sweep, backend)
+
+
+# EOF: test_sweep.py
@@ -0,0 +1,50 @@
+""" test_telemetry.py
+
+tests of the telemetry callback of the propagation loop
+"""
+import json
+import time
+import numpy as np
+from split_step_solver import SSFM_HONSE_symmetric
+from telemetry import Telemetry, LogFileSink, MetricsSink
+
+
+def test_telemetry_records(tmp_path):
+    t = np.linspace(-20, 20, 256, endpoint=False)
+    z = np.linspace(0, 1, 1001)
+    A0 = 1/np.cosh(t)
+    logName, metricsName = tmp_path/"run.log", tmp_path/"run.prom"
+    tm = Telemetry(t, z, sinks=[LogFileSink(logName), MetricsSink(metricsName)], keep=True)
+    _, Azt = SSFM_HONSE_symmetric(z, t, A0, -1, 0, 0, 1, 0.2, 250,
+                                  callback=tm, callbackSkip=250)
+
+    assert [r["idx"] for r in tm.records] == [250, 500, 750, 1000]
+    assert tm.records[-1]["eta"] == 0
+    assert np.isclose(tm.records[-1]["energy"], np.sum(np.abs(Azt[-1])**2)*(t[1]-t[0]))
+    assert np.isclose(tm.records[-1]["peakPower"], np.max(np.abs(Azt[-1])**2))
+    assert [json.loads(l)["z"] for l in open(logName)] == [r["z"] for r in tm.records]
+    assert "nlse_z 1.0" in open(metricsName).read()
+
+
+def test_telemetry_overhead(tmp_path):
+    # -- TIME SPENT IN THE CALLBACK, INCLUDING FILE SINKS, RELATIVE TO THE
+    # RUN; COMPARING TWO WALL CLOCK TIMES IS DOMINATED BY THEIR NOISE
+    t = np.linspace(-20, 20, 4096, endpoint=False)
+    z = np.linspace(0, 2, 2001)
+    tm = Telemetry(t, z, sinks=[LogFileSink(tmp_path/"run.log"),
+                                MetricsSink(tmp_path/"run.prom")])
+    spent = []
+
+    def callback(idx, zi, A_t):
+        tic = time.perf_counter()
+        tm(idx, zi, A_t)
+        spent.append(time.perf_counter()-tic)
+
+    tic = time.perf_counter()
+    SSFM_HONSE_symmetric(z, t, 1/np.cosh(t), -1, 0, 0, 1, 0.2, 500,
+                         callback=callback, callbackSkip=500)
+    total = time.perf_counter()-tic
+    assert len(spent) == 4 and sum(spent) < 0.01*total
+
+
+# EOF: test_telemetry.py